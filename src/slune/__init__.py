@@ -1,14 +1,15 @@
 # from .slune import submit_job, sbatchit
-# __all__ = ['slune', 'base', 'utils', 'loggers', 'savers', 'searchers' ]
+# __all__ = ['slune', 'base', 'utils', 'loggers', 'savers', 'searchers', 'executors' ]
 
 from .searchers import *
 from .savers import *
 from .loggers import *
-from .slune import submit_job, sbatchit, lsargs, get_csv_saver
+from .slune import submit_job, sbatchit, lsargs, get_csv_saver, run_parallel
+from .executors import *
 from .utils import *
 from . import base
 
-# __all__ = ['submit_job', 'sbatchit', 'lsargs', 'get_csv_saver',
+# __all__ = ['submit_job', 'sbatchit', 'lsargs', 'get_csv_saver', 'run_parallel',
         #    'base', 'utils', 'default', 'grid', 'csv']
 
 import importlib.metadata
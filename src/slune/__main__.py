@@ -0,0 +1,47 @@
+import argparse
+from slune.savers.index import ResultsIndex
+import sys
+from slune.slune import get_array_args, run_bundle
+
+def main(argv=None):
+    """ Command line interface for slune.
+
+    Usage:
+        python -m slune rebuild-index <root_dir>
+        python -m slune array-args <manifest_path> [--task-id <task_id>]
+        python -m slune run-bundle <script_path> <manifest_path> [--bundle-id <bundle_id>] [--n-workers <n_workers>]
+
+    Args:
+        - argv (list of str, optional): Arguments to parse, default is None (use sys.argv).
+
+    """
+
+    parser = argparse.ArgumentParser(prog='slune')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    rebuild = subparsers.add_parser('rebuild-index', help='Rebuild the index of the results files stored in a root directory.')
+    rebuild.add_argument('root_dir', help='Path to the root directory containing the results.')
+    array_args = subparsers.add_parser('array-args', help='Print the arguments of a job array task, one per line.')
+    array_args.add_argument('manifest_path', help='Path to the manifest file of the job array.')
+    array_args.add_argument('--task-id', type=int, default=None, help='Index of the task, defaults to SLURM_ARRAY_TASK_ID.')
+    bundle = subparsers.add_parser('run-bundle', help='Run the script for each configuration of a bundle of a packed search.')
+    bundle.add_argument('script_path', help='Path to the script to run for each configuration.')
+    bundle.add_argument('manifest_path', help='Path to the manifest file of the packed search.')
+    bundle.add_argument('--bundle-id', type=int, default=None, help='Index of the bundle, defaults to SLURM_ARRAY_TASK_ID.')
+    bundle.add_argument('--n-workers', type=int, default=1, help='Number of configurations to run at the same time.')
+    args = parser.parse_args(argv)
+
+    if args.command == 'rebuild-index':
+        index = ResultsIndex(args.root_dir)
+        index.rebuild()
+        print(f"Indexed {len(index.get_files())} results files in {args.root_dir}")
+    elif args.command == 'array-args':
+        for arg in get_array_args(args.manifest_path, args.task_id):
+            print(arg)
+    elif args.command == 'run-bundle':
+        returncodes = run_bundle(args.script_path, args.manifest_path, args.bundle_id, n_workers=args.n_workers)
+        print(f"Ran {len(returncodes)} configurations, {sum(code != 0 for code in returncodes)} failed")
+        if any(code != 0 for code in returncodes):
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
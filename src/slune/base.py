@@ -8,7 +8,13 @@ class BaseSearcher(metaclass=abc.ABCMeta):
     Outlines a protocol for creating a search space and creating configurations from it.
     Methods document what they should do once implemented. 
 
+    Searchers whose next_tune waits for the results of the configurations they returned (eg. SearcherASHA)
+    should set waits_for_results to True, so they aren't used where every configuration is taken before any job is started.
+
     """
+
+    waits_for_results = False
+
     @abc.abstractmethod
     def __init__(self, *args, **kwargs):
         """ Initialises the searcher. """
@@ -142,3 +148,55 @@ class BaseSaver(metaclass=abc.ABCMeta):
         """
 
         pass
+
+    def exists_many(self, params_list: list) -> list:
+        """ Checks how many runs already exist in storage for each of a list of configurations.
+
+        By default simply calls exists for each configuration,
+        feel free to override this method if storage can be checked for many configurations at once more efficiently.
+
+        Args:
+            - params_list (list of dict): List of configurations to check.
+
+        Returns:
+            - num_runs (list of int): Number of runs that exist in storage for each configuration, in the same order as given.
+
+        """
+
+        return [self.exists(params) for params in params_list]
+
+class BaseExecutor(metaclass=abc.ABCMeta):
+    """ Base class for all Executors.
+
+    This must be subclassed to implement different Executor classes.
+    Please name your executor class Executor<ExecutorName>.
+    Outlines a protocol for running jobs, eg. by submitting them to a cluster or running them on the local machine.
+    Methods document what they should do once implemented.
+
+    """
+
+    @abc.abstractmethod
+    def __init__(self, *args, **kwargs):
+        """ Initialises the executor. """
+
+        pass
+
+    @abc.abstractmethod
+    def submit(self, script_path: str, args: dict):
+        """ Starts a job running the script at script_path with the given arguments.
+
+        Should not wait for the job to finish, so that many jobs can be submitted one after the other.
+
+        """
+
+        pass
+
+    def wait(self) -> list:
+        """ Waits for all submitted jobs to finish and returns a list with information on each job.
+
+        By default returns an empty list straight away,
+        override this method if the executor can wait for its jobs (eg. if they run on the local machine).
+
+        """
+
+        return []
@@ -0,0 +1,4 @@
+from .slurm import ExecutorSlurm
+from .local import ExecutorLocal
+
+# __all__ = ['ExecutorSlurm', 'ExecutorLocal']
\ No newline at end of file
@@ -0,0 +1,158 @@
+from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+import os
+import re
+import subprocess
+import sys
+import time
+from slune.base import BaseExecutor
+from slune.utils import dict_to_strings, get_cpu_count
+
+class ExecutorLocal(BaseExecutor):
+    """ Runs each job as a process on the local machine, running up to n_workers jobs at the same time.
+
+    Useful to run a search on a workstation or any machine without Slurm.
+    By default we run as many jobs at the same time as fit in the CPU budget (all the cores of the machine),
+    giving each job cpus_per_job cores. The number of threads used by libraries such as numpy and torch
+    is limited to cpus_per_job, by setting OMP_NUM_THREADS etc. in the environment of each job,
+    so the jobs don't compete with each other for cores.
+
+    The stdout and stderr of each job are written to their own log files in log_dir.
+    Once all jobs are submitted, use wait to wait for them to finish and get the runtime and return code of each job.
+
+    Attributes:
+        - cpus_per_job (int): Number of CPU cores given to each job.
+        - n_workers (int): Number of jobs to run at the same time.
+        - log_dir (str): Path to the directory the logs of each job are written to.
+        - python (str): Path to the python executable used to run python scripts.
+        - verbose (bool): Whether to print the runtime of each job when it finishes.
+
+    """
+
+    THREAD_ENV_VARS = ['OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'NUMEXPR_NUM_THREADS', 'VECLIB_MAXIMUM_THREADS']
+
+    def __init__(self, n_workers: Optional[int] = None, cpus_per_job: int = 1, cpu_budget: Optional[int] = None,
+                 log_dir: str = 'slune_logs', python: str = sys.executable, verbose: bool = True):
+        """ Initialises the executor.
+
+        Args:
+            - n_workers (int, optional): Number of jobs to run at the same time,
+                default is None (as many as fit in the CPU budget).
+            - cpus_per_job (int, optional): Number of CPU cores given to each job, default is 1.
+            - cpu_budget (int, optional): Total number of CPU cores the jobs can use,
+                default is None (all the cores available to this process).
+            - log_dir (str, optional): Path to the directory the logs of each job are written to, default is 'slune_logs'.
+            - python (str, optional): Path to the python executable used to run python scripts, default is the one running slune.
+            - verbose (bool, optional): Whether to print the runtime of each job when it finishes, default is True.
+
+        """
+
+        if cpus_per_job < 1:
+            raise ValueError("cpus_per_job must be at least 1")
+        if cpu_budget is None:
+            cpu_budget = get_cpu_count()
+        if n_workers is None:
+            n_workers = max(cpu_budget // cpus_per_job, 1)
+        if n_workers < 1:
+            raise ValueError("n_workers must be at least 1")
+        self.cpus_per_job = cpus_per_job
+        self.n_workers = n_workers
+        self.log_dir = log_dir
+        self.python = python
+        self.verbose = verbose
+        # Each job is run and waited on by a thread, the work itself is done by the job's process
+        self._pool = None
+        self._futures = []
+
+    def get_command(self, script_path: str, args: List[str]) -> List[str]:
+        """ Returns the command used to run the script, python scripts are run with self.python.
+
+        Args:
+            - script_path (str): Path to the script to be run.
+            - args (list of str): Arguments to be passed to the script, in the form ['--argument_name=argument_value', ...].
+
+        Returns:
+            - command (list of str): Command used to run the script.
+
+        """
+
+        if script_path.endswith('.py'):
+            return [self.python, script_path] + args
+        return [script_path] + args
+
+    def get_env(self) -> dict:
+        """ Returns the environment each job is run in, limiting the number of threads to cpus_per_job.
+
+        Variables already set in our environment are left as they are.
+
+        Returns:
+            - env (dict): Environment variables of each job.
+
+        """
+
+        env = dict(os.environ)
+        for var in self.THREAD_ENV_VARS:
+            env.setdefault(var, str(self.cpus_per_job))
+        return env
+
+    def run(self, job_id: int, script_path: str, args: List[str]) -> dict:
+        """ Runs a job, waiting for it to finish.
+
+        Args:
+            - job_id (int): Index of the job, used to name its log files.
+            - script_path (str): Path to the script to be run.
+            - args (list of str): Arguments to be passed to the script, in the form ['--argument_name=argument_value', ...].
+
+        Returns:
+            - result (dict): Contains the 'job_id', 'args', 'returncode', 'runtime' (in seconds)
+                and the paths of the 'stdout' and 'stderr' log files of the job.
+
+        """
+
+        name = re.sub(r'[^\w=.,-]', '_', '_'.join([str(job_id)] + [arg.lstrip('-') for arg in args]))[:200]
+        stdout_path = os.path.join(self.log_dir, name + '.out')
+        stderr_path = os.path.join(self.log_dir, name + '.err')
+        start = time.perf_counter()
+        with open(stdout_path, 'w') as stdout, open(stderr_path, 'w') as stderr:
+            try:
+                returncode = subprocess.run(self.get_command(script_path, args), stdout=stdout, stderr=stderr, env=self.get_env()).returncode
+            except OSError as e:
+                stderr.write(f"Error running job: {e}\n")
+                returncode = -1
+        runtime = time.perf_counter() - start
+        if self.verbose:
+            print(f"Job {job_id} finished in {runtime:.1f}s with return code {returncode}: {' '.join(args)}")
+        return {'job_id': job_id, 'args': args, 'returncode': returncode, 'runtime': runtime,
+                'stdout': stdout_path, 'stderr': stderr_path}
+
+    def submit(self, script_path: str, args: dict):
+        """ Queues a job running the script at script_path with the given arguments.
+
+        The job starts as soon as one of the workers is free.
+
+        Args:
+            - script_path (str): Path to the script (of the model) to be run.
+            - args (dict): Contains (key, value) pairs for all the arguments to be passed to the script.
+
+        """
+
+        if self._pool is None:
+            os.makedirs(self.log_dir, exist_ok=True)
+            self._pool = ThreadPoolExecutor(max_workers=self.n_workers)
+        job_id = len(self._futures)
+        self._futures.append(self._pool.submit(self.run, job_id, script_path, dict_to_strings(args, ready_for_cl=True)))
+
+    def wait(self) -> List[dict]:
+        """ Waits for all submitted jobs to finish.
+
+        Returns:
+            - results (list of dict): Result of each job in the order they were submitted, see run for what each contains.
+
+        """
+
+        results = [future.result() for future in self._futures]
+        if self._pool is not None:
+            self._pool.shutdown()
+        self._pool = None
+        self._futures = []
+        return results
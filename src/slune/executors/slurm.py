@@ -0,0 +1,35 @@
+from slune.base import BaseExecutor
+from slune.slune import submit_job
+
+class ExecutorSlurm(BaseExecutor):
+    """ Submits each job to a Slurm cluster using sbatch.
+
+    Does the same as sbatchit does without an executor,
+    each job runs the sbatch script with the script path and the arguments of the job as its arguments.
+
+    Attributes:
+        - sbatch_path (str): Path to the sbatch script used to submit each job.
+
+    """
+
+    def __init__(self, sbatch_path: str):
+        """ Initialises the executor.
+
+        Args:
+            - sbatch_path (str): Path to the sbatch script used to submit each job.
+                Examples of sbatch scripts can be found in the templates folder.
+
+        """
+
+        self.sbatch_path = sbatch_path
+
+    def submit(self, script_path: str, args: dict):
+        """ Submits a job running the script at script_path with the given arguments.
+
+        Args:
+            - script_path (str): Path to the script (of the model) to be run.
+            - args (dict): Contains (key, value) pairs for all the arguments to be passed to the script.
+
+        """
+
+        submit_job(self.sbatch_path, script_path, args)
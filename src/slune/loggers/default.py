@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 from slune.base import BaseLogger
 
@@ -5,13 +6,18 @@ class LoggerDefault(BaseLogger):
     """ Logs metric/s in a data frame.
     
     Stores the metric/s in a data frame that we can later save in storage.
-    Logs by creating data frame out of the metrics and then appending it to the current results data frame.
+    Logs by appending the value of each metric to a list per metric,
+    so logging is cheap no matter how many rows we have already logged.
+    The data frame is only created when the results are accessed, and is reused until something new is logged.
+    Savers that only write the rows they haven't saved yet should use 'rows_since',
+    which creates a data frame of just those rows rather than of all the rows logged so far.
 
     Attributes:
         - results (pd.DataFrame): Data frame containing all the metrics logged so far.
             Each row stores all the metrics that were given in a call to the 'log' method,
-            each column title is a metric name.
-            The first column is always the time stamp at which 'log' is called.
+            each column title is a metric name, columns are in the order the metrics were first logged.
+            Metrics missing from a call to 'log' are NaN in that row.
+            The 'time_stamp' column stores the time stamp at which 'log' is called.
 
     """
     
@@ -22,30 +28,88 @@ class LoggerDefault(BaseLogger):
         # Raise warning if any arguments are given
         if args or kwargs:
             raise Warning(f"Arguments {args} and keyword arguments {kwargs} are ignored")
-        # Initialise results data frame
-        self.results = pd.DataFrame()
-    
-    def log(self, metrics: dict):
+        # Initialise results, maps each metric name to the list of its values
+        self._columns = {}
+        self._n_rows = 0
+        # Data frame of the results, created when needed
+        self._results = pd.DataFrame()
+        self._results_rows = 0
+
+    @property
+    def results(self) -> pd.DataFrame:
+        """ Data frame containing all the metrics logged so far, created from the logged values if anything new was logged. """
+
+        if self._results_rows != self._n_rows:
+            self._results = pd.DataFrame(self._columns)
+            self._results_rows = self._n_rows
+        return self._results
+
+    @results.setter
+    def results(self, results: pd.DataFrame):
+        """ Replaces all the metrics logged so far with the given data frame. """
+
+        self._columns = {column: results[column].tolist() for column in results.columns}
+        self._n_rows = len(results)
+        self._results = results
+        self._results_rows = self._n_rows
+
+    @property
+    def n_rows(self) -> int:
+        """ Number of rows logged so far. """
+
+        return self._n_rows
+
+    def rows_since(self, n: int) -> pd.DataFrame:
+        """ Returns a data frame of the rows logged after the first n rows.
+
+        The data frame is created from slices of the logged values, so the cost is proportional to the number of new rows.
+        The index starts at 0, columns are the same as those of results.
+
+        Args:
+            - n (int): Number of rows to skip.
+
+        Returns:
+            - rows (pd.DataFrame): Data frame containing the rows logged after the first n rows.
+
+        """
+
+        if n == 0:
+            return self.results
+        if n >= self._n_rows:
+            return pd.DataFrame(columns=list(self._columns))
+        return pd.DataFrame({name: column[n:] for name, column in self._columns.items()})
+
+    def log(self, metrics: dict, time_stamp: pd.Timestamp = None):
         """ Logs the metric/s given.
 
-        Stores them in a data frame that we can later save in storage.
+        Stores them so that we can later save them in storage.
         All metrics provided will be saved as a row in the results data frame,
-        the first column is always the time stamp at which log is called.
+        along with the time stamp at which log is called.
 
         Args:
             - metrics (dict): Metrics to be logged, keys are metric names and values are metric values.
                 Each metric should only have one value! So please log as soon as you get a metric.
+            - time_stamp (pd.Timestamp, optional): Time stamp to log the metrics with, default is None (the current time).
 
         """
 
         # Get current time stamp
-        time_stamp = pd.Timestamp.now()
+        if time_stamp is None:
+            time_stamp = pd.Timestamp.now()
         # Add time stamp to metrics dictionary
         metrics['time_stamp'] = time_stamp
-        # Convert metrics dictionary to a dataframe
-        metrics_df = pd.DataFrame(metrics, index=[0])
-        # Append metrics dataframe to results dataframe
-        self.results = pd.concat([self.results, metrics_df], ignore_index=True)
+        # Append each value to the list for its metric, padding metrics we haven't seen before with NaN
+        for name, value in metrics.items():
+            column = self._columns.get(name)
+            if column is None:
+                column = self._columns[name] = [np.nan] * self._n_rows
+            column.append(value)
+        self._n_rows += 1
+        # Pad metrics missing from this call with NaN
+        if len(metrics) != len(self._columns):
+            for column in self._columns.values():
+                if len(column) != self._n_rows:
+                    column.append(np.nan)
     
     def read_log(self, data_frame: pd.DataFrame, metric_name: str, select_by: str ='max') -> float:
         """ Reads log and returns value according to select_by.
@@ -1,4 +1,9 @@
 from .csv import SaverCsv
 from .ext import SaverExt
+from .parquet import SaverParquet
+from .index import ResultsIndex
+from .cache import ReadCache
+from .background import SaverBackground
+from .summary import RunSummary
 
-# __all__ = ['SaverCsv', 'SaverExt']
\ No newline at end of file
+# __all__ = ['SaverCsv', 'SaverExt', 'SaverParquet', 'ResultsIndex', 'ReadCache', 'SaverBackground', 'RunSummary']
\ No newline at end of file
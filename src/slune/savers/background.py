@@ -0,0 +1,257 @@
+import atexit
+import inspect
+import os
+import queue
+import signal
+import threading
+import time
+import pandas as pd
+from slune.base import BaseSaver
+
+class SaverBackground(BaseSaver):
+    """ Wraps a saver so that results are saved by a background thread, without blocking the training loop.
+
+    Calling saver.log only puts the metrics on a queue, along with the time stamp at which log was called.
+    A writer thread takes the metrics off the queue, logs them with the logger of the wrapped saver
+    and calls the wrapped saver's save_collated every flush_rows rows or every flush_interval seconds,
+    so the training loop never waits on pandas or on writing to a (possibly slow, shared) file system.
+    If the queue is full, which only happens if the writer can't keep up, log waits for there to be space.
+
+    The results are always saved before the Python interpreter exits,
+    and when the process receives SIGTERM (eg. when a Slurm job is preempted or cancelled).
+    On SIGTERM we only raise SystemExit in the main thread, the results are then saved by close when the interpreter exits,
+    outside of the signal handler, after which the signal is sent again so the process ends as it would have.
+
+    As save_collated is called many times, the wrapped saver must only write the rows logged since it was last called,
+    so SaverCsv must be created with append=True. SaverParquet always does so.
+
+    getset_current_path waits for everything logged so far to be saved to the current path before changing it.
+    Any other attribute or method (eg. read, exists, current_path) is taken from the wrapped saver.
+
+    Attributes:
+        - saver (BaseSaver): The wrapped saver.
+        - flush_rows (int): Number of rows logged after which we save the results.
+        - flush_interval (float): Number of seconds after which we save any rows logged since the last save.
+
+    """
+
+    def __init__(self, saver: BaseSaver, flush_rows: int = 1000, flush_interval: float = 30.0, max_queue: int = 100000, handle_sigterm: bool = True):
+        """ Initialises the saver and starts the writer thread.
+
+        Args:
+            - saver (BaseSaver): Saver used to save the results, eg. SaverCsv(LoggerDefault(), params, append=True).
+            - flush_rows (int, optional): Number of rows logged after which we save the results, default is 1000.
+            - flush_interval (float, optional): Number of seconds after which we save any rows logged since the last save, default is 30.
+            - max_queue (int, optional): Maximum number of rows waiting to be logged by the writer thread, default is 100000.
+            - handle_sigterm (bool, optional): Whether to save the results when the process receives SIGTERM, default is True.
+                Can only be done if the saver is created in the main thread.
+
+        """
+
+        if getattr(saver, 'append', True) is False:
+            raise ValueError("SaverBackground saves the results many times, so the wrapped saver must only write new rows, eg. use SaverCsv(..., append=True).")
+        super(SaverBackground, self).__init__(saver.logger)
+        self.saver = saver
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        # Logging puts metrics on the queue rather than logging them straight away
+        self.log = self.enqueue
+        # Loggers other than LoggerDefault may not take a time stamp, in which case it is logged as a metric
+        try:
+            self._log_time_stamp = 'time_stamp' in inspect.signature(self.logger.log).parameters
+        except (TypeError, ValueError):
+            self._log_time_stamp = False
+        # Held while the logger or the wrapped saver are used, by the writer thread or by getset_current_path
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._error = None
+        self._closed = False
+        self._requests = []
+        self._signum = None
+        self._thread = threading.Thread(target=self._run, name='slune-saver', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+        self._previous_handler = None
+        if handle_sigterm and (threading.current_thread() is threading.main_thread()):
+            previous = signal.signal(signal.SIGTERM, self._handle_sigterm)
+            # None means the handler wasn't set from Python, in which case we fall back to the default
+            self._previous_handler = previous if previous is not None else signal.SIG_DFL
+
+    def __getattr__(self, name):
+        """ Takes any attribute we don't have from the wrapped saver. """
+
+        if name == 'saver':
+            raise AttributeError(name)
+        return getattr(self.saver, name)
+
+    def _check_error(self):
+        """ Raises any error the writer thread ran into. """
+
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def enqueue(self, metrics: dict):
+        """ Queues metrics to be logged by the writer thread, this is what saver.log does.
+
+        Args:
+            - metrics (dict): Metrics to be logged, keys are metric names and values are metric values.
+
+        """
+
+        self._check_error()
+        if self._closed:
+            raise RuntimeError("Can't log to a SaverBackground once it has been closed.")
+        self._queue.put((dict(metrics), pd.Timestamp.now()))
+
+    def _log_item(self, item) -> int:
+        """ Logs an item taken off the queue with the logger, returning the number of rows logged.
+
+        Items are either (metrics, time stamp) tuples or flush requests, which are set once we've saved everything before them.
+
+        """
+
+        if isinstance(item, threading.Event):
+            self._requests.append(item)
+            return 0
+        metrics, time_stamp = item
+        with self._lock:
+            if self._log_time_stamp:
+                self.logger.log(metrics, time_stamp=time_stamp)
+            else:
+                metrics['time_stamp'] = time_stamp
+                self.logger.log(metrics)
+        return 1
+
+    def _log_queued(self) -> int:
+        """ Logs every item on the queue, returning the number of rows logged. """
+
+        n_rows = 0
+        while True:
+            try:
+                n_rows += self._log_item(self._queue.get_nowait())
+            except queue.Empty:
+                return n_rows
+
+    def _save(self):
+        """ Saves the results with the wrapped saver, keeping any error to raise in the main thread. """
+
+        try:
+            with self._lock:
+                self.saver.save_collated()
+        except Exception as e:
+            self._error = e
+
+    def _run(self):
+        """ Writer thread, logs queued metrics and saves the results every flush_rows rows or flush_interval seconds. """
+
+        pending = 0
+        last_save = time.monotonic()
+        while not self._stop.is_set():
+            timeout = max(min(self.flush_interval - (time.monotonic() - last_save), 0.1), 0)
+            try:
+                pending += self._log_item(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                pass
+            pending += self._log_queued()
+            if (pending > 0) and ((pending >= self.flush_rows) or (self._requests != []) or (time.monotonic() - last_save >= self.flush_interval)):
+                self._save()
+                pending = 0
+                last_save = time.monotonic()
+            for request in self._requests:
+                request.set()
+            self._requests = []
+        # Save everything left once we are asked to stop
+        pending += self._log_queued()
+        if pending > 0:
+            self._save()
+        for request in self._requests:
+            request.set()
+
+    def flush(self):
+        """ Waits for everything logged so far to be saved. """
+
+        self._check_error()
+        if not self._closed:
+            request = threading.Event()
+            self._queue.put(request)
+            while not request.wait(timeout=0.1):
+                if not self._thread.is_alive():
+                    break
+        self._check_error()
+
+    def save_collated(self):
+        """ Saves everything logged so far, waiting for it to be written. """
+
+        self.flush()
+
+    def getset_current_path(self, params: dict = None, save: bool = True) -> str:
+        """ Getter/Setter for the current path of the wrapped saver, see SaverExt.getset_current_path.
+
+        Before changing the path, waits for everything logged so far to be saved to the current path (if save is True),
+        and holds the lock so the writer thread doesn't save while the path changes.
+
+        Args:
+            - params (dict, optional): (key,value) pairs we would like to use for our methods, default is None.
+            - save (bool, optional): Whether to save the results to the current path before changing it, default is True.
+
+        Returns:
+            - current_path (str): Path to the file where we will store the results for the current run.
+
+        """
+
+        if (params is not None) and save:
+            self.flush()
+        with self._lock:
+            return self.saver.getset_current_path(params, save=save)
+
+    def close(self):
+        """ Saves everything logged so far and stops the writer thread, called automatically when the Python interpreter exits. """
+
+        if not self._closed:
+            self._closed = True
+            self._stop.set()
+            self._thread.join()
+            atexit.unregister(self.close)
+            # Put back the SIGTERM handler we replaced
+            if (self._previous_handler is not None) and (threading.current_thread() is threading.main_thread()) \
+                    and (signal.getsignal(signal.SIGTERM) == self._handle_sigterm):
+                signal.signal(signal.SIGTERM, self._previous_handler)
+            if (self._signum is not None) and not callable(self._previous_handler):
+                # Everything is saved, so sending the signal again lets the previous handler act as before (by default terminating)
+                os.kill(os.getpid(), self._signum)
+        self._check_error()
+
+    def _handle_sigterm(self, signum, frame):
+        """ Handles SIGTERM, without saving from inside the signal handler.
+
+        Joining the writer thread here could wait for ever, eg. if the signal arrived while the main thread held the lock of the queue.
+        So we only note the signal and let the previous handler deal with it, or if it was the default, raise SystemExit,
+        which unwinds the main thread so that close saves the results when the interpreter exits and then sends the signal again.
+
+        """
+
+        previous = self._previous_handler
+        if previous == signal.SIG_IGN:
+            return
+        self._signum = signum
+        if callable(previous):
+            previous(signum, frame)
+        else:
+            raise SystemExit(128 + signum)
+
+    def read(self, *args, **kwargs):
+        """ Reads results using the wrapped saver. """
+
+        return self.saver.read(*args, **kwargs)
+
+    def exists(self, *args, **kwargs):
+        """ Checks if results exist using the wrapped saver. """
+
+        return self.saver.exists(*args, **kwargs)
+
+    def exists_many(self, params_list: list) -> list:
+        """ Checks if results exist for many configurations using the wrapped saver. """
+
+        return self.saver.exists_many(params_list)
@@ -0,0 +1,168 @@
+from typing import Callable, Dict, List
+from collections import OrderedDict
+from functools import partial
+import json
+import os
+import numpy as np
+import pandas as pd
+from slune.utils import parallel_map
+
+def reduce_csv(path: str, read_log: Callable) -> Dict[str, dict]:
+    """ Reads a csv file and computes every reduction in ReadCache.SELECT_BY for every column.
+
+    Defined at module level so it can be sent to a pool of processes.
+    Reductions that can't be computed for a column (eg. the mean of a column of strings) are left out.
+
+    Args:
+        - path (str): Path to the csv file.
+        - read_log (function): Method of a logger used to select the value of a metric from the data frame.
+
+    Returns:
+        - reductions (dict): Maps each column name to a dictionary mapping each reduction to its value.
+
+    """
+
+    df = pd.read_csv(path)
+    reductions = {}
+    for column in df.columns:
+        reductions[column] = {}
+        for select_by in ReadCache.SELECT_BY:
+            try:
+                reductions[column][select_by] = read_log(df, column, select_by)
+            except (TypeError, ValueError, KeyError, IndexError):
+                pass
+    return reductions
+
+class ReadCache:
+    """ Caches reductions of the metrics in each results file, so that files are only read again if they changed.
+
+    For every file we read we store the value of every reduction in SELECT_BY for every metric,
+    keyed by the path of the file, its modification time and its size.
+    So a file is only read again if it has been modified since we last read it,
+    no matter which metric or reduction we ask for.
+
+    The cache is kept in memory and holds at most max_size files, when full the least recently used file is dropped.
+    If persist is True, the cache is also stored in a json file in the root directory,
+    so it is shared between processes and survives restarts (eg. of a notebook or dashboard).
+    As the root directory is often shared, the file only holds plain values (numbers, strings, booleans and None),
+    so loading it never runs any code. Reductions of other types are not stored, and are computed again when needed.
+
+    Attributes:
+        - root_dir (str): Path to the root directory containing the results files.
+        - max_size (int): Maximum number of files to keep in memory.
+        - cache_path (str): Path to the json file the cache is stored in, None if the cache is not persisted.
+
+    """
+
+    SELECT_BY = ['min', 'max', 'last', 'first', 'mean', 'median']
+    FILE_NAME = '.slune_read_cache.json'
+
+    def __init__(self, root_dir: str, max_size: int = 100000, persist: bool = False):
+        """ Initialises the cache, loading it from the root directory if persist is True.
+
+        Args:
+            - root_dir (str): Path to the root directory containing the results files.
+            - max_size (int, optional): Maximum number of files to keep in memory, default is 100000.
+            - persist (bool, optional): Whether to store the cache in a json file in the root directory, default is False.
+
+        """
+
+        self.root_dir = root_dir
+        self.max_size = max_size
+        self.cache_path = os.path.join(root_dir, self.FILE_NAME) if persist else None
+        self._entries = self.load()
+
+    def __len__(self):
+        """ Returns the number of files in the cache. """
+
+        return len(self._entries)
+
+    def load(self) -> OrderedDict:
+        """ Reads the entries stored in the json file, none if the cache is not persisted or the file is missing or corrupt.
+
+        Returns:
+            - entries (OrderedDict): Maps the path of each file to ((modification time, size), reductions), from least to most recently used.
+
+        """
+
+        entries = OrderedDict()
+        if (self.cache_path is None) or not os.path.exists(self.cache_path):
+            return entries
+        try:
+            with open(self.cache_path, 'r') as f:
+                for path, (mtime_ns, size), reductions in json.load(f):
+                    entries[path] = ((int(mtime_ns), int(size)), dict(reductions))
+        except (OSError, ValueError, TypeError):
+            # A corrupt cache is simply rebuilt
+            return OrderedDict()
+        return entries
+
+    def save(self):
+        """ Writes the cache to its json file, does nothing if the cache is not persisted.
+
+        The file holds a list of [path, [modification time, size], reductions] entries, from least to most recently used.
+        Other processes sharing the root directory may have saved the cache since we loaded it,
+        so we first merge in the entries of the file, keeping the entry with the newer (modification time, size) for each path.
+
+        """
+
+        if self.cache_path is None:
+            return
+        merged = OrderedDict()
+        for path, (key, reductions) in self.load().items():
+            if (path not in self._entries) or (key > self._entries[path][0]):
+                merged[path] = (key, reductions)
+        # Our entries are the most recently used, unless the file holds a newer version of them
+        for path, entry in self._entries.items():
+            if path not in merged:
+                merged[path] = entry
+        while len(merged) > self.max_size:
+            merged.popitem(last=False)
+        self._entries = merged
+        entries = []
+        for path, (key, reductions) in self._entries.items():
+            plain = {}
+            for column, values in reductions.items():
+                plain[column] = {}
+                for select_by, value in values.items():
+                    if isinstance(value, np.generic):
+                        value = value.item()
+                    if (value is None) or isinstance(value, (bool, int, float, str)):
+                        plain[column][select_by] = value
+            entries.append([path, list(key), plain])
+        tmp_path = self.cache_path + '.tmp.' + str(os.getpid())
+        with open(tmp_path, 'w') as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, self.cache_path)
+
+    def get_reductions(self, paths: List[str], read_log: Callable, n_workers: int = 1, use_processes: bool = False) -> List[Dict[str, dict]]:
+        """ Returns the reductions of every metric in each file, reading only files that changed since they were cached.
+
+        Args:
+            - paths (list of str): Paths to the csv files.
+            - read_log (function): Method of a logger used to select the value of a metric from the data frame.
+            - n_workers (int, optional): Number of workers used to read changed files in parallel, default is 1 (read serially).
+            - use_processes (bool, optional): Whether to use a pool of processes rather than threads, default is False.
+
+        Returns:
+            - reductions (list of dict): For each file, maps each column name to a dictionary mapping each reduction to its value.
+
+        """
+
+        keys = []
+        for path in paths:
+            stat = os.stat(path)
+            keys.append((os.path.relpath(path, self.root_dir), stat.st_mtime_ns, stat.st_size))
+        missing = [i for i, key in enumerate(keys) if key[0] not in self._entries or self._entries[key[0]][0] != key[1:]]
+        computed = parallel_map(partial(reduce_csv, read_log=read_log), [paths[i] for i in missing], n_workers=n_workers, use_processes=use_processes)
+        for i, reductions in zip(missing, computed):
+            self._entries[keys[i][0]] = (keys[i][1:], reductions)
+        out = []
+        for key in keys:
+            self._entries.move_to_end(key[0])
+            out.append(self._entries[key[0]][1])
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        if missing != []:
+            self.save()
+        return out
@@ -1,11 +1,49 @@
-from typing import Optional, Tuple
+from typing import Callable, List, Optional, Tuple
+from functools import partial
 import os 
 import pandas as pd
-from slune.utils import get_all_paths, dict_to_strings
+from slune.utils import dict_to_strings, strings_to_dict, find_ext_files, parallel_map, ResultsTree
 from slune.base import BaseLogger
-import random
-import time
 from .ext import SaverExt
+from .cache import ReadCache
+from .summary import MetricSummary, RunSummary, file_key, read_summary_value
+
+def read_metric_from_csv(path: str, metric_name: str, select_by: str, read_log: Callable) -> float:
+    """ Reads a csv file and selects a value of a metric from it.
+
+    Defined at module level so it can be sent to a pool of processes.
+
+    Args:
+        - path (str): Path to the csv file.
+        - metric_name (str): Name of the metric to be read.
+        - select_by (str): How to select the value of the metric, passed on to read_log.
+        - read_log (function): Method of a logger used to select the value of the metric from the data frame.
+
+    Returns:
+        - value (float): Value of the metric as selected by select_by.
+
+    """
+
+    return read_log(pd.read_csv(path), metric_name, select_by)
+
+def read_run_from_csv(path: str, metrics: Optional[List[str]] = None) -> pd.DataFrame:
+    """ Reads the columns of the given metrics from a csv file.
+
+    Defined at module level so it can be sent to a pool of processes.
+
+    Args:
+        - path (str): Path to the csv file.
+        - metrics (list of str, optional): Names of the metrics to read, default is None (read all columns).
+            Metrics missing from the file are ignored.
+
+    Returns:
+        - data_frame (pd.DataFrame): Data frame containing the metrics.
+
+    """
+
+    if metrics is None:
+        return pd.read_csv(path)
+    return pd.read_csv(path, usecols=lambda column: column in metrics)
 
 class SaverCsv(SaverExt):
     """ Saves the results of each run in a .csv file in hierarchy of directories.
@@ -16,10 +54,32 @@ class SaverCsv(SaverExt):
     # Saving results
     To save results collated in the logger to a csv file, use the save_collated method. Simply call saver.save_collated().
 
+    By default every call to save_collated reads the existing csv file, appends the results and rewrites the whole file.
+    If initialised with append=True, we instead keep track of how many rows of the logger we have already saved
+    and only append the new rows to the end of the csv file, so saving often (eg. every epoch) costs time proportional to the new rows.
+    If new metrics appear that are not in the header of the csv file, the file is rewritten once with the new header.
+    Files are created and rewritten by writing a temporary file and renaming it,
+    and new rows are appended with a single write, so the csv file stays valid if the job is killed while saving.
+
+    # Loading a whole sweep
+    To analyse many runs at once, use the 'load_all' method to load every csv file in the root directory into a single data frame.
+    The parameters of each run are parsed from its path into typed columns, so you can use pandas to groupby, min, max, mean etc.
+
     # Reading results
     To read the best value of a metric from the csv files in the root directory, use the 'read' method.
     Give it the parameter-value pairs you would like to be included in the search (eg.{'alpha':1}), the metric name (eg.'accuracy'), and how to return a value based on the metric (eg.'max').
     Refer to the methods documentation for more information on how to use it.
+
+    If read is called repeatedly on a tree that changes slowly (eg. from a dashboard or notebook),
+    initialise the saver with cache=True, then the reductions of every metric in each csv file are cached (see ReadCache)
+    and only files that changed since the last call are read again.
+    With persist_cache=True the cache is also stored in the root directory so it can be reused by other processes.
+
+    With summary=True, every time we save a csv file we also update a small sidecar file next to it (eg. 'results_0.csv.summary.json')
+    holding running aggregates of each numeric metric (see RunSummary). Reading with summary=True then answers
+    'min', 'max', 'first', 'last', 'mean' and 'median' from the sidecar files, only reading csv files without an up to date summary.
+    The median is only answered from the sidecar for runs of up to 200 rows, where it is exact, longer runs are read from the csv file,
+    so read gives the same values with or without summary=True.
      
     Attributes:
         - root_dir (str): Path to the root directory where we will store the csv files.
@@ -27,7 +87,7 @@ class SaverCsv(SaverExt):
 
     """
 
-    def __init__(self, logger_instance: BaseLogger, params: dict = None, root_dir: Optional[str] = os.path.join('.', 'slune_results')):
+    def __init__(self, logger_instance: BaseLogger, params: dict = None, root_dir: Optional[str] = os.path.join('.', 'slune_results'), use_index: bool = False, append: bool = False, cache: bool = False, persist_cache: bool = False, summary: bool = False, cache_dirs: bool = False):
         """ Initialises the csv saver. 
 
         Args:
@@ -35,18 +95,29 @@ class SaverCsv(SaverExt):
             - params (dict): (key,value) pairs we would like to use for our methods, default is None.
                 If None, we will create a path using the parameters given in the log.
             - root_dir (str, optional): Path to the root directory where we will store the csv files, default is './slune_results'.
+            - use_index (bool, optional): Whether to keep a persistent index of the csv files in the root directory, default is False.
+                Please refer to the documentation of SaverExt for more information.
+            - append (bool, optional): Whether to only append rows of the logger that have not been saved yet, default is False.
+            - cache (bool, optional): Whether to cache the reductions of the metrics in each csv file we read, default is False.
+            - persist_cache (bool, optional): Whether to also store the cache in the root directory, default is False.
+                Setting this to True turns on the cache.
+            - summary (bool, optional): Whether to keep a summary of the metrics of each csv file we save in a sidecar file,
+                and use the summaries when reading, default is False.
+            - cache_dirs (bool, optional): Whether to cache the directory listings used to resolve paths, default is False.
+                Please refer to the documentation of SaverExt for more information.
         
         """
 
-        super(SaverCsv, self).__init__(logger_instance, '.csv',params=params, root_dir=root_dir)
-        self.root_dir = root_dir
-        self.current_params = params
-        if self.current_params is not None:
-            self.current_path = self.get_path(dict_to_strings(self.current_params))
-        else:
-            self.current_path = None
+        super(SaverCsv, self).__init__(logger_instance, '.csv',params=params, root_dir=root_dir, use_index=use_index, cache_dirs=cache_dirs)
+        self.append = append
+        self.cache = ReadCache(root_dir, persist=persist_cache) if (cache or persist_cache) else None
+        self._flushed_path = None
+        self._flushed_rows = 0
+        self.summary = summary
+        self._run_summary = None
+        self._run_summary_path = None
 
-    def save_collated_from_results(self, results: pd.DataFrame):
+    def save_collated_from_results(self, results: pd.DataFrame, offset: int = 0):
         """ Saves results to csv file.
         
         If the csv file already exists, 
@@ -56,32 +127,153 @@ class SaverCsv(SaverExt):
 
         Args:
             - results (pd.DataFrame): Data frame containing the results to be saved.
+            - offset (int, optional): Number of rows logged before the first row of results, default is 0 (results are all the rows logged).
+                Only used with append=True.
 
         """
 
         # If path does not exist, create it
         # Remove the csv file name from the path
         if self.current_path is None:
-            self.get_path(self.current_params)
+            self.current_path = self.get_path(dict_to_strings(self.current_params))
         dir_path = self.current_path.split(os.path.sep)[:-1]
         dir_path = os.path.join(*dir_path)
         if not os.path.exists(dir_path):
-            time.sleep(random.random()) # Wait a random amount of time under 1 second to avoid multiple processes creating the same directory
-            os.makedirs(dir_path, exist_ok=True)
-        # If csv file already exists, append results to the end
-        if os.path.exists(self.current_path):
-            results = pd.concat([pd.read_csv(self.current_path), results])
-            results.to_csv(self.current_path, mode='w', index=False)
-        # If csv file does not exist, create it
-        else:
-            results.to_csv(self.current_path, index=False)
+            self.make_dirs(dir_path)
+        if self.append:
+            self.append_results(results, offset)
+            return
+        # Reserve the csv file so no other run writes to it, see SaverExt.claim_path
+        self.claim_path()
+        try:
+            # If csv file already exists, append results to the end
+            if os.path.exists(self.current_path):
+                results = pd.concat([pd.read_csv(self.current_path), results])
+                results.to_csv(self.current_path, mode='w', index=False)
+                self.save_summary(results)
+            # If csv file does not exist, create it
+            else:
+                self.write_atomic(results)
+                self.save_summary(results)
+        finally:
+            self.release_path()
+
+    def write_atomic(self, results: pd.DataFrame):
+        """ (Re)writes the csv file at the current path by writing a temporary file and renaming it.
+
+        Args:
+            - results (pd.DataFrame): Data frame containing all the results to be stored in the file.
+
+        """
+
+        tmp_path = self.current_path + '.tmp.' + str(os.getpid())
+        results.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, self.current_path)
+
+    def append_results(self, results: pd.DataFrame, offset: int = 0):
+        """ Appends the rows of results we have not saved to the current path yet to the end of the csv file.
+
+        Results should contain all rows logged after the first offset rows, as is the case for logger.rows_since(offset) of LoggerDefault,
+        we keep track of how many rows of the logger have already been saved to the current path.
+        If the rows contain columns that are not in the header of the csv file, the file is rewritten with the new columns.
+
+        Args:
+            - results (pd.DataFrame): Data frame containing the results to be saved.
+            - offset (int, optional): Number of rows logged before the first row of results, default is 0 (results are all the rows logged).
+
+        """
+
+        if self._flushed_path != self.current_path:
+            self._flushed_path = self.current_path
+            self._flushed_rows = 0
+        new_results = results.iloc[self._flushed_rows - offset:]
+        if len(new_results) == 0:
+            return
+        # Reserve the csv file so no other run writes to it, see SaverExt.claim_path
+        self.claim_path()
+        self._flushed_path = self.current_path
+        try:
+            if os.path.exists(self.current_path) and os.path.getsize(self.current_path) > 0:
+                # Drop any partially written last line, left behind if a job was killed while appending
+                with open(self.current_path, 'rb+') as f:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b'\n':
+                        f.seek(0)
+                        f.truncate(f.read().rfind(b'\n') + 1)
+            if not os.path.exists(self.current_path):
+                self.write_atomic(new_results)
+                self.save_summary(new_results)
+            elif os.path.getsize(self.current_path) == 0:
+                self.write_atomic(new_results)
+                self.save_summary(new_results)
+            else:
+                header = list(pd.read_csv(self.current_path, nrows=0).columns)
+                if set(new_results.columns).issubset(header):
+                    # Append new rows in a single write, with columns in the same order as the header
+                    data = new_results.reindex(columns=header).to_csv(index=False, header=False).encode('utf-8')
+                    key_before = file_key(self.current_path)
+                    fd = os.open(self.current_path, os.O_WRONLY | os.O_APPEND)
+                    try:
+                        while data:
+                            data = data[os.write(fd, data):]
+                    finally:
+                        os.close(fd)
+                    self.save_summary(new_results, key_before)
+                else:
+                    # New columns have appeared so we rewrite the file with the new header
+                    all_results = pd.concat([pd.read_csv(self.current_path), new_results], ignore_index=True)
+                    self.write_atomic(all_results)
+                    self.save_summary(all_results)
+        finally:
+            self.release_path()
+        self._flushed_rows = offset + len(results)
+
+    def save_summary(self, results: pd.DataFrame, key_before: Optional[Tuple[int, int]] = None):
+        """ Updates the sidecar summary of the csv file at the current path, does nothing if self.summary is False.
+
+        The summary holds running aggregates of each metric (see RunSummary),
+        so read can select the value of a metric without reading the whole csv file.
+
+        Args:
+            - results (pd.DataFrame): Rows just written to the csv file.
+            - key_before (tuple, optional): (modification time in ns, size in bytes) of the csv file before the rows were appended to it,
+                default is None (results are all the rows of the csv file).
+                If we don't have a summary of the file as it was before, we summarise the whole file again.
+
+        """
+
+        if not self.summary:
+            return
+        run_summary = None
+        if key_before is not None:
+            if (self._run_summary_path == self.current_path) and (self._run_summary.key == key_before):
+                run_summary = self._run_summary
+            else:
+                run_summary = RunSummary.load(self.current_path, key=key_before)
+            if run_summary is None:
+                results = pd.read_csv(self.current_path)
+        if run_summary is None:
+            run_summary = RunSummary()
+        run_summary.update(results)
+        run_summary.save(self.current_path)
+        self._run_summary = run_summary
+        self._run_summary_path = self.current_path
 
     def save_collated(self):
-        """ Saves results to csv file. """
+        """ Saves results to csv file.
+
+        With append=True and a logger that has a rows_since method (eg. LoggerDefault),
+        only the rows logged since the last save to the current path are taken from the logger.
+
+        """
 
-        self.save_collated_from_results(self.logger.results)
+        if self.append and hasattr(self.logger, 'rows_since'):
+            offset = self._flushed_rows if self._flushed_path == self.current_path else 0
+            self.save_collated_from_results(self.logger.rows_since(offset), offset)
+        else:
+            self.save_collated_from_results(self.logger.results)
         
-    def read(self, params: dict, metric_name: str, select_by: str ='max', collate_by: str ='mean') -> Tuple[dict, float]:
+    def read(self, params: dict, metric_name: str, select_by: str ='max', collate_by: str ='mean', n_workers: int = 1, use_processes: bool = False) -> Tuple[dict, float]:
         """ Finds the min/max value of a metric from all csv files in the root directory that match the parameters given.
 
         Args:
@@ -90,6 +282,8 @@ class SaverCsv(SaverExt):
             - metric_name (string): Name of the metric to be read.
             - select_by (string, optional): How to select the 'best' value for the metric from a log file, currently can select by 'min' or 'max'.
             - collate_by (bool, optional): What to do with the metrics selected over all runs (with same parameters), default is 'mean'.
+            - n_workers (int, optional): Number of workers used to read and reduce the csv files in parallel, default is 1 (read serially).
+            - use_processes (bool, optional): Whether to use a pool of processes rather than threads to read the csv files, default is False.
 
         Returns:
             - best_params (dict): Contains the arguments used to get the 'best' value of the metric (determined by select_by).
@@ -97,31 +291,48 @@ class SaverCsv(SaverExt):
 
         """
 
-        #  Get all paths that match the parameters given
-        paths = get_all_paths('.csv', dict_to_strings(params), root_directory=self.root_dir)
+        #  Get all paths that match the parameters given, walking the root directory only once
+        files = self.get_files()
+        if files is None:
+            # Only walk the directories that can contain runs with the parameters given
+            files = find_ext_files('.csv', self.root_dir, dirs=dict_to_strings(params), unique_params=True)
+        paths = self.get_tree(files).match(dict_to_strings(params))
         # If no paths found, return None
         if paths == []:
             return None, None
-        # Read the metric from each path
-        values = {}
         # Do averaging for different runs of same params if avg is True, otherwise just read the metric from each path
         if collate_by == 'mean':
             paths_same_params = set([os.path.join(*p.split(os.path.sep)[:-1]) for p in paths])
-            for path in paths_same_params:
-                runs = get_all_paths('.csv', path.split(os.path.sep), root_directory=self.root_dir)
-                cumsum = 0
-                for r in runs:
-                    df = pd.read_csv(r)
-                    cumsum += self.read_log(df, metric_name, select_by)
-                avg_of_runs = cumsum / len(runs)
-                values[path] = avg_of_runs
+            # Any file matching all directories of a path also matches the parameters, so we only need to search paths
+            matched = ResultsTree(paths, self.root_dir)
+            runs = {path: matched.match(path.split(os.path.sep)) for path in paths_same_params}
+            to_read = sorted(set(r for path in runs for r in runs[path]))
         elif collate_by == 'all':
-            for path in paths:
-                df = pd.read_csv(path)
-                # values[os.path.join(*path.split(os.path.sep)[:-1])] = self.read_log(df, metric_name, select_by)
-                values[path] = self.read_log(df, metric_name, select_by)
+            to_read = paths
         else:
             raise ValueError(f"collate_by must be 'mean' or 'all', got {collate_by}")
+        # Use the sidecar summaries of the files where we can, only reading the files without an up to date summary
+        file_values = {}
+        if self.summary and (select_by in MetricSummary.SELECT_BY):
+            read_summary = partial(read_summary_value, metric_name=metric_name, select_by=select_by)
+            summary_values = parallel_map(read_summary, to_read, n_workers=n_workers, use_processes=use_processes)
+            file_values = {path: value for path, value in zip(to_read, summary_values) if value is not None}
+            to_read = [path for path in to_read if path not in file_values]
+        # Read the metric from each path, in parallel if asked to
+        read_file = partial(read_metric_from_csv, metric_name=metric_name, select_by=select_by, read_log=self.read_log)
+        if (self.cache is not None) and (select_by in ReadCache.SELECT_BY):
+            reductions = self.cache.get_reductions(to_read, self.read_log, n_workers=n_workers, use_processes=use_processes)
+            # If the reduction could not be cached we read the file again, so any errors are raised as usual
+            file_values.update({path: r[metric_name][select_by] if select_by in r.get(metric_name, {}) else read_file(path) for path, r in zip(to_read, reductions)})
+        else:
+            file_values.update(zip(to_read, parallel_map(read_file, to_read, n_workers=n_workers, use_processes=use_processes)))
+        values = {}
+        if collate_by == 'mean':
+            for path in paths_same_params:
+                values[path] = sum(file_values[r] for r in runs[path]) / len(runs[path])
+        else:
+            for path in paths:
+                values[path] = file_values[path]
         
         # Format the path into a list of arguments 
         out_params, out_values = [], []
@@ -139,3 +350,53 @@ class SaverCsv(SaverExt):
             out_params.append(key)
             out_values.append(value)
         return out_params, out_values
+
+    def load_all(self, params: Optional[dict] = None, metrics: Optional[List[str]] = None, n_workers: int = 1, use_processes: bool = False) -> pd.DataFrame:
+        """ Loads all runs in the root directory into a single data frame.
+
+        Walks the root directory once and reads every csv file that matches the parameters given.
+        The parameters of each run are parsed from the '--parameter=value' directories in its path (in the same way as strings_to_dict),
+        and added as columns, so values are converted to int or float where possible.
+        Two further columns are added, 'run_id' which is the path of the results file relative to the root directory without its extension
+        (ie. '--learning_rate=0.1/results_3' for 'root_dir/--learning_rate=0.1/results_3.csv'), so it is unique across every run loaded,
+        and 'step' which is the row of the results file each metric came from.
+
+        For example to get the best validation loss for each learning rate, averaged over runs:
+        df = saver.load_all(metrics=['val_loss'])
+        df.groupby(['learning_rate', 'run_id'])['val_loss'].min().groupby('learning_rate').mean()
+
+        Args:
+            - params (dict, optional): Contains (parameter,value) pairs we would like in the runs, default is None (load all runs).
+            - metrics (list of str, optional): Names of the metrics to load, default is None (load all columns).
+            - n_workers (int, optional): Number of workers used to read the csv files in parallel, default is 1 (read serially).
+            - use_processes (bool, optional): Whether to use a pool of processes rather than threads to read the csv files, default is False.
+
+        Returns:
+            - results (pd.DataFrame): Data frame with a row for every row of every run,
+                columns are the parameters, followed by 'run_id' and 'step', followed by the metrics.
+
+        """
+
+        files = self.get_files()
+        if files is None:
+            # Only walk the directories that can contain runs with the parameters given
+            files = find_ext_files('.csv', self.root_dir, dirs=dict_to_strings(params), unique_params=True)
+        paths = self.get_tree(files).match(dict_to_strings(params))
+        frames = parallel_map(partial(read_run_from_csv, metrics=metrics), paths, n_workers=n_workers, use_processes=use_processes)
+        param_names = []
+        runs = []
+        for path, df in zip(paths, frames):
+            dirs = os.path.relpath(path, self.root_dir).split(os.path.sep)
+            run_params = strings_to_dict([d for d in dirs[:-1] if d.count('=') == 1])
+            run_id = '/'.join(dirs)[:-len('.csv')]
+            df.insert(0, 'step', range(len(df)))
+            df.insert(0, 'run_id', run_id)
+            for key, value in reversed(list(run_params.items())):
+                df.insert(0, key, value)
+            param_names += [key for key in run_params if key not in param_names]
+            runs.append(df)
+        if runs == []:
+            return pd.DataFrame(columns=['run_id', 'step'] + (metrics if metrics is not None else []))
+        results = pd.concat(runs, ignore_index=True)
+        columns = param_names + ['run_id', 'step']
+        return results[columns + [c for c in results.columns if c not in columns]]
@@ -1,9 +1,10 @@
 from typing import List,  Optional
 import os 
-from slune.utils import find_directory_path, get_all_paths, get_numeric_equiv, dict_to_strings
-from slune.base import BaseSaver, BaseLogger
-import random
+import socket
 import time
+from slune.utils import find_directory_path, get_numeric_equiv, dict_to_strings, find_ext_files, get_param_key, ResultsTree, DirectoryCache
+from slune.base import BaseSaver, BaseLogger
+from .index import ResultsIndex
 
 class SaverExt(BaseSaver):
     """ Saves the results of each run in a file with given extension in hierarchy of directories (Partial implementation).
@@ -47,16 +48,44 @@ class SaverExt(BaseSaver):
     we will create the path:
     "--learning_rate=0.02/--batch_size=32/--num_epochs=10".
 
-    # Other Comments
-    * Handles parallel runs trying to create the same directories by waiting a random time (under 1 second) before creating the directory. Should work pretty well in practice, however, may occasionally fail if you start a large number of jobs at exactly the same time. 
+    # Indexing the results
+    Walking the whole root directory every time we look for results can be slow for large trees on shared filesystems.
+    If initialised with use_index=True we keep a persistent index of the results files in the root directory (see ResultsIndex),
+    which exists, get_path and reading methods consult instead of walking the directory tree.
+    All savers writing to the same root directory should use the index, otherwise call rebuild_index to pick up their results.
+
+    # Caching directory listings
+    Resolving a path lists the directories at every level of the tree, and get_path is called for every configuration we save,
+    so a process that saves many configurations (eg. a sweep run in one job) lists the same directories many times.
+    If initialised with cache_dirs=True we keep the directories inside each directory we list (see DirectoryCache),
+    and only list a directory again once we create a directory inside it.
+    Directories created by other processes after we listed their parent are not seen,
+    so only use this when a single process writes to the root directory, or call dir_cache.invalidate() to forget the listings.
+
+    # Concurrent runs
+    Many jobs (eg. the tasks of a Slurm array) may start saving results for the same configuration at the same time.
+    Directories are created with os.makedirs(..., exist_ok=True), so it doesn't matter which job creates them.
+    The first time results are saved to the current path, subclasses call claim_path,
+    which creates a marker file 'results_N.ext.claim' with O_CREAT | O_EXCL, so exactly one job gets each 'results_N.ext' file.
+    If the number was claimed by another job since we picked it, we move on to the next free number and try again.
+    Once the results file is written the marker is removed by release_path, which is also called if the write fails.
+    The marker holds the PID and host name of the job that claimed the number,
+    so a marker left behind by a job that was killed in between is removed once that process is gone (when on the same host),
+    or once it is older than CLAIM_TIMEOUT seconds (when on another host), and the number can be used again.
+    No locks or waiting are involved, so jobs starting at the same time don't slow each other down.
 
     Attributes:
         - root_dir (str): Path to the root directory where we will store the '.ext' files.
         - current_path (str): Path to the '.ext' file where we will store the results for the current run.
+        - index (ResultsIndex): Index of the results files in the root directory, None if we are not using an index.
+        - dir_cache (DirectoryCache): Cache of the directory listings used to resolve paths, None if we are not caching them.
 
     """
 
-    def __init__(self, logger_instance: BaseLogger, ext: str = '.csv', params: dict = None, root_dir: Optional[str] = os.path.join('.', 'slune_results')):
+    CLAIM_SUFFIX = '.claim'
+    CLAIM_TIMEOUT = 3600
+
+    def __init__(self, logger_instance: BaseLogger, ext: str = '.csv', params: dict = None, root_dir: Optional[str] = os.path.join('.', 'slune_results'), use_index: bool = False, cache_dirs: bool = False):
         """ Initialises the ext(ension) saver. 
 
         Args:
@@ -64,6 +93,8 @@ class SaverExt(BaseSaver):
             - ext (str): Extension of the file where we will store the results, default is '.csv'.
             - params (dict): (key,value) pairs we would like to generate a path for, default is None.
             - root_dir (str, optional): Path to the root directory where we will store the '.ext files, default is './slune_results'.
+            - use_index (bool, optional): Whether to keep a persistent index of the results files in the root directory, default is False.
+            - cache_dirs (bool, optional): Whether to cache the directory listings used to resolve paths, default is False.
         
         """
 
@@ -71,6 +102,10 @@ class SaverExt(BaseSaver):
         self.root_dir = root_dir
         self.current_params = params
         self.ext = ext
+        self.index = ResultsIndex(root_dir) if use_index else None
+        self.dir_cache = DirectoryCache(self.index.list_dirs if use_index else None) if cache_dirs else None
+        self._tree = None
+        self._claimed_path = None
         if self.current_params is not None:
             self.current_path = self.get_path(dict_to_strings(self.current_params))
         else:
@@ -121,7 +156,7 @@ class SaverExt(BaseSaver):
         stripped_params = [p.split('=')[0].strip() +'=' for p in params] # Strip the params of whitespace and everything after the '='
         if len(set(stripped_params)) != len(stripped_params):
             raise ValueError(f"Duplicate parameters found in {stripped_params}")
-        match = find_directory_path(stripped_params, root_directory=self.root_dir)
+        match = find_directory_path(stripped_params, root_directory=self.root_dir, list_dirs=self.get_list_dirs())
         # Add on missing parameters
         if match == self.root_dir:
             match = os.path.join(*stripped_params)
@@ -138,7 +173,7 @@ class SaverExt(BaseSaver):
         match = match.split(os.path.sep)
         match = [[p for p in params if m in p][0] for m in match]
         # Check if there is an existing path with the same numerical values, if so use that instead
-        match = get_numeric_equiv(os.path.join(*match), root_directory=self.root_dir)
+        match = get_numeric_equiv(os.path.join(*match), root_directory=self.root_dir, list_dirs=self.get_list_dirs())
         return match
 
     def get_path(self, params: List[str]) -> str:
@@ -164,29 +199,141 @@ class SaverExt(BaseSaver):
 
         # Check if root directory exists, if not create it
         if not os.path.exists(self.root_dir):
-            time.sleep(random.random()) # Wait a random amount of time under 1 second to avoid multiple processes creating the same directory
-            os.makedirs(self.root_dir, exist_ok=True)
+            self.make_dirs(self.root_dir)
         # Get path of directory where we should store our '.ext' of results
         dir_path = self.get_match(params)
-        # Check if directory exists, if not create it
-        if not os.path.exists(dir_path):
-            ext_file_number = 0
-        # If it does exist, check if there is already an ext file with results,
-        # if there is find the name of the last ext file and increment the number
-        else:
-            ext_files = [f for f in os.listdir(dir_path) if f.endswith(self.ext)]
-            if len(ext_files) > 0:
-                last_ext_file = max(ext_files)
-                # Check that the last '.ext' file starts with "results_"
-                if not last_ext_file.startswith('results_'):
-                    raise ValueError('Found '+ self.ext +' file in directory that doesn\'t start with "results_"')
-                ext_file_number = int(last_ext_file.split('_')[1][:-4]) + 1
-            else:
-                ext_file_number = 0
         # Create path name for a new ext file where we can later store results
-        ext_file_path = os.path.join(dir_path, f'results_{ext_file_number}'+self.ext)
+        ext_file_path = os.path.join(dir_path, f'results_{self.get_file_number(dir_path)}'+self.ext)
         return ext_file_path    
 
+    def get_file_number(self, dir_path: str) -> int:
+        """ Returns the number of the next '.ext' results file in a directory, ie. one more than the largest number in use.
+
+        Numbers are compared as integers, so 'results_10.ext' comes after 'results_9.ext'.
+        Files that aren't named 'results_N.ext' are ignored.
+
+        Args:
+            - dir_path (str): Path to the directory.
+
+        Returns:
+            - ext_file_number (int): Number of the next results file, 0 if the directory doesn't exist or has no '.ext' files.
+
+        """
+
+        if not os.path.exists(dir_path):
+            return 0
+        ext_file_number = 0
+        for f in os.listdir(dir_path):
+            # Numbers claimed by other runs that haven't written their file yet are also in use
+            if f.endswith(self.ext + self.CLAIM_SUFFIX):
+                if self.remove_stale_claim(os.path.join(dir_path, f)):
+                    continue
+                f = f[:-len(self.CLAIM_SUFFIX)]
+            number = f[len('results_'):-len(self.ext)]
+            if not (f.startswith('results_') and f.endswith(self.ext) and number.isdigit()):
+                continue
+            ext_file_number = max(ext_file_number, int(number) + 1)
+        return ext_file_number
+
+    def claim_path(self) -> bool:
+        """ Reserves the '.ext' file at the current path for the current run, so no other run saves its results to it.
+
+        Creates a marker file next to it (eg. 'results_0.ext.claim') with O_CREAT | O_EXCL, which only succeeds for one process,
+        and writes our PID and host name to it.
+        If the marker or the '.ext' file already exists the number belongs to another run,
+        so we move the current path to the next free number and try again, unless the marker is stale (see remove_stale_claim).
+        The marker is removed by release_path once the '.ext' file has been written,
+        so readers never see an empty or half created '.ext' file.
+        Subclasses should call this just before they first write to the current path (ie. once they know there are rows to write),
+        and call release_path in a finally block after the write. It does nothing if we already claimed the current path.
+        The directory of the current path must already exist.
+
+        Returns:
+            - is_new (bool): Whether we just claimed the file, False if it was already claimed by us.
+
+        """
+
+        if self._claimed_path == self.current_path:
+            return False
+        while True:
+            marker = self.current_path + self.CLAIM_SUFFIX
+            try:
+                fd = os.open(marker, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+                try:
+                    os.write(fd, f'{os.getpid()} {socket.gethostname()}'.encode())
+                finally:
+                    os.close(fd)
+                # The run that had the marker before us may have written its file and removed the marker
+                if not os.path.exists(self.current_path):
+                    break
+                os.remove(marker)
+            except FileExistsError:
+                # Left behind by a run that no longer exists, so we can try the same number again
+                if self.remove_stale_claim(marker):
+                    continue
+            dir_path = os.path.dirname(self.current_path)
+            number = int(os.path.basename(self.current_path)[len('results_'):-len(self.ext)])
+            number = max(number + 1, self.get_file_number(dir_path))
+            self.current_path = os.path.join(dir_path, f'results_{number}'+self.ext)
+        self._claimed_path = self.current_path
+        return True
+
+    def release_path(self):
+        """ Removes the marker left by claim_path once we have tried to write the '.ext' file at the current path.
+
+        If the file was written it is added to the index,
+        otherwise (eg. the write failed) the number is given back, so the next save claims a number again.
+        Subclasses should call this after writing to the current path, it does nothing if there is no marker to remove.
+
+        """
+
+        marker = self.current_path + self.CLAIM_SUFFIX
+        if (self._claimed_path != self.current_path) or not os.path.exists(marker):
+            return
+        if os.path.exists(self.current_path):
+            self.add_to_index(self.current_path)
+        else:
+            self._claimed_path = None
+        os.remove(marker)
+
+    def remove_stale_claim(self, marker: str) -> bool:
+        """ Removes a marker left by claim_path if the run that created it is gone.
+
+        A marker is stale if it was created on this host by a process that is no longer running,
+        or, as we can't check processes on other hosts, if it is older than CLAIM_TIMEOUT seconds.
+        Markers are only held while a results file is first written, so live markers are never that old.
+
+        Args:
+            - marker (str): Path to the marker file.
+
+        Returns:
+            - removed (bool): Whether the marker was stale (or is already gone).
+
+        """
+
+        try:
+            with open(marker, 'r') as f:
+                owner = f.read().split()
+            age = time.time() - os.path.getmtime(marker)
+        except FileNotFoundError:
+            return True
+        except OSError:
+            return False
+        stale = age > self.CLAIM_TIMEOUT
+        if (len(owner) == 2) and owner[0].isdigit() and (owner[1] == socket.gethostname()):
+            try:
+                os.kill(int(owner[0]), 0)
+            except ProcessLookupError:
+                stale = True
+            except (PermissionError, OverflowError):
+                pass
+        if stale:
+            try:
+                os.remove(marker)
+            except FileNotFoundError:
+                pass
+        return stale
+
     def exists(self, params: dict) -> int:
         """ Checks if results already exist in storage.
 
@@ -200,15 +347,131 @@ class SaverExt(BaseSaver):
             - num_runs (int): Number of runs that exist in storage for the given parameters.
 
         """
-        from slune.utils import get_all_paths_exact_depth
 
         # Get all paths that match the parameters at EXACT depth
         # Note: dict_to_strings returns format like ['param1=1', 'param2=2']
-        # get_all_paths handles both 'param1=1' and '--param1=1' formats
+        # ResultsTree handles both 'param1=1' and '--param1=1' formats
         params = dict_to_strings(params)
-        paths = get_all_paths_exact_depth(self.ext, params, root_directory=self.root_dir)
+        files = self.get_files()
+        if files is None:
+            # Only walk the directories that can contain runs at exact depth
+            files = find_ext_files(self.ext, self.root_dir, dirs=params, exact_depth=True)
+        paths = self.get_tree(files).match_exact_depth(params)
         return len(paths)
 
+    def exists_many(self, params_list: List[dict]) -> List[int]:
+        """ Checks how many runs already exist in storage for each of a list of configurations.
+
+        Counts files at EXACT depth in the same way as exists,
+        but only walks the root directory (or reads the index) once for all configurations.
+        We do this by building a lookup from the parameters encoded in each path to the number of '.ext' files with those parameters.
+
+        Args:
+            - params_list (list of dict): List of configurations to check.
+
+        Returns:
+            - num_runs (list of int): Number of runs that exist in storage for each configuration, in the same order as given.
+
+        """
+
+        counts = self.get_tree().count_by_params()
+        return [counts.get(get_param_key(dict_to_strings(params)), 0) for params in params_list]
+
+    def get_files(self) -> Optional[List[str]]:
+        """ Returns the paths of all '.ext' files in the index.
+
+        Returns:
+            - files (list of str): Paths of all indexed '.ext' files, None if we are not using an index.
+                When None, the directory tree should be walked to find the files.
+
+        """
+
+        if self.index is None:
+            return None
+        return self.index.get_files(self.ext)
+
+    def get_tree(self, files: Optional[List[str]] = None) -> ResultsTree:
+        """ Returns a ResultsTree of the '.ext' files in the root directory, used to find the files matching some parameters.
+
+        The tree is kept and reused as long as the files haven't changed,
+        which saves parsing every path again when using an index.
+
+        Args:
+            - files (list of str, optional): Paths of the '.ext' files, default is None.
+                If None, we get them from the index or by walking the root directory.
+
+        Returns:
+            - tree (ResultsTree): Parsed paths of the '.ext' files.
+
+        """
+
+        if files is None:
+            files = self.get_files()
+        if files is None:
+            files = find_ext_files(self.ext, self.root_dir)
+        files = [f for f in files if f.endswith(self.ext)]
+        if (self._tree is None) or (self._tree.files != files):
+            self._tree = ResultsTree(files, self.root_dir)
+        return self._tree
+
+    def get_list_dirs(self):
+        """ Returns the function used to list the directories inside a directory when searching for paths.
+
+        Returns:
+            - list_dirs (function): The DirectoryCache if we are caching directory listings, otherwise lists directories using the index,
+                None if we are doing neither (use the filesystem).
+
+        """
+
+        if self.dir_cache is not None:
+            return self.dir_cache
+        if self.index is None:
+            return None
+        return self.index.list_dirs
+
+    def add_to_index(self, path: str):
+        """ Adds a newly created '.ext' file to the index, does nothing if we are not using an index.
+
+        Should be called by subclasses whenever they create a new '.ext' file.
+
+        Args:
+            - path (str): Path to the newly created '.ext' file.
+
+        """
+
+        if self.index is not None:
+            self.index.add(path)
+            if self.dir_cache is not None:
+                self.dir_cache.invalidate(os.path.dirname(path))
+
+    def make_dirs(self, path: str):
+        """ Creates the directory at path (and any missing parents), then forgets the cached listings it changes.
+
+        If we are using an index the directory is added to it, so other runs resolving their paths see it before we save any results in it.
+        Subclasses should use this rather than os.makedirs to create directories in the root directory.
+
+        Args:
+            - path (str): Path to the directory to create.
+
+        """
+
+        os.makedirs(path, exist_ok=True)
+        if self.index is not None:
+            self.index.add_dir(path)
+        if self.dir_cache is not None:
+            self.dir_cache.invalidate(path)
+
+    def rebuild_index(self):
+        """ Rebuilds the index of the results files by walking the root directory.
+
+        Use this to index trees written by older versions of slune or by savers that were not using the index.
+
+        """
+
+        if self.index is None:
+            self.index = ResultsIndex(self.root_dir)
+        self.index.rebuild()
+
     def getset_current_path(self, params:dict=None, save:bool=True) -> str:
         """ Getter/Setter function for the current_path attribute. 
         If params is not None, we will update the current_params attribute and the current_path attribute.
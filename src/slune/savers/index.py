@@ -0,0 +1,216 @@
+from typing import List, Optional
+import os
+
+class ResultsIndex:
+    """ Persistent index of the results files stored in a hierarchy of directories.
+
+    Walking a large results tree is slow, especially on shared filesystems such as NFS or Lustre,
+    where every directory listing is a round trip to a metadata server.
+    The index avoids this by keeping a manifest of all results files in a single file in the root directory.
+
+    # The manifest
+    The manifest is a text file named '.slune_index' stored in the root directory,
+    each line is the path of a results file relative to the root directory,
+    eg. "--learning_rate=0.01/--batch_size=32/results_0.csv".
+    The parameters of a run are encoded in its path, so the manifest is all we need to answer queries about the tree.
+    Directories are also recorded when they are created, as a line ending with a path separator (eg. "--learning_rate=0.01/"),
+    so a directory created by another run that hasn't saved its results yet is still found when resolving paths.
+
+    New results files are added by appending a single line to the manifest with one write call,
+    so concurrent jobs can update the index without any locking.
+    The manifest is only ever read from where we last stopped reading,
+    so keeping an index up to date costs time proportional to the number of new files, not the size of the tree.
+
+    # Older trees
+    Trees written before the index existed (or written by savers that did not use the index)
+    can be indexed by calling rebuild, or from the command line by running:
+    python -m slune rebuild-index <root_dir>
+    If the manifest does not exist when it is first needed it is built automatically.
+
+    Attributes:
+        - root_dir (str): Path to the root directory containing the results files.
+        - index_path (str): Path to the manifest file.
+
+    """
+
+    FILE_NAME = '.slune_index'
+
+    def __init__(self, root_dir: str):
+        """ Initialises the index.
+
+        Args:
+            - root_dir (str): Path to the root directory containing the results files.
+
+        """
+
+        self.root_dir = root_dir
+        self.index_path = os.path.join(root_dir, self.FILE_NAME)
+        self._reset()
+
+    def _reset(self):
+        """ Forgets everything read from the manifest so far. """
+
+        self._files = {}
+        self._subdirs = {}
+        self._offset = 0
+        self._inode = None
+
+    def _add_entry(self, rel_path: str):
+        """ Adds a path relative to the root directory to the in-memory copy of the manifest, paths ending with a separator are directories. """
+
+        if rel_path in self._files:
+            return
+        if not rel_path.endswith(os.path.sep):
+            self._files[rel_path] = None
+        dirs = rel_path.split(os.path.sep)[:-1]
+        parent = ''
+        for d in dirs:
+            self._subdirs.setdefault(parent, set()).add(d)
+            parent = os.path.join(parent, d)
+
+    def exists(self) -> bool:
+        """ Returns whether the manifest exists. """
+
+        return os.path.exists(self.index_path)
+
+    def refresh(self):
+        """ Reads any lines appended to the manifest since we last read it.
+
+        If the manifest was replaced (ie. rebuilt) since we last read it, we read it again from the start.
+
+        """
+
+        try:
+            stat = os.stat(self.index_path)
+        except FileNotFoundError:
+            self._reset()
+            return
+        if (stat.st_ino != self._inode) or (stat.st_size < self._offset):
+            self._reset()
+            self._inode = stat.st_ino
+        if stat.st_size == self._offset:
+            return
+        with open(self.index_path, 'rb') as f:
+            f.seek(self._offset)
+            data = f.read()
+        # Only consume complete lines, a line may still be in the process of being written
+        end = data.rfind(b'\n') + 1
+        for line in data[:end].decode('utf-8').splitlines():
+            if line != '':
+                self._add_entry(line)
+        self._offset += end
+
+    def add(self, path: str):
+        """ Adds a results file to the index.
+
+        Args:
+            - path (str): Path to the results file, must be inside the root directory.
+
+        """
+
+        self._append(os.path.relpath(path, self.root_dir))
+
+    def add_dir(self, path: str):
+        """ Adds a directory to the index, so it is listed by list_dirs before any results file is saved in it.
+
+        Args:
+            - path (str): Path to the directory, must be inside the root directory.
+
+        """
+
+        rel_path = os.path.relpath(path, self.root_dir)
+        if rel_path != '.':
+            self._append(rel_path + os.path.sep)
+
+    def _append(self, rel_path: str):
+        """ Appends a line to the manifest, building it first if it does not exist. """
+
+        if not self.exists():
+            self.rebuild(replace=False)
+        line = (rel_path + '\n').encode('utf-8')
+        # A single write to a file opened in append mode is atomic with respect to other appends
+        fd = os.open(self.index_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+
+    def rebuild(self, replace: bool = True):
+        """ Rebuilds the manifest by walking the root directory.
+
+        Every file whose name starts with 'results_' and every directory is added to the index.
+        The new manifest is written to a temporary file which then replaces the old one,
+        so readers never see a partially written manifest.
+
+        Args:
+            - replace (bool, optional): Whether to replace an existing manifest, default is True.
+                If False and another process creates the manifest first, we keep theirs,
+                this stops jobs that index a new tree at the same time from losing each others entries.
+
+        """
+
+        rel_paths = []
+        for root, dirs, files in os.walk(self.root_dir):
+            dirs.sort()
+            rel_paths += [os.path.relpath(os.path.join(root, d), self.root_dir) + os.path.sep for d in dirs]
+            for file in sorted(files):
+                if file.startswith('results_'):
+                    rel_paths.append(os.path.relpath(os.path.join(root, file), self.root_dir))
+        os.makedirs(self.root_dir, exist_ok=True)
+        tmp_path = self.index_path + '.tmp.' + str(os.getpid())
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.writelines(p + '\n' for p in rel_paths)
+        if replace:
+            os.replace(tmp_path, self.index_path)
+        else:
+            try:
+                os.link(tmp_path, self.index_path)
+            except FileExistsError:
+                pass
+            finally:
+                os.remove(tmp_path)
+        self._reset()
+
+    def get_files(self, ext: Optional[str] = None) -> List[str]:
+        """ Returns the paths of all indexed results files.
+
+        Builds the manifest if it does not exist yet.
+
+        Args:
+            - ext (str, optional): Only return files with this extension, default is None (return all files).
+
+        Returns:
+            - files (list of str): Paths to the results files, with the root directory at the beginning.
+
+        """
+
+        if not os.path.isdir(self.root_dir):
+            return []
+        if not self.exists():
+            self.rebuild(replace=False)
+        self.refresh()
+        return [os.path.join(self.root_dir, p) for p in self._files if (ext is None) or p.endswith(ext)]
+
+    def list_dirs(self, path: str) -> List[str]:
+        """ Returns the names of the indexed directories directly inside path.
+
+        Directories are known to the index once a results file is indexed inside them (possibly in a subdirectory),
+        or once they are added with add_dir (as SaverExt.make_dirs does).
+
+        Args:
+            - path (str): Path to a directory inside the root directory.
+
+        Returns:
+            - dirs (list of str): Names of the directories inside path.
+
+        """
+
+        if not os.path.isdir(self.root_dir):
+            return []
+        if not self.exists():
+            self.rebuild(replace=False)
+        self.refresh()
+        rel_path = os.path.relpath(path, self.root_dir)
+        if rel_path == '.':
+            rel_path = ''
+        return sorted(self._subdirs.get(rel_path, ()))
@@ -0,0 +1,339 @@
+from typing import List, Optional, Tuple
+import atexit
+import os
+import pandas as pd
+from slune.utils import dict_to_strings, find_ext_files, ResultsTree
+from slune.base import BaseLogger
+from .ext import SaverExt
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+class SaverParquet(SaverExt):
+    """ Saves the results of each run in a .parquet file in hierarchy of directories.
+
+    Inherits from SaverExt, which coordinates path generation for saving and reading files in a directory hierarchy.
+    Please refer to the documentation of SaverExt for more information on how these paths are generated.
+    Requires pyarrow to be installed.
+
+    # Saving results
+    To save results collated in the logger to a parquet file, use the save_collated method. Simply call saver.save_collated().
+    Unlike SaverCsv, calling save_collated does not re-read and rewrite the whole file,
+    the first save writes 'results_N.parquet' and every later save only writes the rows logged since the last save
+    to a part file next to it ('results_N.parquet.part1', 'results_N.parquet.part2', ...).
+    This makes saving periodically (eg. every epoch) cheap no matter how large the log gets.
+    Columns keep their types (eg. integers, floats, time stamps) rather than being converted to text.
+
+    Every file is written to a temporary file which is then renamed, so any parquet file that is visible is complete,
+    and a job killed part way through (eg. by Slurm at its time limit) keeps every row it saved.
+    So exists counts files without opening them.
+    When close is called (or the Python interpreter exits) the part files are merged into 'results_N.parquet', as one row group each,
+    and removed. The merged file records how many parts it holds, so readers never count a part twice.
+    If metrics are logged after we started saving, or a column changes type, the merged file gets a column for every metric.
+
+    # Reading results
+    To read the best value of a metric from the parquet files in the root directory, use the 'read' method.
+    It works in the same way as SaverCsv.read, but only reads the column of the requested metric from each file,
+    along with any part files that haven't been merged yet.
+    Files that can't be read (eg. left without a footer by older versions of slune) are skipped.
+
+    Attributes:
+        - root_dir (str): Path to the root directory where we will store the parquet files.
+        - current_path (str): Path to the parquet file where we will store the results for the current run.
+
+    """
+
+    PART_SUFFIX = '.part'
+    PARTS_KEY = b'slune.parts'
+
+    def __init__(self, logger_instance: BaseLogger, params: dict = None, root_dir: Optional[str] = os.path.join('.', 'slune_results'), use_index: bool = False, cache_dirs: bool = False):
+        """ Initialises the parquet saver.
+
+        Args:
+            - logger_instance (BaseLogger): Instance of a logger class that inherits from BaseLogger.
+            - params (dict): (key,value) pairs we would like to use for our methods, default is None.
+            - root_dir (str, optional): Path to the root directory where we will store the parquet files, default is './slune_results'.
+            - use_index (bool, optional): Whether to keep a persistent index of the parquet files in the root directory, default is False.
+                Please refer to the documentation of SaverExt for more information.
+            - cache_dirs (bool, optional): Whether to cache the directory listings used to resolve paths, default is False.
+                Please refer to the documentation of SaverExt for more information.
+
+        """
+
+        if pq is None:
+            raise ImportError("SaverParquet requires pyarrow, please install it with 'pip install pyarrow'.")
+        super(SaverParquet, self).__init__(logger_instance, '.parquet', params=params, root_dir=root_dir, use_index=use_index, cache_dirs=cache_dirs)
+        self._flushed_path = None
+        self._flushed_rows = 0
+        self._n_parts = 0
+        self._close_at_exit = False
+
+    def get_parts(self, path: str) -> List[Tuple[int, str]]:
+        """ Returns the number and path of each part file of a parquet file, in order. """
+
+        dir_path, name = os.path.split(path)
+        prefix = name + self.PART_SUFFIX
+        try:
+            names = os.listdir(dir_path)
+        except FileNotFoundError:
+            return []
+        parts = [(int(f[len(prefix):]), os.path.join(dir_path, f)) for f in names if f.startswith(prefix) and f[len(prefix):].isdigit()]
+        return sorted(parts)
+
+    def write_atomic(self, table: 'pa.Table', path: str):
+        """ Writes a table to a parquet file by writing a temporary file and renaming it, so the file is always complete. """
+
+        tmp_path = path + '.tmp.' + str(os.getpid())
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+
+    def close(self):
+        """ Merges the part files of the parquet file we are saving to into it, called automatically when the Python interpreter exits. """
+
+        if self._close_at_exit:
+            atexit.unregister(self.close)
+            self._close_at_exit = False
+        if (self._flushed_path is None) or (self._n_parts == 0):
+            return
+        tables, merged = self.read_tables(self._flushed_path)
+        if tables is None:
+            return
+        parts = [(k, part) for k, part in self.get_parts(self._flushed_path) if k <= self._n_parts]
+        if (len(tables) > 1) and not self.merge(tables, self._flushed_path, max(merged, self._n_parts)):
+            # Readers still read the parts, so we keep them rather than fail
+            return
+        # Parts are only removed once the merged file holding them is in place
+        for _, part in parts:
+            os.remove(part)
+
+    def merge(self, tables: List['pa.Table'], path: str, n_parts: int) -> bool:
+        """ Writes tables to a parquet file, one row group each, recording the number of parts merged into it.
+
+        Args:
+            - tables (list of pa.Table): Tables to write, in order.
+            - path (str): Path to the parquet file.
+            - n_parts (int): Number of parts the file holds, readers only read the parts after these.
+
+        Returns:
+            - merged (bool): Whether the tables were written, False if the values of a column can't be stored in a single type.
+
+        """
+
+        metadata = {self.PARTS_KEY: str(n_parts).encode()}
+        try:
+            schema = pa.unify_schemas([t.schema.remove_metadata() for t in tables])
+            conformed = [self._conform(t, schema) for t in tables]
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            conformed = [None]
+        if any(t is None for t in conformed):
+            # A column changed type, so we let pandas find a type for it and write a single row group
+            results = pd.concat([t.to_pandas() for t in tables], ignore_index=True)
+            try:
+                conformed = [pa.Table.from_pandas(results, preserve_index=False).replace_schema_metadata(None)]
+            except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+                return False
+            schema = conformed[0].schema
+        tmp_path = path + '.tmp.' + str(os.getpid())
+        with pq.ParquetWriter(tmp_path, schema.with_metadata(metadata)) as writer:
+            for table in conformed:
+                writer.write_table(table.replace_schema_metadata(metadata))
+        os.replace(tmp_path, path)
+        return True
+
+    def _conform(self, table: 'pa.Table', schema: 'pa.Schema') -> Optional['pa.Table']:
+        """ Converts table to a schema.
+
+        Columns missing from the table are filled with nulls.
+
+        Args:
+            - table (pa.Table): Table containing the results to be saved.
+            - schema (pa.Schema): Schema to convert the table to.
+
+        Returns:
+            - table (pa.Table): The table with the schema given, None if the table can't be converted.
+
+        """
+
+        columns = []
+        for field in schema:
+            if field.name in table.schema.names:
+                try:
+                    columns.append(table.column(field.name).cast(field.type))
+                except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                    return None
+            else:
+                columns.append(pa.nulls(len(table), type=field.type))
+        return pa.Table.from_arrays(columns, schema=schema)
+
+    def save_collated_from_results(self, results: pd.DataFrame, offset: int = 0):
+        """ Saves results to parquet file.
+
+        Only the rows of results we have not saved to the current path yet are written,
+        to the parquet file the first time and to a new part file after that.
+        So results should contain all rows logged after the first offset rows, as is the case for logger.rows_since(offset) of LoggerDefault.
+
+        Args:
+            - results (pd.DataFrame): Data frame containing the results to be saved.
+            - offset (int, optional): Number of rows logged before the first row of results, default is 0 (results are all the rows logged).
+
+        """
+
+        if self._flushed_path != self.current_path:
+            self.close()
+            self._flushed_path = self.current_path
+            self._flushed_rows = 0
+            self._n_parts = 0
+        new_results = results.iloc[self._flushed_rows - offset:]
+        if len(new_results) == 0:
+            return
+        table = pa.Table.from_pandas(new_results, preserve_index=False)
+        if self._claimed_path != self.current_path:
+            self.make_dirs(os.path.dirname(self.current_path))
+            # Reserve the parquet file so no other run writes to it, see SaverExt.claim_path
+            self.claim_path()
+            self._flushed_path = self.current_path
+            try:
+                self.write_atomic(table, self.current_path)
+            finally:
+                self.release_path()
+        else:
+            self._n_parts += 1
+            self.write_atomic(table, self.current_path + self.PART_SUFFIX + str(self._n_parts))
+            if not self._close_at_exit:
+                atexit.register(self.close)
+                self._close_at_exit = True
+        self._flushed_rows = offset + len(results)
+
+    def save_collated(self):
+        """ Saves results to parquet file.
+
+        With a logger that has a rows_since method (eg. LoggerDefault), only the rows logged since the last save to the current path are taken from the logger.
+
+        """
+
+        if hasattr(self.logger, 'rows_since'):
+            offset = self._flushed_rows if self._flushed_path == self.current_path else 0
+            self.save_collated_from_results(self.logger.rows_since(offset), offset)
+        else:
+            self.save_collated_from_results(self.logger.results)
+
+    def read_tables(self, path: str, columns: Optional[List[str]] = None) -> Tuple[Optional[List['pa.Table']], int]:
+        """ Reads a parquet file and the part files that haven't been merged into it.
+
+        Args:
+            - path (str): Path to the parquet file.
+            - columns (list of str, optional): Names of the columns to read, default is None (read all columns).
+                Columns missing from a file are ignored.
+
+        Returns:
+            - tables (list of pa.Table): Table read from the file and from each of its parts, None if the file can't be read.
+            - n_parts (int): Number of parts merged into the file.
+
+        """
+
+        def read(file_path):
+            with pq.ParquetFile(file_path) as parquet_file:
+                names = parquet_file.schema_arrow.names
+                metadata = parquet_file.schema_arrow.metadata or {}
+                table = parquet_file.read(columns=None if columns is None else [c for c in columns if c in names])
+            return table, int(metadata.get(self.PARTS_KEY, b'0'))
+
+        try:
+            table, merged = read(path)
+        except (pa.ArrowInvalid, OSError):
+            return None, 0
+        tables = [table]
+        for k, part in self.get_parts(path):
+            if k > merged:
+                try:
+                    tables.append(read(part)[0])
+                except (pa.ArrowInvalid, OSError):
+                    # Removed by a merge since we listed the directory
+                    pass
+        return tables, merged
+
+    def read_metric(self, path: str, metric_name: str) -> Optional[pd.DataFrame]:
+        """ Reads the column of a metric from a parquet file and its part files.
+
+        Args:
+            - path (str): Path to the parquet file.
+            - metric_name (str): Name of the metric to be read.
+
+        Returns:
+            - data_frame (pd.DataFrame): Data frame containing only the metric column, None if the file can't be read.
+
+        """
+
+        tables, _ = self.read_tables(path, columns=[metric_name])
+        if tables is None:
+            return None
+        frames = [t.to_pandas() for t in tables if metric_name in t.schema.names]
+        if frames == []:
+            raise KeyError(metric_name)
+        return pd.concat([f.reindex(columns=[metric_name]) for f in frames], ignore_index=True) if len(tables) > 1 else frames[0]
+
+    def read(self, params: dict, metric_name: str, select_by: str ='max', collate_by: str ='mean') -> Tuple[dict, float]:
+        """ Finds the min/max value of a metric from all parquet files in the root directory that match the parameters given.
+
+        Args:
+            - params (dict): Contains (parameter,value) pairs we would like in the run.
+                If None or empty dict, we will search through all parquet files in the root directory.
+            - metric_name (string): Name of the metric to be read.
+            - select_by (string, optional): How to select the 'best' value for the metric from a log file, currently can select by 'min' or 'max'.
+            - collate_by (bool, optional): What to do with the metrics selected over all runs (with same parameters), default is 'mean'.
+
+        Returns:
+            - best_params (dict): Contains the arguments used to get the 'best' value of the metric (determined by select_by).
+            - best_value (float): Best value of the metric (determined by select_by).
+
+        """
+
+        #  Get all paths that match the parameters given
+        files = self.get_files()
+        if files is None:
+            # Only walk the directories that can contain runs with the parameters given
+            files = find_ext_files(self.ext, self.root_dir, dirs=dict_to_strings(params), unique_params=True)
+        paths = self.get_tree(files).match(dict_to_strings(params))
+        # If no paths found, return None
+        if paths == []:
+            return None, None
+        # Read the metric from each path, skipping files that are still being written to
+        values = {}
+        if collate_by == 'mean':
+            paths_same_params = set([os.path.join(*p.split(os.path.sep)[:-1]) for p in paths])
+            # Any file matching all directories of a path also matches the parameters, so we only need to search paths
+            matched = ResultsTree(paths, self.root_dir)
+            for path in paths_same_params:
+                runs = matched.match(path.split(os.path.sep))
+                run_values = []
+                for r in runs:
+                    df = self.read_metric(r, metric_name)
+                    if df is not None:
+                        run_values.append(self.read_log(df, metric_name, select_by))
+                if run_values != []:
+                    values[path] = sum(run_values) / len(run_values)
+        elif collate_by == 'all':
+            for path in paths:
+                df = self.read_metric(path, metric_name)
+                if df is not None:
+                    values[path] = self.read_log(df, metric_name, select_by)
+        else:
+            raise ValueError(f"collate_by must be 'mean' or 'all', got {collate_by}")
+
+        # Format the path into a list of arguments
+        out_params, out_values = [], []
+        for key in values.keys():
+            value = values[key]
+            key = key.replace(self.root_dir, '')
+            if key.startswith(os.path.sep):
+                key = key[1:]
+            key = key.split(os.path.sep)
+            if key[-1].startswith('results_') and key[-1].endswith(self.ext):
+                key[-1] = key[-1][:-len(self.ext)]
+            out_params.append(key)
+            out_values.append(value)
+        return out_params, out_values
@@ -0,0 +1,367 @@
+from typing import Iterable, List, Optional, Tuple
+import json
+import math
+import os
+import numpy as np
+import pandas as pd
+
+class QuantileSketch:
+    """ Mergeable sketch of the distribution of a metric, used to estimate its median without keeping every value.
+
+    A simplified t-digest: the values are summarised by centroids (mean, weight),
+    with small centroids near the tails and larger ones in the middle of the distribution.
+    Up to 2 * compression values are kept exactly, so the median is exact for short runs,
+    after that the centroids are merged so there are at most about compression of them.
+
+    Attributes:
+        - compression (int): Roughly the number of centroids kept once the sketch is compressed.
+        - centroids (list of list): Sorted list of [mean, weight] pairs.
+
+    """
+
+    def __init__(self, compression: int = 100, centroids: Optional[List[List[float]]] = None):
+        """ Initialises the sketch.
+
+        Args:
+            - compression (int, optional): Roughly the number of centroids kept once the sketch is compressed, default is 100.
+            - centroids (list of list, optional): Sorted list of [mean, weight] pairs to start from, default is None (empty sketch).
+
+        """
+
+        self.compression = compression
+        self.centroids = [list(c) for c in centroids] if centroids is not None else []
+
+    def update(self, values: Iterable[float]):
+        """ Adds values to the sketch, NaN values should be removed beforehand.
+
+        Args:
+            - values (iterable of float): Values to add.
+
+        """
+
+        self.centroids = sorted(self.centroids + [[float(v), 1.0] for v in values])
+        if len(self.centroids) > 2 * self.compression:
+            self.compress()
+
+    def merge(self, other: 'QuantileSketch'):
+        """ Adds the centroids of another sketch to this one.
+
+        Args:
+            - other (QuantileSketch): Sketch to merge into this one.
+
+        """
+
+        self.centroids = sorted(self.centroids + [list(c) for c in other.centroids])
+        if len(self.centroids) > 2 * self.compression:
+            self.compress()
+
+    def compress(self):
+        """ Merges neighbouring centroids, using the arcsine scale function of the t-digest to limit the size of each centroid. """
+
+        total = sum(w for _, w in self.centroids)
+        def k_limit(q):
+            # Largest quantile a centroid starting at quantile q can reach
+            k = self.compression / (2 * math.pi) * math.asin(2 * q - 1) + 1
+            return (math.sin(min(k * 2 * math.pi / self.compression, math.pi / 2)) + 1) / 2
+        out = [list(self.centroids[0])]
+        q_start = 0.0
+        limit = k_limit(q_start)
+        for mean, weight in self.centroids[1:]:
+            current = out[-1]
+            if q_start + (current[1] + weight) / total <= limit:
+                current[0] = (current[0] * current[1] + mean * weight) / (current[1] + weight)
+                current[1] += weight
+            else:
+                q_start += current[1] / total
+                limit = k_limit(q_start)
+                out.append([mean, weight])
+        self.centroids = out
+
+    def is_exact(self) -> bool:
+        """ Returns whether every value added to the sketch is still kept exactly, ie. it has never been compressed. """
+
+        return all(weight == 1 for _, weight in self.centroids)
+
+    def quantile(self, q: float) -> float:
+        """ Estimates a quantile of the values added to the sketch.
+
+        Interpolates between the centres of the centroids, which gives the exact quantile
+        (the same as pandas) while every value is still kept exactly.
+
+        Args:
+            - q (float): Quantile to estimate, between 0 and 1.
+
+        Returns:
+            - value (float): Estimate of the quantile, NaN if the sketch is empty.
+
+        """
+
+        if self.centroids == []:
+            return np.nan
+        total = sum(w for _, w in self.centroids)
+        target = q * total
+        cumulative = 0.0
+        previous_centre, previous_mean = None, None
+        for mean, weight in self.centroids:
+            centre = cumulative + weight / 2
+            if target <= centre:
+                if previous_centre is None:
+                    return mean
+                return previous_mean + (mean - previous_mean) * (target - previous_centre) / (centre - previous_centre)
+            previous_centre, previous_mean = centre, mean
+            cumulative += weight
+        return self.centroids[-1][0]
+
+class MetricSummary:
+    """ Running aggregates of a metric, updated as rows are added to a results file.
+
+    Gives the same values as LoggerDefault.read_log for every select_by in SELECT_BY.
+    The median is only given while the QuantileSketch still keeps every value exactly (up to 2 * compression values),
+    after that it can only be estimated, so we don't give it and the results file has to be read instead.
+    Like read_log, 'first' and 'last' are the values in the first and last rows, which may be NaN,
+    and the other aggregates skip NaN values.
+
+    Attributes:
+        - count (int): Number of non NaN values.
+        - sum (float): Sum of the non NaN values.
+        - min, max (float): Smallest and largest values.
+        - argmin, argmax (int): Row of the first occurrence of the smallest and largest values.
+        - first, last (float): Values in the first and last rows.
+        - n_rows (int): Number of rows seen.
+        - sketch (QuantileSketch): Sketch used to estimate the median.
+
+    """
+
+    SELECT_BY = ['min', 'max', 'last', 'first', 'mean', 'median']
+
+    def __init__(self, compression: int = 100):
+        """ Initialises an empty summary.
+
+        Args:
+            - compression (int, optional): Compression of the sketch used to estimate the median, default is 100.
+
+        """
+
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+        self.argmin = None
+        self.argmax = None
+        self.first = None
+        self.last = None
+        self.n_rows = 0
+        self.sketch = QuantileSketch(compression)
+
+    def update(self, values: np.ndarray, start_row: int = 0):
+        """ Adds the values of the metric in new rows.
+
+        Args:
+            - values (np.ndarray): Values of the metric in the new rows, in order, with NaN for missing values.
+            - start_row (int, optional): Row of the results file the first value is in, default is 0.
+                If larger than the number of rows seen so far, the metric is taken to be missing (NaN) from the rows in between.
+
+        """
+
+        if len(values) == 0:
+            return
+        values = np.asarray(values, dtype=float)
+        if self.n_rows == 0:
+            self.first = float(values[0]) if start_row == 0 else np.nan
+        self.last = float(values[-1])
+        self.n_rows = start_row + len(values)
+        valid = ~np.isnan(values)
+        if not valid.any():
+            return
+        present = values[valid]
+        self.count += int(valid.sum())
+        self.sum += float(present.sum())
+        i_min, i_max = int(np.nanargmin(values)), int(np.nanargmax(values))
+        # Keep the first occurrence, as idxmin and idxmax do
+        if (self.min is None) or (values[i_min] < self.min):
+            self.min, self.argmin = float(values[i_min]), start_row + i_min
+        if (self.max is None) or (values[i_max] > self.max):
+            self.max, self.argmax = float(values[i_max]), start_row + i_max
+        self.sketch.update(present)
+
+    def get(self, select_by: str) -> Optional[float]:
+        """ Returns the value of the metric selected by select_by.
+
+        Args:
+            - select_by (str): How to select the value, one of SELECT_BY.
+
+        Returns:
+            - value (float): Selected value, None if it can't be given by the summary (eg. every value is NaN, or the median is no longer exact).
+
+        """
+
+        if select_by == 'first':
+            return self.first
+        if select_by == 'last':
+            return self.last
+        if self.count == 0:
+            return None
+        if select_by == 'min':
+            return self.min
+        if select_by == 'max':
+            return self.max
+        if select_by == 'mean':
+            return self.sum / self.count
+        if select_by == 'median':
+            return self.sketch.quantile(0.5) if self.sketch.is_exact() else None
+        return None
+
+    def to_dict(self) -> dict:
+        """ Returns the summary as a dictionary that can be stored as json. """
+
+        out = {key: getattr(self, key) for key in ['count', 'sum', 'min', 'max', 'argmin', 'argmax', 'first', 'last', 'n_rows']}
+        out['compression'] = self.sketch.compression
+        out['centroids'] = self.sketch.centroids
+        return out
+
+    @classmethod
+    def from_dict(cls, d: dict) -> 'MetricSummary':
+        """ Creates a summary from a dictionary given by to_dict. """
+
+        summary = cls(d['compression'])
+        for key in ['count', 'sum', 'min', 'max', 'argmin', 'argmax', 'first', 'last', 'n_rows']:
+            setattr(summary, key, d[key])
+        summary.sketch.centroids = d['centroids']
+        return summary
+
+def file_key(path: str) -> Tuple[int, int]:
+    """ Returns the (modification time in ns, size in bytes) of a file, used to tell if it changed. """
+
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+class RunSummary:
+    """ Summaries of every numeric metric in a results file, stored in a small json sidecar file next to it.
+
+    The sidecar of 'results_0.csv' is 'results_0.csv.summary.json'.
+    It records the modification time and size of the results file it summarises (as ReadCache does),
+    so it is only used if the results file has not changed since.
+
+    Attributes:
+        - n_rows (int): Number of rows in the results file.
+        - key (tuple): (modification time in ns, size in bytes) of the results file when the summary was last saved.
+        - metrics (dict): Maps each metric name to its MetricSummary.
+        - dropped (set): Names of the columns that are not numeric, which we don't summarise.
+
+    """
+
+    SUFFIX = '.summary.json'
+
+    def __init__(self, compression: int = 100):
+        """ Initialises an empty summary.
+
+        Args:
+            - compression (int, optional): Compression of the sketches used to estimate the median of each metric, default is 100.
+
+        """
+
+        self.compression = compression
+        self.n_rows = 0
+        self.key = None
+        self.metrics = {}
+        self.dropped = set()
+
+    def update(self, results: pd.DataFrame):
+        """ Adds new rows of the results file to the summary.
+
+        Only numeric (non boolean) columns are summarised, other columns are read from the results file as usual.
+
+        Args:
+            - results (pd.DataFrame): New rows of the results file.
+
+        """
+
+        for column in results.columns:
+            values = results[column]
+            if not pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+                # A column that is not numeric (even if only in some rows) is never summarised
+                self.metrics.pop(column, None)
+                self.dropped.add(column)
+                continue
+            if column in self.dropped:
+                continue
+            if column not in self.metrics:
+                self.metrics[column] = MetricSummary(self.compression)
+            self.metrics[column].update(values.to_numpy(dtype=float, na_value=np.nan), start_row=self.n_rows)
+        self.n_rows += len(results)
+        # Metrics missing from the new rows are NaN in them
+        for metric in self.metrics.values():
+            if metric.n_rows < self.n_rows:
+                metric.last = np.nan
+                metric.n_rows = self.n_rows
+
+    def get(self, metric_name: str, select_by: str) -> Optional[float]:
+        """ Returns the value of a metric selected by select_by, None if it can't be given by the summary. """
+
+        if metric_name not in self.metrics:
+            return None
+        return self.metrics[metric_name].get(select_by)
+
+    def save(self, path: str):
+        """ Writes the summary of the results file at path to its sidecar file, recording the current modification time and size of the results file.
+
+        Args:
+            - path (str): Path to the results file.
+
+        """
+
+        self.key = file_key(path)
+        data = {'n_rows': self.n_rows, 'key': list(self.key), 'compression': self.compression, 'dropped': sorted(self.dropped),
+                'metrics': {name: metric.to_dict() for name, metric in self.metrics.items()}}
+        tmp_path = path + self.SUFFIX + '.tmp.' + str(os.getpid())
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path + self.SUFFIX)
+
+    @classmethod
+    def load(cls, path: str, key: Optional[Tuple[int, int]] = None) -> Optional['RunSummary']:
+        """ Loads the summary of the results file at path from its sidecar file.
+
+        Args:
+            - path (str): Path to the results file.
+            - key (tuple, optional): (modification time in ns, size in bytes) the results file should have had when the summary was saved,
+                default is None (those of the results file now).
+
+        Returns:
+            - summary (RunSummary): The summary, None if there is no sidecar file or it is out of date.
+
+        """
+
+        try:
+            with open(path + cls.SUFFIX, 'r') as f:
+                data = json.load(f)
+            if tuple(file_key(path) if key is None else key) != tuple(data['key']):
+                return None
+        except (OSError, ValueError, KeyError):
+            return None
+        summary = cls(data['compression'])
+        summary.n_rows = data['n_rows']
+        summary.key = tuple(data['key'])
+        summary.dropped = set(data['dropped'])
+        summary.metrics = {name: MetricSummary.from_dict(d) for name, d in data['metrics'].items()}
+        return summary
+
+def read_summary_value(path: str, metric_name: str, select_by: str) -> Optional[float]:
+    """ Reads the value of a metric selected by select_by from the sidecar summary of a results file.
+
+    Defined at module level so it can be sent to a pool of processes.
+
+    Args:
+        - path (str): Path to the results file.
+        - metric_name (str): Name of the metric to be read.
+        - select_by (str): How to select the value of the metric.
+
+    Returns:
+        - value (float): Selected value, None if it can't be given by the summary (eg. the summary is missing or out of date).
+
+    """
+
+    summary = RunSummary.load(path)
+    if summary is None:
+        return None
+    return summary.get(metric_name, select_by)
@@ -1,3 +1,7 @@
-from .grid import SearcherGrid
+from .grid import SearcherGrid, LazyGrid
+from .sampling import SearcherRandom, SearcherQuasiRandom
+from .asha import SearcherASHA
+from .hyperband import SearcherHyperband
+from .tpe import SearcherTPE
 
-# __all__ = ['SearcherGrid']
\ No newline at end of file
+# __all__ = ['SearcherGrid', 'LazyGrid', 'SearcherRandom', 'SearcherQuasiRandom', 'SearcherASHA', 'SearcherHyperband', 'SearcherTPE']
\ No newline at end of file
@@ -0,0 +1,296 @@
+from typing import List, Optional, Tuple
+import math
+import time
+from slune.base import BaseSearcher, BaseSaver
+from .sampling import SearcherRandom
+
+def get_budgets(min_budget: float, max_budget: float, eta: int) -> List[float]:
+    """ Returns the budget of each rung of successive halving.
+
+    The budgets grow by a factor of eta from min_budget, with as many rungs as fit below max_budget,
+    the last rung having max_budget, eg. min_budget=1, max_budget=100 and eta=3 gives [1, 3, 9, 27, 100].
+
+    Args:
+        - min_budget (float): Budget of the first rung.
+        - max_budget (float): Budget of the last rung.
+        - eta (int): Factor by which the budget grows from one rung to the next.
+
+    Returns:
+        - budgets (list): Budget of each rung, integers if min_budget and max_budget are integers.
+
+    """
+
+    if eta < 2:
+        raise ValueError(f"eta must be at least 2, got {eta}")
+    if not 0 < min_budget <= max_budget:
+        raise ValueError(f"Budgets must have 0 < min_budget <= max_budget, got {min_budget} and {max_budget}")
+    # Allow for rounding errors, eg. log(81) / log(3) being a hair below 4
+    n_rungs = int(math.floor(math.log(max_budget / min_budget) / math.log(eta) + 1e-9)) + 1
+    budgets = [min_budget * eta ** k for k in range(n_rungs - 1)] + [max_budget]
+    if isinstance(min_budget, int) and isinstance(max_budget, int):
+        budgets = [int(round(b)) for b in budgets]
+    return budgets
+
+class SearcherASHA(BaseSearcher):
+    """ Searcher for asynchronous successive halving (ASHA).
+
+    Rather than running every configuration to completion, we run configurations with a small budget (eg. a few epochs)
+    and only give the most promising ones larger budgets.
+    Budgets are arranged in rungs, growing by a factor of eta from min_budget to max_budget (see get_budgets).
+    Each time a job is asked for (ie. next_tune is called), we look for a configuration in the top 1/eta
+    of the configurations whose results we have at some rung, that hasn't been promoted yet, starting from the highest rung.
+    If there is one, we promote it, returning it with the budget of the next rung.
+    Otherwise we sample a new configuration (with SearcherRandom, so configs is given in the same way) and return it with min_budget.
+
+    The budget is passed to the script as an extra parameter, called budget_name (eg. '--budget=9'),
+    which the script should use to decide how long to train for (eg. as the number of epochs),
+    and it should save its results with the saver, including the budget in its parameters (eg. saver = SaverCsv(LoggerDefault(), params)).
+    We find the results of each job using saver.read, with select_by (eg. 'last' for the value at the end of the run),
+    and rank configurations by the value of the metric, lower is better if mode is 'min', higher if mode is 'max'.
+    A job is taken to have finished once it has saved results, so scripts should save at the end of their run (as is done by default).
+
+    As promotions depend on the results of earlier jobs, next_tune waits (checking for new results every poll_interval seconds)
+    when nothing can be promoted and either we've sampled n_configs configurations or max_pending jobs haven't finished.
+    So jobs must be started as they are returned, eg. by iterating through the searcher with sbatchit,
+    giving max_pending as the number of jobs you want running at the same time,
+    or with sbatchit(..., executor=ExecutorLocal(n_workers=k)) and max_pending=k.
+    The search ends once every configuration has been sampled, nothing can be promoted and every job has finished.
+
+    Results already saved (eg. by a search that was stopped) are used rather than running the job again,
+    as long as the seed is the same, so a search can be resumed by running it again.
+
+    Attributes:
+        - configs (dict): Distribution of each parameter, see SearcherRandom.
+        - metric_name (str): Name of the metric used to rank configurations.
+        - saver (BaseSaver): Saver used to read the results of each job.
+        - budgets (list): Budget of each rung.
+        - eta (int): Factor by which the budget grows from one rung to the next, only the top 1/eta of each rung are promoted.
+        - sampler (SearcherRandom): Used to sample new configurations, the i'th configuration sampled is sampler[i].
+        - results (list of dict): For each rung, maps the index of each configuration with results at that rung to the value of its metric.
+        - pending (set of tuple): (configuration index, rung) of each job returned that hasn't saved results yet.
+        - promoted (list of set): For each rung, the indices of the configurations promoted from it.
+
+    """
+
+    waits_for_results = True
+
+    def __init__(self, configs: dict, metric_name: str, saver: Optional[BaseSaver] = None, n_configs: int = 100,
+                 min_budget: float = 1, max_budget: float = 81, eta: int = 3, mode: str = 'min', select_by: str = 'last',
+                 budget_name: str = 'budget', seed: Optional[int] = None, max_pending: Optional[int] = None,
+                 poll_interval: float = 10.0, timeout: Optional[float] = None):
+        """ Initialises the searcher.
+
+        Args:
+            - configs (dict): Distribution of each parameter, see SearcherRandom for the structure of the dictionary.
+            - metric_name (str): Name of the metric used to rank configurations.
+            - saver (BaseSaver, optional): Saver used to read the results of each job, can instead be given with check_existing_runs.
+            - n_configs (int, optional): Maximum number of configurations to sample, default is 100.
+            - min_budget (float, optional): Budget of the first rung, default is 1.
+            - max_budget (float, optional): Budget of the last rung, default is 81.
+            - eta (int, optional): Factor by which the budget grows from one rung to the next, default is 3.
+            - mode (str, optional): Whether lower ('min') or higher ('max') values of the metric are better, default is 'min'.
+            - select_by (str, optional): How to select the value of the metric from the results of a job, passed to saver.read, default is 'last'.
+            - budget_name (str, optional): Name of the parameter giving the budget to the script, default is 'budget'.
+            - seed (int, optional): Seed used to sample configurations, default is None (pick one at random).
+            - max_pending (int, optional): Maximum number of jobs running at the same time, default is None (no limit).
+            - poll_interval (float, optional): Number of seconds to wait between checking for new results, default is 10.
+            - timeout (float, optional): Number of seconds to wait for new results before giving up and ending the search,
+                default is None (wait for ever).
+
+        """
+
+        super().__init__()
+        if mode not in ['min', 'max']:
+            raise ValueError(f"mode must be 'min' or 'max', got '{mode}'")
+        self.configs = configs
+        self.metric_name = metric_name
+        self.saver = saver
+        self.n_configs = n_configs
+        self.budgets = get_budgets(min_budget, max_budget, eta)
+        self.eta = eta
+        self.mode = mode
+        self.select_by = select_by
+        self.budget_name = budget_name
+        self.max_pending = max_pending
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.sampler = SearcherRandom(configs, n_configs, seed=seed)
+        self.results = [{} for _ in self.budgets]
+        self.pending = set()
+        self.promoted = [set() for _ in self.budgets]
+        self.n_sampled = 0
+
+    def __len__(self):
+        """ Returns the maximum number of jobs, if every rung is full.
+
+        Returns:
+            - num_jobs (int): Maximum number of jobs the search can return.
+
+        """
+
+        return sum(self.n_configs // self.eta ** k for k in range(len(self.budgets)))
+
+    def check_existing_runs(self, saver: BaseSaver):
+        """ Sets the saver used to read the results of each job, results already saved are always used.
+
+        Args:
+            - saver (BaseSaver): Saver used to read the results of each job.
+
+        """
+
+        self.saver = saver
+
+    def get_params(self, index: int, rung: int) -> dict:
+        """ Returns the parameters of the job running a configuration at a rung, ie. the configuration with the budget of the rung. """
+
+        return dict(self.sampler[index], **{self.budget_name: self.budgets[rung]})
+
+    def read_result(self, index: int, rung: int) -> Optional[float]:
+        """ Reads the value of the metric saved by the job running a configuration at a rung.
+
+        Args:
+            - index (int): Index of the configuration.
+            - rung (int): Index of the rung.
+
+        Returns:
+            - value (float): Value of the metric (averaged over runs), None if the job hasn't saved results yet.
+
+        """
+
+        if self.saver is None:
+            raise ValueError("SearcherASHA needs a saver to read results from, give one when creating it or with check_existing_runs.")
+        _, values = self.saver.read(self.get_params(index, rung), self.metric_name, select_by=self.select_by)
+        if values is None:
+            return None
+        values = [v for v in values if (v is not None) and not (isinstance(v, float) and math.isnan(v))]
+        if values == []:
+            return None
+        return sum(values) / len(values)
+
+    def update(self):
+        """ Reads the results of pending jobs, recording those that have finished. """
+
+        for index, rung in list(self.pending):
+            value = self.read_result(index, rung)
+            if value is not None:
+                self.results[rung][index] = value
+                self.pending.discard((index, rung))
+
+    def ranked(self, rung: int) -> List[int]:
+        """ Returns the indices of the configurations with results at a rung, from best to worst. """
+
+        return sorted(self.results[rung], key=lambda index: self.results[rung][index], reverse=(self.mode == 'max'))
+
+    def get_promotion(self, rungs: Optional[range] = None) -> Optional[Tuple[int, int]]:
+        """ Finds a configuration to promote, looking at the highest rung first.
+
+        Args:
+            - rungs (range, optional): Rungs to promote from, default is None (every rung but the last).
+
+        Returns:
+            - promotion (tuple): (configuration index, rung it is promoted to), None if no configuration can be promoted.
+
+        """
+
+        if rungs is None:
+            rungs = range(len(self.budgets) - 1)
+        for rung in reversed(rungs):
+            top = self.ranked(rung)[:len(self.results[rung]) // self.eta]
+            for index in top:
+                if index not in self.promoted[rung]:
+                    return index, rung + 1
+        return None
+
+    def start(self, index: int, rung: int) -> bool:
+        """ Starts a job running a configuration at a rung, unless it already has saved results.
+
+        Args:
+            - index (int): Index of the configuration.
+            - rung (int): Index of the rung.
+
+        Returns:
+            - started (bool): Whether the job needs running, False if its results were already saved.
+
+        """
+
+        if rung > 0:
+            self.promoted[rung - 1].add(index)
+        value = self.read_result(index, rung)
+        if value is not None:
+            self.results[rung][index] = value
+            return False
+        self.pending.add((index, rung))
+        return True
+
+    def get_job(self) -> Optional[Tuple[int, int]]:
+        """ Returns the next job to run, without waiting.
+
+        Returns:
+            - job (tuple): (configuration index, rung) of the next job, None if there is none right now.
+
+        """
+
+        while True:
+            if (self.max_pending is not None) and (len(self.pending) >= self.max_pending):
+                return None
+            job = self.get_promotion()
+            if (job is None) and (self.n_sampled < self.n_configs):
+                job = (self.n_sampled, 0)
+                self.n_sampled += 1
+            if job is None:
+                return None
+            if self.start(*job):
+                return job
+
+    def wait_for_job(self, get_job) -> Tuple[int, int]:
+        """ Waits until get_job gives a job, checking for new results every poll_interval seconds.
+
+        Args:
+            - get_job (function): Returns the next job to run, None if there is none right now.
+
+        Returns:
+            - job (tuple): (configuration index, rung) of the next job.
+
+        """
+
+        start = time.monotonic()
+        while True:
+            self.update()
+            job = get_job()
+            if job is not None:
+                return job
+            if self.pending == set():
+                raise IndexError('Search finished, no more configurations to try.')
+            if (self.timeout is not None) and (time.monotonic() - start > self.timeout):
+                raise IndexError(f'Waited {self.timeout} seconds for jobs to finish, ending the search.')
+            time.sleep(self.poll_interval)
+
+    def next_tune(self) -> dict:
+        """ Returns the next configuration to try, with its budget.
+
+        Waits for results of earlier jobs if needed, see the class description.
+        To iterate through all configurations, use a for loop like so:
+            for config in searcher: ...
+
+        Returns:
+            - next_config (dict): The next configuration to try, including the budget parameter.
+
+        """
+
+        return self.get_params(*self.wait_for_job(self.get_job))
+
+    def get_best(self) -> Tuple[Optional[dict], Optional[float]]:
+        """ Returns the best configuration found so far, from the highest rung with results.
+
+        Returns:
+            - best_config (dict): Best configuration, including its budget, None if there are no results yet.
+            - best_value (float): Value of the metric for the best configuration, None if there are no results yet.
+
+        """
+
+        self.update()
+        for rung in reversed(range(len(self.budgets))):
+            if self.results[rung] != {}:
+                index = self.ranked(rung)[0]
+                return self.get_params(index, rung), self.results[rung][index]
+        return None, None
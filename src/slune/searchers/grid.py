@@ -1,7 +1,75 @@
 from typing import List, Tuple
+import itertools
 from slune.base import BaseSearcher, BaseSaver
 from slune.utils import dict_to_strings
 
+class LazyGrid:
+    """ Sequence of all possible combinations of values for each parameter, created on demand.
+
+    Rather than storing every combination, we only store the list of values for each parameter,
+    and compute the combination at a given index using mixed-radix indexing,
+    ie. the index is written as a number where each digit is the index of the value of a parameter.
+    The last parameter changes fastest, so combinations are in the same order as those returned by SearcherGrid.get_grid.
+    Supports len(), random access (grid[i]) and iteration, using memory independent of the number of combinations.
+
+    Attributes:
+        - names (list of str): Names of the parameters.
+        - values (list of list): Values to try for each parameter.
+
+    """
+
+    def __init__(self, param_dict: dict):
+        """ Initialises the grid.
+
+        Args:
+            - param_dict (dict): A dictionary where keys are argument names and values are lists of values.
+
+        """
+
+        self.names = list(param_dict.keys())
+        self.values = []
+        for param_name in self.names:
+            param_values = param_dict[param_name]
+            # Validate param_values
+            if isinstance(param_values, (str, bytes)) or not hasattr(param_values, '__iter__'):
+                raise TypeError(f"Values for parameter '{param_name}' must be an iterable of values, got {type(param_values).__name__}")
+            self.values.append(list(param_values))
+        self._len = 1
+        for param_values in self.values:
+            self._len *= len(param_values)
+
+    def __len__(self):
+        """ Returns the number of combinations in the grid. """
+
+        return self._len
+
+    def __getitem__(self, index: int) -> dict:
+        """ Returns the combination at the given index.
+
+        Args:
+            - index (int): Index of the combination, negative indices count from the end.
+
+        Returns:
+            - combination (dict): One combination of argument values.
+
+        """
+
+        if index < 0:
+            index += self._len
+        if index < 0 or index >= self._len:
+            raise IndexError('Grid index out of range.')
+        combination = {}
+        for name, param_values in zip(reversed(self.names), reversed(self.values)):
+            index, value_index = divmod(index, len(param_values))
+            combination[name] = param_values[value_index]
+        return {name: combination[name] for name in self.names}
+
+    def __iter__(self):
+        """ Iterates through the combinations in order. """
+
+        for combination in itertools.product(*self.values):
+            yield dict(zip(self.names, combination))
+
 class SearcherGrid(BaseSearcher):
     """ Searcher for grid search.
     
@@ -16,12 +84,19 @@ class SearcherGrid(BaseSearcher):
             if runs = 0 -> run each config once even if it already exists.
             This behavior is modified if we want to (use) check_existing_runs, see methods description.
         - grid (list of dict): List of dictionaries, each containing one combination of argument values.
+            If lazy is True this is a LazyGrid, which creates each combination when it is needed.
         - grid_index (int): Index of the current configuration in the grid.
         - saver_exists (function): Pointer to the savers exists method, used to check if there are existing runs.
+        - saver_exists_many (function): Pointer to the savers exists_many method, used to check for existing runs of many configurations at once.
+        - existing_runs (list of int): Number of existing runs for each configuration in the chunk of the grid we are at, None if not computed yet.
+            Computed for chunk_size configurations in one go when we reach them after check_existing_runs is called,
+            so memory use doesn't grow with the size of the grid.
+        - existing_start (int): Index of the first configuration of the chunk existing_runs is for.
+        - chunk_size (int): Number of configurations to check for existing runs at once.
 
     """
 
-    def __init__(self, configs: dict, runs: int = 0):
+    def __init__(self, configs: dict, runs: int = 0, lazy: bool = False):
         """ Initializes the searcher.
 
         Args:
@@ -31,15 +106,21 @@ class SearcherGrid(BaseSearcher):
                 if runs > 0 -> run each config 'runs' times.
                 if runs = 0 -> run each config once even if it already exists.
                 This behavior is modified if we want to (use) check_existing_runs, see methods description.
+            - lazy (bool, optional): Whether to create each configuration only when it is needed, default is False.
+                Use this for very large grids, so we don't have to store every configuration in memory.
 
         """
 
         super().__init__()
         self.runs = runs
         self.configs = configs
-        self.grid = self.get_grid(configs)
+        self.grid = LazyGrid(configs) if lazy else self.get_grid(configs)
         self.grid_index = None
         self.saver_exists = None
+        self.saver_exists_many = None
+        self.existing_runs = None
+        self.existing_start = None
+        self.chunk_size = 10000
 
     def __len__(self):
         """ Returns the number of configurations defined by search space. 
@@ -95,6 +176,10 @@ class SearcherGrid(BaseSearcher):
     def check_existing_runs(self, saver: BaseSaver):
         """ We save a pointer to the savers exists method to check if there are existing runs.
 
+        We also save a pointer to the savers exists_many method,
+        so we can count the existing runs for every configuration in the grid in one go,
+        meaning the storage only has to be searched once rather than once per configuration.
+
         If there are n existing runs:
             n < runs -> run the remaining runs
             n >= runs -> skip all runs
@@ -106,6 +191,9 @@ class SearcherGrid(BaseSearcher):
 
         if self.runs != 0:
             self.saver_exists = saver.exists
+            self.saver_exists_many = saver.exists_many
+            self.existing_runs = None
+            self.existing_start = None
         else:
             raise ValueError("Won't check for existing runs if runs = 0, Set runs > 0.")
     
@@ -123,7 +211,15 @@ class SearcherGrid(BaseSearcher):
             - grid_index (int): Index of the next configuration in the grid.
             - run_index (int): Index of the next run for the current configuration.
         """
-        if self.saver_exists != None:
+        if self.saver_exists_many is not None:
+            # Use the number of existing runs counted for a chunk of the grid at a time to skip configurations
+            while grid_index < len(self.grid):
+                existing = self.get_existing_runs(grid_index)
+                if existing < self.runs:
+                    return grid_index, existing
+                grid_index += 1
+            raise IndexError('Reached end of grid, no more configurations to try.')
+        elif self.saver_exists != None:
             # Check if there are existing runs, if so skip them
             existing_runs = self.saver_exists(self.grid[grid_index])
             if self.runs - existing_runs > 0:
@@ -138,6 +234,26 @@ class SearcherGrid(BaseSearcher):
                 raise IndexError('Reached end of grid, no more configurations to try.')
             return grid_index, 0
 
+    def get_existing_runs(self, grid_index: int) -> int:
+        """ Returns the number of existing runs of the configuration at the given index, using the savers exists_many method.
+
+        Existing runs are counted for the chunk of chunk_size configurations containing the index, which is kept until we move past it.
+
+        Args:
+            - grid_index (int): Index of the configuration in the grid.
+
+        Returns:
+            - num_runs (int): Number of existing runs of the configuration.
+
+        """
+
+        chunk_start = grid_index - grid_index % self.chunk_size
+        if self.existing_start != chunk_start:
+            chunk = range(chunk_start, min(chunk_start + self.chunk_size, len(self.grid)))
+            self.existing_runs = self.saver_exists_many([self.grid[i] for i in chunk])
+            self.existing_start = chunk_start
+        return self.existing_runs[grid_index - chunk_start]
+
     def next_tune(self) -> dict:
         """ Returns the next configuration to try.
 
@@ -166,3 +282,68 @@ class SearcherGrid(BaseSearcher):
         next_config = self.grid[self.grid_index]
         return next_config
 
+    def shard(self, index: int, count: int):
+        """ Iterates through the configurations of one of count shards of the grid.
+
+        Shard index gets every count'th configuration of the grid starting at configuration index,
+        each configuration is found directly from its index so the full grid is never iterated through.
+        This lets count submitters (or tasks of a Slurm job array, using index = SLURM_ARRAY_TASK_ID)
+        each take their share of a huge grid without any coordination.
+        Existing runs are skipped in the same way as when iterating through the searcher, see check_existing_runs.
+
+        Args:
+            - index (int): Index of the shard, between 0 and count - 1.
+            - count (int): Total number of shards.
+
+        Yields:
+            - config (dict): The next configuration of the shard, repeated once for each run we want of it.
+
+        """
+
+        if count < 1 or index < 0 or index >= count:
+            raise ValueError(f"Shard index must be between 0 and count - 1, got index={index} and count={count}.")
+        return self.iter_indices(range(index, len(self.grid), count))
+
+    def slice(self, start: int, stop: int = None):
+        """ Iterates through the configurations between two indices of the grid.
+
+        Works in the same way as shard, but for a contiguous block of the grid.
+
+        Args:
+            - start (int): Index of the first configuration.
+            - stop (int, optional): Index after the last configuration, default is None (the end of the grid).
+
+        Yields:
+            - config (dict): The next configuration of the slice, repeated once for each run we want of it.
+
+        """
+
+        return self.iter_indices(range(len(self.grid))[start:stop])
+
+    def iter_indices(self, indices: range):
+        """ Iterates through the configurations at the given indices of the grid.
+
+        If check_existing_runs has been called, existing runs are counted for self.chunk_size configurations at a time,
+        using the savers exists_many method.
+
+        Args:
+            - indices (range): Indices of the configurations in the grid.
+
+        Yields:
+            - config (dict): The next configuration, repeated once for each run we want of it.
+
+        """
+
+        runs = max(self.runs, 1)
+        for chunk_start in range(0, len(indices), self.chunk_size):
+            chunk = indices[chunk_start:chunk_start + self.chunk_size]
+            configs = [self.grid[i] for i in chunk]
+            if self.saver_exists_many is not None:
+                existing_runs = self.saver_exists_many(configs)
+            elif self.saver_exists is not None:
+                existing_runs = [self.saver_exists(config) for config in configs]
+            else:
+                existing_runs = [0] * len(configs)
+            for config, existing in zip(configs, existing_runs):
+                for _ in range(runs - existing):
+                    yield config
@@ -0,0 +1,206 @@
+from typing import Optional, Tuple
+import json
+import math
+import os
+from slune.base import BaseSaver
+from slune.slune import write_manifest
+from slune.utils import dict_to_strings
+from .asha import SearcherASHA, get_budgets
+
+class SearcherHyperband(SearcherASHA):
+    """ Searcher for Hyperband.
+
+    Successive halving has to choose between trying many configurations with a small budget,
+    and trying fewer with a larger budget, in case the metric at small budgets doesn't tell the good configurations apart.
+    Hyperband hedges between the two by running several brackets of successive halving, each starting from a different rung.
+    With budgets given by get_budgets(min_budget, max_budget, eta) and s_max + 1 rungs, bracket s (from s_max down to 0)
+    samples ceil((s_max + 1) / (s + 1) * eta^s) configurations, runs them all with the budget of rung s_max - s,
+    then keeps the top 1/eta of them for the next rung, and so on until the top rung.
+    So bracket s_max tries the most configurations starting from min_budget, and bracket 0 runs a few configurations with max_budget.
+
+    Unlike SearcherASHA, configurations are only promoted once every job of their rung in their bracket has finished,
+    as in the original Hyperband. Brackets are independent, so jobs of different brackets can run at the same time.
+
+    Configurations are sampled, the budget is passed to the script and results are read in the same way as for SearcherASHA.
+    Each bracket uses a fixed range of the configurations sampled, so with the same seed the schedule only depends on the saved results.
+
+    If wait is False (the default), iterating through the searcher returns every job that can be run given the results saved so far
+    and then ends, so calling sbatchit (with the saver, which is given to check_existing_runs) submits the next jobs of the schedule,
+    and calling it again once those jobs have finished continues the schedule from where it got to.
+    Every job returned is recorded in a manifest of submitted jobs (see write_manifest), by default '.slune_hyperband_<seed>.json'
+    in the root directory of the saver, so jobs still running when sbatchit is called again are not submitted again.
+    A job that never saves results (eg. it failed) is therefore not submitted again either,
+    delete its entry from the manifest (or the manifest) to run it again.
+    Without a seed the schedule can't be continued, so no manifest is kept unless submitted_path is given.
+    If wait is True, next_tune waits for jobs to finish as SearcherASHA does, so the whole schedule can be run in one go,
+    eg. with sbatchit(..., executor=ExecutorLocal(n_workers=k)) and max_pending=k.
+
+    Attributes:
+        - brackets (list of tuple): (s, index of the first configuration, number of configurations) of each bracket.
+        - wait (bool): Whether next_tune waits for jobs to finish.
+        - submitted_path (str): Path to the manifest of submitted jobs, None to use the default path (see get_submitted_path).
+        - submitted (set of tuple): Arguments of each job in the manifest of submitted jobs, None until it is read.
+
+    """
+
+    def __init__(self, configs: dict, metric_name: str, saver: Optional[BaseSaver] = None,
+                 min_budget: float = 1, max_budget: float = 81, eta: int = 3, mode: str = 'min', select_by: str = 'last',
+                 budget_name: str = 'budget', seed: Optional[int] = None, wait: bool = False, max_pending: Optional[int] = None,
+                 poll_interval: float = 10.0, timeout: Optional[float] = None, submitted_path: Optional[str] = None):
+        """ Initialises the searcher.
+
+        Args:
+            - configs (dict): Distribution of each parameter, see SearcherRandom for the structure of the dictionary.
+            - metric_name (str): Name of the metric used to rank configurations.
+            - saver (BaseSaver, optional): Saver used to read the results of each job, can instead be given with check_existing_runs.
+            - min_budget (float, optional): Budget of the first rung, default is 1.
+            - max_budget (float, optional): Budget of the last rung, default is 81.
+            - eta (int, optional): Factor by which the budget grows from one rung to the next, default is 3.
+            - mode (str, optional): Whether lower ('min') or higher ('max') values of the metric are better, default is 'min'.
+            - select_by (str, optional): How to select the value of the metric from the results of a job, passed to saver.read, default is 'last'.
+            - budget_name (str, optional): Name of the parameter giving the budget to the script, default is 'budget'.
+            - seed (int, optional): Seed used to sample configurations, default is None (pick one at random).
+                Give a seed to continue a schedule by calling sbatchit again.
+            - wait (bool, optional): Whether next_tune waits for jobs to finish, default is False.
+            - max_pending (int, optional): Maximum number of jobs running at the same time when waiting, default is None (no limit).
+            - poll_interval (float, optional): Number of seconds to wait between checking for new results, default is 10.
+            - timeout (float, optional): Number of seconds to wait for new results before giving up and ending the search,
+                default is None (wait for ever).
+            - submitted_path (str, optional): Path to the manifest of the jobs submitted so far, only used if wait is False,
+                default is None ('.slune_hyperband_<seed>.json' in the root directory of the saver).
+
+        """
+
+        brackets = []
+        n_rungs = len(get_budgets(min_budget, max_budget, eta))
+        s_max = n_rungs - 1
+        n_configs = 0
+        for s in reversed(range(n_rungs)):
+            n = int(math.ceil((s_max + 1) / (s + 1) * eta ** s))
+            brackets.append((s, n_configs, n))
+            n_configs += n
+        super().__init__(configs, metric_name, saver, n_configs=n_configs, min_budget=min_budget, max_budget=max_budget, eta=eta,
+                         mode=mode, select_by=select_by, budget_name=budget_name, seed=seed, max_pending=max_pending,
+                         poll_interval=poll_interval, timeout=timeout)
+        self.brackets = brackets
+        self.wait = wait
+        self.waits_for_results = wait
+        self.seed = seed
+        self.submitted_path = submitted_path
+        self.submitted = None
+
+    def __len__(self):
+        """ Returns the number of jobs in the Hyperband schedule.
+
+        Returns:
+            - num_jobs (int): Number of jobs the search returns, if none were already run.
+
+        """
+
+        return sum(n // self.eta ** i for s, _, n in self.brackets for i in range(s + 1))
+
+    def get_job(self) -> Optional[Tuple[int, int]]:
+        """ Returns the next job to run, without waiting.
+
+        Goes through the brackets, in each finding the first rung whose jobs haven't all finished,
+        and returns a job of that rung that isn't already running.
+
+        Returns:
+            - job (tuple): (configuration index, rung) of the next job, None if there is none right now.
+
+        """
+
+        for s, first, n in self.brackets:
+            start_rung = len(self.budgets) - 1 - s
+            current = list(range(first, first + n))
+            for i in range(s + 1):
+                rung = start_rung + i
+                missing = [index for index in current if index not in self.results[rung]]
+                if missing != []:
+                    for index in missing:
+                        if (self.max_pending is not None) and (len(self.pending) >= self.max_pending):
+                            return None
+                        if ((index, rung) not in self.pending) and self.start(index, rung) and not self.was_submitted(index, rung):
+                            return index, rung
+                    # Jobs of this rung are still running, or we just found their results
+                    if any(index not in self.results[rung] for index in current):
+                        break
+                # Every job of the rung has finished, so we keep the best for the next rung
+                members = set(current)
+                current = [index for index in self.ranked(rung) if index in members][:n // self.eta ** (i + 1)]
+        return None
+
+    def get_submitted_path(self) -> Optional[str]:
+        """ Returns the path to the manifest of submitted jobs.
+
+        Returns:
+            - submitted_path (str): submitted_path if it was given,
+                otherwise '.slune_hyperband_<seed>.json' in the root directory of the saver,
+                None if we are waiting for jobs, there is no seed or the saver has no root directory (no manifest is kept).
+
+        """
+
+        if self.wait:
+            return None
+        if self.submitted_path is not None:
+            return self.submitted_path
+        if (self.seed is None) or (getattr(self.saver, 'root_dir', None) is None):
+            return None
+        return os.path.join(self.saver.root_dir, f'.slune_hyperband_{self.seed}.json')
+
+    def was_submitted(self, index: int, rung: int) -> bool:
+        """ Checks whether a job is in the manifest of submitted jobs, ie. it was returned by an earlier search and is still running.
+
+        Args:
+            - index (int): Index of the configuration.
+            - rung (int): Index of the rung.
+
+        Returns:
+            - submitted (bool): Whether the job was already submitted, always False if no manifest is kept.
+
+        """
+
+        path = self.get_submitted_path()
+        if path is None:
+            return False
+        if self.submitted is None:
+            try:
+                with open(path, 'r') as f:
+                    self.submitted = set(tuple(args) for args in json.load(f))
+            except FileNotFoundError:
+                self.submitted = set()
+        return tuple(dict_to_strings(self.get_params(index, rung))) in self.submitted
+
+    def record_submitted(self, index: int, rung: int):
+        """ Adds a job to the manifest of submitted jobs, does nothing if no manifest is kept. """
+
+        path = self.get_submitted_path()
+        if path is None:
+            return
+        self.was_submitted(index, rung)
+        self.submitted.add(tuple(dict_to_strings(self.get_params(index, rung))))
+        write_manifest(sorted(list(args) for args in self.submitted), path)
+
+    def next_tune(self) -> dict:
+        """ Returns the next configuration to try, with its budget.
+
+        If wait is False, raises an IndexError (ending the iteration) once no job can be run given the results saved so far,
+        and records the job returned in the manifest of submitted jobs.
+        If wait is True, waits for jobs to finish as SearcherASHA does.
+
+        Returns:
+            - next_config (dict): The next configuration to try, including the budget parameter.
+
+        """
+
+        if self.wait:
+            return self.get_params(*self.wait_for_job(self.get_job))
+        job = self.get_job()
+        if job is None:
+            # Only read the results of submitted jobs once we run out of other jobs, rather than on every call
+            self.update()
+            job = self.get_job()
+        if job is None:
+            raise IndexError('No more configurations can be tried until the jobs submitted have finished.')
+        self.record_submitted(*job)
+        return self.get_params(*job)
@@ -0,0 +1,467 @@
+from typing import List, Optional
+import numpy as np
+from slune.base import BaseSearcher, BaseSaver
+
+# Direction numbers of the Sobol sequence for dimensions 2 to 21, from Joe and Kuo (new-joe-kuo-6.21201),
+# each given as (s, a, m) where s is the degree of the primitive polynomial, a encodes its coefficients and m are the initial direction numbers
+SOBOL_DIRECTIONS = [
+    (1, 0, [1]), (2, 1, [1, 3]), (3, 1, [1, 3, 1]), (3, 2, [1, 1, 1]), (4, 1, [1, 1, 3, 3]), (4, 4, [1, 3, 5, 13]),
+    (5, 2, [1, 1, 5, 5, 17]), (5, 4, [1, 1, 5, 5, 5]), (5, 7, [1, 1, 7, 11, 19]), (5, 11, [1, 1, 5, 1, 1]),
+    (5, 13, [1, 1, 1, 3, 11]), (5, 14, [1, 3, 5, 5, 31]), (6, 1, [1, 3, 3, 9, 7, 49]), (6, 13, [1, 1, 1, 15, 21, 21]),
+    (6, 16, [1, 3, 1, 13, 27, 49]), (6, 19, [1, 1, 1, 15, 7, 5]), (6, 22, [1, 3, 1, 15, 13, 25]), (6, 25, [1, 1, 5, 5, 19, 61]),
+    (7, 1, [1, 3, 7, 11, 23, 15, 103]), (7, 4, [1, 3, 7, 13, 13, 15, 69]),
+]
+SOBOL_BITS = 30
+
+def get_primes(n: int) -> List[int]:
+    """ Returns the first n prime numbers. """
+
+    primes = []
+    candidate = 2
+    while len(primes) < n:
+        if all(candidate % p != 0 for p in primes if p * p <= candidate):
+            primes.append(candidate)
+        candidate += 1
+    return primes
+
+def halton_points(indices: np.ndarray, dims: int) -> np.ndarray:
+    """ Returns the points of the Halton sequence at the given indices.
+
+    The j'th coordinate of point i is the radical inverse of i in the j'th prime base,
+    ie. the digits of i in that base mirrored around the decimal point.
+    Index 0 gives the origin, so you may want to start from index 1.
+
+    Args:
+        - indices (np.ndarray): Indices of the points.
+        - dims (int): Number of dimensions.
+
+    Returns:
+        - points (np.ndarray): Array of shape (len(indices), dims) with values in [0, 1).
+
+    """
+
+    indices = np.asarray(indices, dtype=np.int64)
+    points = np.zeros((len(indices), dims))
+    for j, base in enumerate(get_primes(dims)):
+        remaining = indices.copy()
+        factor = 1.0 / base
+        while np.any(remaining > 0):
+            remaining, digit = np.divmod(remaining, base)
+            points[:, j] += factor * digit
+            factor /= base
+    return points
+
+def get_sobol_directions(dims: int) -> np.ndarray:
+    """ Returns the direction numbers of the first dims dimensions of the Sobol sequence.
+
+    Args:
+        - dims (int): Number of dimensions, at most len(SOBOL_DIRECTIONS) + 1.
+
+    Returns:
+        - directions (np.ndarray): Array of shape (dims, SOBOL_BITS) of integers, the direction numbers of each dimension.
+
+    """
+
+    if dims > len(SOBOL_DIRECTIONS) + 1:
+        raise ValueError(f"Sobol sequences are only available for up to {len(SOBOL_DIRECTIONS) + 1} parameters, got {dims}, use method='halton' or 'lhs' instead.")
+    directions = np.zeros((dims, SOBOL_BITS), dtype=np.int64)
+    # The first dimension is the van der Corput sequence in base 2
+    directions[0] = [1 << (SOBOL_BITS - 1 - k) for k in range(SOBOL_BITS)]
+    for j in range(1, dims):
+        s, a, m = SOBOL_DIRECTIONS[j - 1]
+        v = [m[k] << (SOBOL_BITS - 1 - k) for k in range(s)]
+        for k in range(s, SOBOL_BITS):
+            value = v[k - s] ^ (v[k - s] >> s)
+            for i in range(1, s):
+                value ^= ((a >> (s - 1 - i)) & 1) * v[k - i]
+            v.append(value)
+        directions[j] = v
+    return directions
+
+def sobol_points(indices: np.ndarray, dims: int, shift: Optional[np.ndarray] = None) -> np.ndarray:
+    """ Returns the points of the Sobol sequence at the given indices.
+
+    Each point is found directly from its index, by xor-ing the direction numbers of the bits set in the index,
+    so any part of the sequence can be created without creating the points before it.
+    The first 2^k points are the same as those of the usual (Gray code ordered) Sobol sequence, in a different order.
+
+    Args:
+        - indices (np.ndarray): Indices of the points, less than 2^SOBOL_BITS.
+        - dims (int): Number of dimensions.
+        - shift (np.ndarray, optional): Integers xor-ed with the points of each dimension (a digital shift), default is None (no shift).
+            A random shift keeps the properties of the sequence while giving different points for different seeds.
+
+    Returns:
+        - points (np.ndarray): Array of shape (len(indices), dims) with values in [0, 1).
+
+    """
+
+    indices = np.asarray(indices, dtype=np.int64)
+    directions = get_sobol_directions(dims)
+    values = np.zeros((len(indices), dims), dtype=np.int64)
+    for k in range(SOBOL_BITS):
+        bit = ((indices >> k) & 1).astype(bool)
+        values[bit] ^= directions[:, k]
+    if shift is not None:
+        values ^= shift
+    return values / float(1 << SOBOL_BITS)
+
+class SearcherRandom(BaseSearcher):
+    """ Searcher for random search.
+
+    Samples n_samples configurations at random from the distribution given for each parameter.
+    The distribution of each parameter is given by either:
+        - a list of values, which are sampled uniformly (categorical), eg. 'activation': ['relu', 'tanh'].
+        - a tuple ('uniform', low, high), a float sampled uniformly between low and high, eg. 'dropout': ('uniform', 0.0, 0.5).
+        - a tuple ('loguniform', low, high), a float whose log is sampled uniformly, eg. 'learning_rate': ('loguniform', 1e-5, 1e-1).
+        - a tuple ('int', low, high), an integer sampled uniformly between low and high (both included), eg. 'layers': ('int', 1, 8).
+
+    Unlike SearcherGrid the number of configurations doesn't grow with the number of parameters,
+    so we can search spaces with many parameters with only a few hundred jobs.
+
+    Configurations are created in batches of batch_size, each from a point in the unit hypercube,
+    using a random number generator seeded by the seed and the index of the batch.
+    So only one batch is kept in memory, and the configuration at any index is always the same for a given seed and batch_size,
+    which means a search can be resumed, sharded or extended (by increasing n_samples) and will give the same configurations.
+    If no seed is given we pick one at random, stored in the seed attribute so the search can be repeated.
+
+    Attributes:
+        - configs (dict): Distribution of each parameter.
+        - n_samples (int): Number of configurations to sample.
+        - runs (int): Controls search based on number of runs we want for each config.
+            if runs > 0 -> run each config 'runs' times.
+            if runs = 0 -> run each config once even if it already exists.
+            This behavior is modified if we want to (use) check_existing_runs, see methods description.
+        - seed (int): Seed used to sample the configurations.
+        - batch_size (int): Number of configurations created at once.
+        - sample_index (int): Index of the current configuration, None if we haven't started iterating.
+        - saver_exists (function): Pointer to the savers exists method, used to check if there are existing runs.
+        - saver_exists_many (function): Pointer to the savers exists_many method, used to check for existing runs of a batch of configurations at once.
+
+    """
+
+    DISTRIBUTIONS = ['uniform', 'loguniform', 'int']
+
+    def __init__(self, configs: dict, n_samples: int, runs: int = 0, seed: Optional[int] = None, batch_size: int = 1024):
+        """ Initialises the searcher.
+
+        Args:
+            - configs (dict): Distribution of each parameter, see the class description for the structure of the dictionary.
+            - n_samples (int): Number of configurations to sample.
+            - runs (int, optional): Controls search based on number of runs we want for each config.
+                if runs > 0 -> run each config 'runs' times.
+                if runs = 0 -> run each config once even if it already exists.
+                This behavior is modified if we want to (use) check_existing_runs, see methods description.
+            - seed (int, optional): Seed used to sample the configurations, default is None (pick one at random).
+            - batch_size (int, optional): Number of configurations created at once, default is 1024.
+
+        """
+
+        super().__init__()
+        self.configs = configs
+        self.names = list(configs.keys())
+        self.distributions = [self.parse_distribution(name, configs[name]) for name in self.names]
+        self.n_samples = n_samples
+        self.runs = runs
+        self.seed = seed if seed is not None else int(np.random.SeedSequence().entropy % (2 ** 32))
+        self.batch_size = batch_size
+        self.sample_index = None
+        self.run_index = 0
+        self.saver_exists = None
+        self.saver_exists_many = None
+        self._batch_index = None
+        self._batch = None
+        self._batch_existing_runs = None
+
+    def parse_distribution(self, name: str, distribution) -> tuple:
+        """ Checks the distribution given for a parameter.
+
+        Args:
+            - name (str): Name of the parameter.
+            - distribution (list or tuple): Distribution of the parameter, see the class description.
+
+        Returns:
+            - distribution (tuple): Either ('categorical', values) or (kind, low, high).
+
+        """
+
+        if isinstance(distribution, tuple) and (len(distribution) > 0) and (distribution[0] in self.DISTRIBUTIONS):
+            if len(distribution) != 3:
+                raise ValueError(f"Distribution of parameter '{name}' must be given as (kind, low, high), got {distribution}")
+            kind, low, high = distribution
+            if low > high:
+                raise ValueError(f"Distribution of parameter '{name}' must have low <= high, got {distribution}")
+            if (kind == 'loguniform') and (low <= 0):
+                raise ValueError(f"Distribution of parameter '{name}' must have low > 0 to be loguniform, got {distribution}")
+            return (kind, low, high)
+        if isinstance(distribution, (str, bytes, tuple)) or not hasattr(distribution, '__iter__'):
+            raise TypeError(f"Distribution of parameter '{name}' must be a list of values or a tuple (kind, low, high) with kind in {self.DISTRIBUTIONS}, got {distribution}")
+        values = list(distribution)
+        if values == []:
+            raise ValueError(f"Parameter '{name}' must have at least one value")
+        return ('categorical', values)
+
+    def __len__(self):
+        """ Returns the number of configurations defined by search space.
+
+        This may not be accurate if we want to (use) check_existing_runs,
+        as we may skip configurations, see methods description.
+
+        Returns:
+            - num_configs (int): Number of configurations to try, including repeated runs.
+
+        """
+
+        return self.n_samples * max(self.runs, 1)
+
+    def sample_unit(self, batch_index: int) -> np.ndarray:
+        """ Returns the points in the unit hypercube used to create a batch of configurations.
+
+        Args:
+            - batch_index (int): Index of the batch.
+
+        Returns:
+            - points (np.ndarray): Array of shape (batch_size, number of parameters) with values in [0, 1).
+
+        """
+
+        rng = np.random.default_rng([self.seed, batch_index])
+        return rng.random((self.batch_size, len(self.names)))
+
+    def from_unit(self, points: np.ndarray) -> List[dict]:
+        """ Creates configurations from points in the unit hypercube, one parameter per column.
+
+        Args:
+            - points (np.ndarray): Array of shape (number of configurations, number of parameters) with values in [0, 1).
+
+        Returns:
+            - configs (list of dict): Configuration created from each point.
+
+        """
+
+        columns = []
+        for j, distribution in enumerate(self.distributions):
+            u = points[:, j]
+            if distribution[0] == 'categorical':
+                values = distribution[1]
+                indices = np.minimum((u * len(values)).astype(np.int64), len(values) - 1)
+                columns.append([values[i] for i in indices])
+                continue
+            kind, low, high = distribution
+            if kind == 'uniform':
+                column = low + u * (high - low)
+            elif kind == 'loguniform':
+                column = np.exp(np.log(low) + u * (np.log(high) - np.log(low)))
+            else:
+                column = np.minimum(np.floor(low + u * (high - low + 1)), high).astype(np.int64)
+            # tolist gives python ints and floats, which are written as usual in paths and on the command line
+            columns.append(column.tolist())
+        return [dict(zip(self.names, values)) for values in zip(*columns)] if columns else [{} for _ in range(len(points))]
+
+    def get_batch(self, batch_index: int) -> List[dict]:
+        """ Returns the configurations in a batch, keeping the last batch created. """
+
+        if batch_index != self._batch_index:
+            self._batch = self.from_unit(self.sample_unit(batch_index))
+            self._batch_index = batch_index
+            self._batch_existing_runs = None
+        return self._batch
+
+    def __getitem__(self, index: int) -> dict:
+        """ Returns the configuration at the given index.
+
+        Args:
+            - index (int): Index of the configuration, negative indices count from the end.
+
+        Returns:
+            - config (dict): The configuration at the given index.
+
+        """
+
+        if index < 0:
+            index += self.n_samples
+        if index < 0 or index >= self.n_samples:
+            raise IndexError('Sample index out of range.')
+        batch_index, offset = divmod(index, self.batch_size)
+        return self.get_batch(batch_index)[offset]
+
+    def check_existing_runs(self, saver: BaseSaver):
+        """ We save a pointer to the savers exists and exists_many methods to check if there are existing runs.
+
+        Existing runs are counted for a batch of configurations at a time.
+
+        If there are n existing runs:
+            n < runs -> run the remaining runs
+            n >= runs -> skip all runs
+
+        Args:
+            - saver (BaseSaver): Saver used to check if there are existing runs.
+
+        """
+
+        if self.runs != 0:
+            self.saver_exists = saver.exists
+            self.saver_exists_many = saver.exists_many
+            self._batch_existing_runs = None
+        else:
+            raise ValueError("Won't check for existing runs if runs = 0, Set runs > 0.")
+
+    def get_existing_runs(self, index: int) -> int:
+        """ Returns the number of existing runs of the configuration at the given index, 0 if check_existing_runs hasn't been called. """
+
+        if self.saver_exists_many is None:
+            return 0
+        # Makes sure the batch of the configuration is the one we have
+        self[index]
+        if self._batch_existing_runs is None:
+            self._batch_existing_runs = self.saver_exists_many(self._batch[:min(self.batch_size, self.n_samples - self._batch_index * self.batch_size)])
+        return self._batch_existing_runs[index % self.batch_size]
+
+    def next_tune(self) -> dict:
+        """ Returns the next configuration to try.
+
+        Will skip existing runs if check_existing_runs has been called.
+        Will raise an error once all n_samples configurations have been tried.
+        To iterate through all configurations, use a for loop like so:
+            for config in searcher: ...
+
+        Returns:
+            - next_config (dict): The next configuration to try.
+
+        """
+
+        runs = max(self.runs, 1)
+        if (self.sample_index is not None) and (self.run_index < runs - 1):
+            self.run_index += 1
+            return self[self.sample_index]
+        index = 0 if self.sample_index is None else self.sample_index + 1
+        while (index < self.n_samples) and (self.get_existing_runs(index) >= runs):
+            index += 1
+        self.sample_index = index
+        if index >= self.n_samples:
+            raise IndexError('Reached end of samples, no more configurations to try.')
+        self.run_index = self.get_existing_runs(index)
+        return self[index]
+
+    def shard(self, index: int, count: int):
+        """ Iterates through the configurations of one of count shards of the samples.
+
+        Works in the same way as SearcherGrid.shard, shard index gets every count'th configuration starting at configuration index.
+
+        Args:
+            - index (int): Index of the shard, between 0 and count - 1.
+            - count (int): Total number of shards.
+
+        Yields:
+            - config (dict): The next configuration of the shard, repeated once for each run we want of it.
+
+        """
+
+        if count < 1 or index < 0 or index >= count:
+            raise ValueError(f"Shard index must be between 0 and count - 1, got index={index} and count={count}.")
+        return self.iter_indices(range(index, self.n_samples, count))
+
+    def slice(self, start: int, stop: int = None):
+        """ Iterates through the configurations between two indices, eg. to resume a search from a given index.
+
+        Args:
+            - start (int): Index of the first configuration.
+            - stop (int, optional): Index after the last configuration, default is None (n_samples).
+
+        Yields:
+            - config (dict): The next configuration of the slice, repeated once for each run we want of it.
+
+        """
+
+        return self.iter_indices(range(self.n_samples)[start:stop])
+
+    def iter_indices(self, indices: range):
+        """ Iterates through the configurations at the given indices, skipping existing runs if check_existing_runs has been called.
+
+        Args:
+            - indices (range): Indices of the configurations.
+
+        Yields:
+            - config (dict): The next configuration, repeated once for each run we want of it.
+
+        """
+
+        runs = max(self.runs, 1)
+        for i in indices:
+            config = self[i]
+            for _ in range(runs - self.get_existing_runs(i)):
+                yield config
+
+class SearcherQuasiRandom(SearcherRandom):
+    """ Searcher for quasi-random search.
+
+    Works in the same way as SearcherRandom, taking the same distributions for each parameter,
+    but configurations are created from a low discrepancy sequence rather than random points,
+    so they cover the search space more evenly, which matters when there are only a few configurations per parameter.
+
+    The method can be:
+        - 'sobol': The Sobol sequence, with a random digital shift given by the seed. Supports up to 21 parameters.
+            Best when n_samples is a power of 2, then each parameter's range is split into n_samples intervals with exactly one sample in each.
+        - 'halton': The Halton sequence, with a random shift given by the seed. Supports any number of parameters,
+            but the samples of parameters late in the dictionary become correlated when there are many (eg. more than 10) of them.
+        - 'lhs': Latin hypercube sampling, each parameter's range is split into n_samples intervals with exactly one sample in each,
+            the intervals of different parameters being paired at random. Unlike the others this depends on n_samples,
+            so the search can't be extended, and we store all n_samples points.
+
+    Like SearcherRandom, the configuration at any index is always the same for a given seed and method.
+
+    Attributes:
+        - method (str): Low discrepancy sequence used, one of METHODS.
+
+    """
+
+    METHODS = ['sobol', 'halton', 'lhs']
+
+    def __init__(self, configs: dict, n_samples: int, method: str = 'sobol', runs: int = 0, seed: Optional[int] = None, batch_size: int = 1024):
+        """ Initialises the searcher.
+
+        Args:
+            - configs (dict): Distribution of each parameter, see SearcherRandom for the structure of the dictionary.
+            - n_samples (int): Number of configurations to sample.
+            - method (str, optional): Low discrepancy sequence used, one of 'sobol', 'halton' or 'lhs', default is 'sobol'.
+            - runs (int, optional): Controls search based on number of runs we want for each config, see SearcherRandom.
+            - seed (int, optional): Seed used to randomise the sequence, default is None (pick one at random).
+            - batch_size (int, optional): Number of configurations created at once, default is 1024.
+
+        """
+
+        if method not in self.METHODS:
+            raise ValueError(f"method must be one of {self.METHODS}, got '{method}'")
+        super().__init__(configs, n_samples, runs=runs, seed=seed, batch_size=batch_size)
+        self.method = method
+        dims = len(self.names)
+        rng = np.random.default_rng(self.seed)
+        if method == 'sobol':
+            get_sobol_directions(dims)
+            self._shift = rng.integers(0, 1 << SOBOL_BITS, size=dims, dtype=np.int64)
+        elif method == 'halton':
+            self._shift = rng.random(dims)
+        else:
+            permutations = np.stack([rng.permutation(n_samples) for _ in range(dims)], axis=1) if dims > 0 else np.zeros((n_samples, 0))
+            self._lhs_points = (permutations + rng.random((n_samples, dims))) / n_samples
+
+    def sample_unit(self, batch_index: int) -> np.ndarray:
+        """ Returns the points in the unit hypercube used to create a batch of configurations.
+
+        Args:
+            - batch_index (int): Index of the batch.
+
+        Returns:
+            - points (np.ndarray): Array of shape (batch_size, number of parameters) with values in [0, 1).
+
+        """
+
+        dims = len(self.names)
+        indices = np.arange(batch_index * self.batch_size, (batch_index + 1) * self.batch_size)
+        if self.method == 'sobol':
+            return sobol_points(indices, dims, shift=self._shift)
+        if self.method == 'halton':
+            # Skip the first point of the sequence, which is the origin
+            return (halton_points(indices + 1, dims) + self._shift) % 1.0
+        # Latin hypercube, points past n_samples are never used
+        return self._lhs_points[indices[indices < self.n_samples]]
@@ -0,0 +1,377 @@
+from typing import Optional, Tuple
+import math
+import time
+import numpy as np
+import pandas as pd
+from slune.base import BaseSearcher, BaseSaver
+from slune.utils import dict_to_strings, strings_to_dict
+from .sampling import SearcherRandom
+
+_erf = np.vectorize(math.erf, otypes=[float])
+
+def fit_parzen(points: np.ndarray, prior_weight: float = 1.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ Fits a Parzen estimator (a mixture of Gaussians truncated to [0, 1]) to points in [0, 1].
+
+    There is a Gaussian centred on each point, with standard deviation the larger of the distances to its neighbours
+    (counting 0 and 1 as neighbours), clipped between 1 / min(100, n + 1) and 1, as in Bergstra et al. (2011).
+    A wide Gaussian (mean 0.5, standard deviation 1) is added with weight prior_weight, so the estimator is never too sure of itself.
+
+    Args:
+        - points (np.ndarray): Points the estimator is fitted to, of shape (n,).
+        - prior_weight (float, optional): Weight of the prior relative to each point, default is 1.
+
+    Returns:
+        - mus (np.ndarray): Mean of each Gaussian.
+        - sigmas (np.ndarray): Standard deviation of each Gaussian.
+        - weights (np.ndarray): Weight of each Gaussian, summing to 1.
+
+    """
+
+    mus = np.append(np.sort(points), 0.5)
+    sigmas = np.ones(len(mus))
+    n = len(points)
+    if n > 0:
+        edges = np.concatenate([[0.0], mus[:-1], [1.0]])
+        sigmas[:-1] = np.clip(np.maximum(edges[1:-1] - edges[:-2], edges[2:] - edges[1:-1]), 1 / min(100, n + 1), 1.0)
+    weights = np.append(np.ones(n), prior_weight)
+    return mus, sigmas, weights / weights.sum()
+
+def parzen_log_pdf(x: np.ndarray, mus: np.ndarray, sigmas: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """ Returns the log density of a Parzen estimator (see fit_parzen) at each of the points x, of shape (m,). """
+
+    z = (x[:, None] - mus[None, :]) / sigmas[None, :]
+    # Mass of each Gaussian inside [0, 1], to normalise the truncated Gaussians
+    mass = 0.5 * (_erf((1 - mus) / (sigmas * math.sqrt(2))) - _erf(-mus / (sigmas * math.sqrt(2))))
+    log_pdf = -0.5 * z ** 2 - np.log(sigmas * math.sqrt(2 * math.pi) * mass) + np.log(weights)
+    top = log_pdf.max(axis=1)
+    return top + np.log(np.exp(log_pdf - top[:, None]).sum(axis=1))
+
+def sample_parzen(rng: np.random.Generator, n: int, mus: np.ndarray, sigmas: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """ Draws n points in [0, 1] from a Parzen estimator (see fit_parzen). """
+
+    components = rng.choice(len(mus), size=n, p=weights)
+    x = rng.normal(mus[components], sigmas[components])
+    # Draw again the points that fell outside [0, 1], which rarely takes more than a few rounds
+    for _ in range(100):
+        outside = (x < 0) | (x > 1)
+        if not outside.any():
+            break
+        x[outside] = rng.normal(mus[components[outside]], sigmas[components[outside]])
+    return np.clip(x, 0.0, 1.0)
+
+class SearcherTPE(BaseSearcher):
+    """ Searcher using a tree-structured Parzen estimator (TPE) to pick configurations from the results saved so far.
+
+    The first n_startup configurations are sampled at random (with SearcherRandom, so configs is given in the same way).
+    After that, every time we need new configurations, we read the results of every run saved so far,
+    split the configurations tried into the best gamma fraction ('good') and the rest ('bad'),
+    and fit a density to each, one parameter at a time (a Parzen estimator for numeric parameters, smoothed frequencies for categorical ones).
+    We then draw n_candidates configurations from the density of the good configurations
+    and pick the one for which the ratio of the good density to the bad density is highest.
+    Configurations returned that haven't saved results yet are counted as bad, so that jobs running at the same time try different configurations.
+    Only NumPy (and pandas to read the results) is used, so fitting takes a few milliseconds on a CPU.
+
+    Results are read using saver.load_all, which reads every run in a single walk of the root directory,
+    so runs saved by earlier searches over the same parameters are used as well, as long as their values are inside the distributions given.
+    The value of the metric for a run is selected by select_by (eg. 'last' for the value at the end of the run), and averaged over runs of the same configuration.
+    Savers without a load_all method are instead asked for the result of each configuration returned, using saver.read.
+
+    As with SearcherASHA, we can only learn from jobs that have finished, so jobs should be started as they are returned,
+    eg. with sbatchit(..., executor=ExecutorLocal(n_workers=k)) and max_pending=k,
+    in which case next_tune waits (checking for new results every poll_interval seconds) while max_pending jobs haven't finished.
+    Without max_pending, next_tune never waits and uses whatever results have been saved when it is called.
+    The search ends once n_trials configurations have been returned.
+
+    Attributes:
+        - configs (dict): Distribution of each parameter, see SearcherRandom.
+        - metric_name (str): Name of the metric to optimise.
+        - saver (BaseSaver): Saver used to read the results of each job.
+        - sampler (SearcherRandom): Used to sample the startup configurations and to turn points in [0, 1) into configurations.
+        - observations (pd.DataFrame): Configurations with results, with a column per parameter and a column with the value of the metric.
+        - pending (list of dict): Configurations returned that haven't saved results yet.
+
+    """
+
+    def __init__(self, configs: dict, metric_name: str, saver: Optional[BaseSaver] = None, n_trials: int = 100,
+                 n_startup: int = 10, batch_size: int = 1, gamma: float = 0.25, n_candidates: int = 64, prior_weight: float = 1.0,
+                 mode: str = 'min', select_by: str = 'last', seed: Optional[int] = None, max_pending: Optional[int] = None,
+                 poll_interval: float = 10.0, timeout: Optional[float] = None):
+        """ Initialises the searcher.
+
+        Args:
+            - configs (dict): Distribution of each parameter, see SearcherRandom for the structure of the dictionary.
+            - metric_name (str): Name of the metric to optimise.
+            - saver (BaseSaver, optional): Saver used to read the results of each job, can instead be given with check_existing_runs.
+            - n_trials (int, optional): Number of configurations to return, default is 100.
+            - n_startup (int, optional): Number of results needed before using the model, configurations are sampled at random until then, default is 10.
+            - batch_size (int, optional): Number of configurations picked each time results are read, default is 1.
+            - gamma (float, optional): Fraction of the configurations counted as good, default is 0.25.
+            - n_candidates (int, optional): Number of configurations drawn from the good density to pick each configuration from, default is 64.
+            - prior_weight (float, optional): Weight of the prior in each density, relative to a single configuration, default is 1.
+            - mode (str, optional): Whether lower ('min') or higher ('max') values of the metric are better, default is 'min'.
+            - select_by (str, optional): How to select the value of the metric from the results of a run,
+                one of ['min', 'max', 'last', 'first', 'mean', 'median'], default is 'last'.
+            - seed (int, optional): Seed used to sample configurations, default is None (pick one at random).
+            - max_pending (int, optional): Maximum number of jobs running at the same time, default is None (no limit).
+            - poll_interval (float, optional): Number of seconds to wait between checking for new results, default is 10.
+            - timeout (float, optional): Number of seconds to wait for new results before giving up and ending the search,
+                default is None (wait for ever).
+
+        """
+
+        super().__init__()
+        if mode not in ['min', 'max']:
+            raise ValueError(f"mode must be 'min' or 'max', got '{mode}'")
+        if select_by not in ['min', 'max', 'last', 'first', 'mean', 'median']:
+            raise ValueError(f"select_by must be one of ['min', 'max', 'last', 'first', 'mean', 'median'], got {select_by}")
+        if not 0 < gamma <= 1:
+            raise ValueError(f"gamma must be in (0, 1], got {gamma}")
+        self.configs = configs
+        self.metric_name = metric_name
+        self.saver = saver
+        self.n_trials = n_trials
+        self.n_startup = n_startup
+        self.batch_size = batch_size
+        self.gamma = gamma
+        self.n_candidates = n_candidates
+        self.prior_weight = prior_weight
+        self.mode = mode
+        self.select_by = select_by
+        self.max_pending = max_pending
+        self.waits_for_results = max_pending is not None
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.sampler = SearcherRandom(configs, max(n_trials, 1), seed=seed)
+        self.names = self.sampler.names
+        self.distributions = self.sampler.distributions
+        self.rng = np.random.default_rng([self.sampler.seed, 1])
+        self.observations = pd.DataFrame(columns=self.names + [metric_name])
+        self.pending = []
+        self.proposed = []
+        self.n_returned = 0
+
+    def __len__(self):
+        """ Returns the number of configurations the search returns.
+
+        Returns:
+            - num_configs (int): Number of configurations to try.
+
+        """
+
+        return self.n_trials
+
+    def check_existing_runs(self, saver: BaseSaver):
+        """ Sets the saver used to read the results of each job, results already saved are always used.
+
+        Args:
+            - saver (BaseSaver): Saver used to read the results of each job.
+
+        """
+
+        self.saver = saver
+
+    def match_choices(self, values: pd.DataFrame) -> pd.DataFrame:
+        """ Maps the values of categorical parameters read from the saver back to the values given in configs.
+
+        Parameters are read back from the names of directories, so eg. True comes back as 'True' and '0.1' as 0.1.
+        We convert each value given in configs in the same way (with dict_to_strings then strings_to_dict) to find which one was read.
+
+        Args:
+            - values (pd.DataFrame): Configurations read from the saver, with a column per parameter.
+
+        Returns:
+            - values (pd.DataFrame): Copy of the data frame with the values of categorical parameters as given in configs,
+                values that don't match any are replaced by None.
+
+        """
+
+        values = values.copy()
+        for name, distribution in zip(self.names, self.distributions):
+            if distribution[0] != 'categorical':
+                continue
+            choices = {}
+            for choice in distribution[1]:
+                choices.setdefault(strings_to_dict(dict_to_strings({name: choice}))[name], choice)
+            values[name] = values[name].map(lambda v: choices.get(v) if pd.notna(v) else None).astype(object)
+        return values
+
+    def in_space(self, values: pd.DataFrame) -> np.ndarray:
+        """ Returns which rows of a data frame, with a column per parameter, are inside the distributions given. """
+
+        keep = np.ones(len(values), dtype=bool)
+        for name, distribution in zip(self.names, self.distributions):
+            column = values[name]
+            if distribution[0] == 'categorical':
+                keep &= column.isin(distribution[1]).to_numpy()
+            else:
+                numbers = pd.to_numeric(column, errors='coerce').to_numpy(dtype=float)
+                with np.errstate(invalid='ignore'):
+                    keep &= (numbers >= distribution[1]) & (numbers <= distribution[2])
+        return keep
+
+    def load_results(self) -> pd.DataFrame:
+        """ Reads the results saved so far, using a single call to saver.load_all if the saver has one.
+
+        Returns:
+            - observations (pd.DataFrame): Configurations with results, with a column per parameter and a column with the value of the metric.
+
+        """
+
+        if self.saver is None:
+            raise ValueError("SearcherTPE needs a saver to read results from, give one when creating it or with check_existing_runs.")
+        columns = self.names + [self.metric_name]
+        if not hasattr(self.saver, 'load_all'):
+            rows = []
+            for config in self.proposed:
+                _, values = self.saver.read(config, self.metric_name, select_by=self.select_by)
+                values = [v for v in (values or []) if (v is not None) and not (isinstance(v, float) and math.isnan(v))]
+                if values != []:
+                    rows.append(dict(config, **{self.metric_name: sum(values) / len(values)}))
+            return pd.DataFrame(rows, columns=columns)
+        df = self.saver.load_all(metrics=[self.metric_name])
+        if any(c not in df.columns for c in columns) or df.empty:
+            return pd.DataFrame(columns=columns)
+        df = df[df[self.metric_name].notna()]
+        df = self.match_choices(df)
+        df = df[self.in_space(df)]
+        if df.empty:
+            return pd.DataFrame(columns=columns)
+        # Each run is identified by all of its parameters (eg. a different root or seed) and the number of its results file
+        run_keys = [c for c in df.columns if c not in ['step', self.metric_name]]
+        runs = df.sort_values('step').groupby(run_keys, dropna=False, sort=False)[self.metric_name].agg(self.select_by).reset_index()
+        return runs.groupby(self.names, sort=False)[self.metric_name].mean().reset_index()[columns]
+
+    def update(self):
+        """ Reads the results saved so far, and removes configurations with results from the pending ones. """
+
+        self.observations = self.load_results()
+        done = set(tuple(row) for row in self.observations[self.names].itertuples(index=False))
+        self.pending = [config for config in self.pending if tuple(config[name] for name in self.names) not in done]
+
+    def to_unit(self, values: pd.DataFrame) -> np.ndarray:
+        """ Maps configurations to points in [0, 1], the inverse of SearcherRandom.from_unit.
+
+        Categorical parameters are mapped to the index of their value rather than a point in [0, 1].
+
+        Args:
+            - values (pd.DataFrame): Configurations, with a column per parameter.
+
+        Returns:
+            - points (np.ndarray): Array of shape (number of configurations, number of parameters).
+
+        """
+
+        points = np.zeros((len(values), len(self.names)))
+        for j, (name, distribution) in enumerate(zip(self.names, self.distributions)):
+            column = values[name]
+            if distribution[0] == 'categorical':
+                points[:, j] = [distribution[1].index(v) for v in column]
+                continue
+            kind, low, high = distribution
+            x = column.to_numpy(dtype=float)
+            if kind == 'uniform':
+                u = (x - low) / (high - low) if high > low else np.full(len(x), 0.5)
+            elif kind == 'loguniform':
+                u = (np.log(x) - np.log(low)) / (np.log(high) - np.log(low)) if high > low else np.full(len(x), 0.5)
+            else:
+                u = (x - low + 0.5) / (high - low + 1)
+            points[:, j] = np.clip(u, 0.0, 1.0)
+        return points
+
+    def propose(self) -> dict:
+        """ Picks the next configuration using the results in observations, see the class description.
+
+        Returns:
+            - config (dict): The configuration picked.
+
+        """
+
+        values = self.observations[self.metric_name].to_numpy(dtype=float)
+        order = np.argsort(values if self.mode == 'min' else -values, kind='stable')
+        n_good = max(1, int(math.ceil(self.gamma * len(values))))
+        points = self.to_unit(self.observations)
+        good = points[order[:n_good]]
+        bad = points[order[n_good:]]
+        if self.pending != []:
+            bad = np.concatenate([bad, self.to_unit(pd.DataFrame(self.pending, columns=self.names))])
+        candidates = np.zeros((self.n_candidates, len(self.names)))
+        scores = np.zeros(self.n_candidates)
+        for j, distribution in enumerate(self.distributions):
+            if distribution[0] == 'categorical':
+                n_values = len(distribution[1])
+                p_good = np.bincount(good[:, j].astype(np.int64), minlength=n_values) + self.prior_weight / n_values
+                p_bad = np.bincount(bad[:, j].astype(np.int64), minlength=n_values) + self.prior_weight / n_values
+                p_good, p_bad = p_good / p_good.sum(), p_bad / p_bad.sum()
+                indices = self.rng.choice(n_values, size=self.n_candidates, p=p_good)
+                scores += np.log(p_good[indices]) - np.log(p_bad[indices])
+                # Middle of the interval of the value, as from_unit expects
+                candidates[:, j] = (indices + 0.5) / n_values
+                continue
+            l = fit_parzen(good[:, j], self.prior_weight)
+            g = fit_parzen(bad[:, j], self.prior_weight)
+            x = sample_parzen(self.rng, self.n_candidates, *l)
+            scores += parzen_log_pdf(x, *l) - parzen_log_pdf(x, *g)
+            candidates[:, j] = x
+        # from_unit expects points in [0, 1)
+        best = np.minimum(candidates[[np.argmax(scores)]], np.nextafter(1.0, 0.0))
+        return self.sampler.from_unit(best)[0]
+
+    def get_config(self) -> Optional[dict]:
+        """ Returns the next configuration to try, without waiting, None if max_pending jobs haven't finished. """
+
+        if (self.max_pending is not None) and (len(self.pending) >= self.max_pending):
+            return None
+        if len(self.observations) < self.n_startup:
+            config = self.sampler[self.n_returned]
+        else:
+            config = self.propose()
+        self.pending.append(config)
+        self.proposed.append(config)
+        self.n_returned += 1
+        return config
+
+    def next_tune(self) -> dict:
+        """ Returns the next configuration to try.
+
+        Results are read every batch_size configurations, waiting for jobs to finish if max_pending jobs are running.
+        Will raise an error once n_trials configurations have been returned.
+        To iterate through all configurations, use a for loop like so:
+            for config in searcher: ...
+
+        Returns:
+            - next_config (dict): The next configuration to try.
+
+        """
+
+        if self.n_returned >= self.n_trials:
+            raise IndexError('Reached the number of trials, no more configurations to try.')
+        if self.n_returned % self.batch_size == 0:
+            self.update()
+        start = time.monotonic()
+        while True:
+            config = self.get_config()
+            if config is not None:
+                return config
+            if (self.timeout is not None) and (time.monotonic() - start > self.timeout):
+                raise IndexError(f'Waited {self.timeout} seconds for jobs to finish, ending the search.')
+            time.sleep(self.poll_interval)
+            self.update()
+
+    def get_best(self) -> Tuple[Optional[dict], Optional[float]]:
+        """ Returns the best configuration found so far.
+
+        Returns:
+            - best_config (dict): Best configuration, None if there are no results yet.
+            - best_value (float): Value of the metric for the best configuration, None if there are no results yet.
+
+        """
+
+        self.update()
+        if self.observations.empty:
+            return None, None
+        values = self.observations[self.metric_name].astype(float)
+        best = values.idxmin() if self.mode == 'min' else values.idxmax()
+        row = self.observations.loc[best]
+        # Data frames hold numpy scalars, which are written differently in paths and on the command line
+        config = {name: row[name].item() if isinstance(row[name], np.generic) else row[name] for name in self.names}
+        return config, float(row[self.metric_name])
@@ -1,10 +1,15 @@
-from typing import List, Optional, Tuple
-from slune.base import BaseSearcher, BaseSaver
+from typing import Callable, List, Optional, Tuple
+from slune.base import BaseSearcher, BaseSaver, BaseExecutor
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import json
+import os
+import re
 import subprocess
 import sys
+import time
 from slune.savers.csv import SaverCsv
 from slune.loggers.default import LoggerDefault
-from slune.utils import dict_to_strings
+from slune.utils import dict_to_strings, get_cpu_count
 
 def submit_job(sh_path: str, script_path:str = None , args: dict = {}):
     """ Submits a job using specified Bash script.
@@ -29,7 +34,246 @@ def submit_job(sh_path: str, script_path:str = None , args: dict = {}):
     except subprocess.CalledProcessError as e:
         print(f"Error running sbatch: {e}")
 
-def sbatchit(script_path: str, sbatch_path: str, searcher: BaseSearcher, cargs: Optional[dict]={}, saver: Optional[BaseSaver]=None):
+TRANSIENT_SBATCH_ERRORS = ['socket timed out', 'unable to contact slurm controller', 'resource temporarily unavailable',
+                           'connection refused', 'connection timed out', 'try again', 'slurm_persist_conn']
+
+def submit_job_retry(sh_path: str, script_path: str = None, args: dict = {}, retries: int = 3, backoff: float = 1.0) -> str:
+    """ Submits a job using specified Bash script, retrying if sbatch fails for a transient reason.
+
+    Unlike submit_job, failures are not only printed: if sbatch still fails after all the retries,
+    or fails for a reason that is not transient (see TRANSIENT_SBATCH_ERRORS), the error is raised.
+    We wait backoff * 2^attempt seconds before each retry.
+
+    Args:
+        - sh_path (string): Path to the Bash script to be run.
+        - script_path (string): Path to the script (of the model) to be run for each job, default is None.
+        - args (dict): Contains (key, value) pairs for all the arguments to be passed to the Bash script.
+        - retries (int, optional): Maximum number of times to retry the submission, default is 3.
+        - backoff (float, optional): Number of seconds to wait before the first retry, default is 1.0.
+
+    Returns:
+        - job_id (str): ID of the submitted job, as printed by sbatch.
+
+    """
+
+    args = dict_to_strings(args, ready_for_cl=True)
+    if script_path == None:
+        command = ['sbatch', sh_path] + args
+    else:
+        command = ['sbatch', sh_path, script_path] + args
+    attempt = 0
+    while True:
+        result = subprocess.run(command, capture_output=True, text=True)
+        if result.returncode == 0:
+            match = re.search(r'Submitted batch job (\d+)', result.stdout)
+            return match.group(1) if match else result.stdout.strip()
+        message = (result.stderr + result.stdout).lower()
+        if (attempt >= retries) or not any(error in message for error in TRANSIENT_SBATCH_ERRORS):
+            raise subprocess.CalledProcessError(result.returncode, command, output=result.stdout, stderr=result.stderr)
+        time.sleep(backoff * 2 ** attempt)
+        attempt += 1
+
+def write_manifest(args_list: List[List[str]], manifest_path: str):
+    """ Writes the arguments for each task of a job array to a manifest file.
+
+    The manifest is a json file containing a list with the list of arguments for each task.
+    It is written to a temporary file which is then renamed, so a job never sees a partially written manifest.
+
+    Args:
+        - args_list (list of list of str): Arguments for each task, in the form ['--argument_name=argument_value', ...].
+        - manifest_path (str): Path to the manifest file.
+
+    """
+
+    manifest_dir = os.path.dirname(manifest_path)
+    if manifest_dir != '':
+        os.makedirs(manifest_dir, exist_ok=True)
+    tmp_path = manifest_path + '.tmp.' + str(os.getpid())
+    with open(tmp_path, 'w') as f:
+        json.dump(args_list, f)
+    os.replace(tmp_path, manifest_path)
+
+def get_array_args(manifest_path: str, task_id: Optional[int] = None) -> List[str]:
+    """ Returns the arguments for a task of a job array from its manifest file.
+
+    Used by the job script of each task to find its arguments,
+    from the command line this can be done by running: python -m slune array-args <manifest_path>
+    which prints the arguments one per line, see templates/cpu_array_template.sh for an example.
+
+    Args:
+        - manifest_path (str): Path to the manifest file written by sbatchit.
+        - task_id (int, optional): Index of the task, default is None (use the SLURM_ARRAY_TASK_ID environment variable).
+
+    Returns:
+        - args (list of str): Arguments for the task, in the form ['--argument_name=argument_value', ...].
+
+    """
+
+    if task_id is None:
+        if 'SLURM_ARRAY_TASK_ID' not in os.environ:
+            raise ValueError('No task_id given and SLURM_ARRAY_TASK_ID is not set, are we running in a job array?')
+        task_id = int(os.environ['SLURM_ARRAY_TASK_ID'])
+    with open(manifest_path, 'r') as f:
+        args_list = json.load(f)
+    return args_list[task_id]
+
+def submit_array(sh_path: str, script_path: str, manifest_path: str, n_tasks: int, max_parallel: Optional[int] = None):
+    """ Submits a job array with a single call to sbatch.
+
+    The Bash script is given the script path and manifest path as its arguments,
+    each task can then find its own arguments using get_array_args.
+
+    Args:
+        - sh_path (string): Path to the Bash script to be run for each task.
+        - script_path (string): Path to the script (of the model) to be run by each task.
+        - manifest_path (string): Path to the manifest file containing the arguments for each task.
+        - n_tasks (int): Number of tasks in the job array.
+        - max_parallel (int, optional): Maximum number of tasks to run at the same time, default is None (no limit).
+
+    """
+
+    array = f'--array=0-{n_tasks - 1}'
+    if max_parallel is not None:
+        array += f'%{max_parallel}'
+    try:
+        subprocess.run(['sbatch', array, sh_path, script_path, manifest_path], check=True)
+    except subprocess.CalledProcessError as e:
+        print(f"Error running sbatch: {e}")
+
+def check_searcher_can_batch(searcher: BaseSearcher, mode: str):
+    """ Raises a ValueError if searcher waits for results, as it can't be used where every configuration is taken before any job is started.
+
+    Args:
+        - searcher (Searcher): Searcher object used to retrieve the configurations.
+        - mode (str): Name of the mode used, for the error message.
+
+    """
+
+    if getattr(searcher, 'waits_for_results', False) is True:
+        raise ValueError(f"{type(searcher).__name__} waits for the results of the configurations it returns, "
+                         f"so it can't be used with {mode}, which takes every configuration before starting any job. "
+                         "Use an executor (eg. ExecutorLocal) or submit jobs one at a time instead.")
+
+def submit_arrays(sh_path: str, script_path: str, entries: list, manifest_path: str, max_array_size: int = 1000,
+                  max_parallel: Optional[int] = None):
+    """ Writes the entries of a job array to manifest files and submits them, as several job arrays if there are too many.
+
+    Slurm rejects job arrays with more than MaxArraySize tasks, so the entries are split into chunks of max_array_size,
+    each written to its own manifest file ('<manifest>_0.json', '<manifest>_1.json', ...) and submitted as its own job array.
+    If everything fits in one job array the manifest is written to manifest_path.
+
+    Args:
+        - sh_path (string): Path to the Bash script to be run for each task.
+        - script_path (string): Path to the script (of the model) to be run by each task.
+        - entries (list): Entry of the manifest for each task, eg. the arguments of a configuration or of every configuration in a bundle.
+        - manifest_path (string): Path to the manifest file.
+        - max_array_size (int, optional): Maximum number of tasks in a job array, default is 1000.
+        - max_parallel (int, optional): Maximum number of tasks of each job array to run at the same time, default is None (no limit).
+
+    """
+
+    n_arrays = (len(entries) + max_array_size - 1) // max_array_size
+    for i in range(n_arrays):
+        chunk = entries[i * max_array_size:(i + 1) * max_array_size]
+        chunk_path = manifest_path if n_arrays == 1 else f'{os.path.splitext(manifest_path)[0]}_{i}.json'
+        write_manifest(chunk, chunk_path)
+        submit_array(sh_path, script_path, chunk_path, len(chunk), max_parallel=max_parallel)
+
+def pack_configs(args_list: List, pack: Optional[int] = None, time_budget: Optional[float] = None,
+                 estimate_runtime: Optional[Callable[[dict], float]] = None) -> List[List]:
+    """ Groups configurations into bundles, each of which is run by a single job.
+
+    If time_budget is given, configurations are packed so the estimated runtime of each bundle fits in the budget,
+    using the first fit decreasing heuristic: configurations are taken from the longest to the shortest estimated runtime,
+    and each is put in the first bundle with room for it. A configuration estimated to take longer than the budget gets a bundle of its own.
+    Otherwise, consecutive configurations are grouped into bundles of pack configurations.
+
+    Args:
+        - args_list (list): Configurations to group, each a dict of (key, value) pairs.
+        - pack (int, optional): Maximum number of configurations in each bundle, default is None (no limit if time_budget is given).
+        - time_budget (float, optional): Time available to each job, in the same units as estimate_runtime, default is None.
+        - estimate_runtime (function, optional): Called with each configuration to estimate its runtime, required if time_budget is given.
+
+    Returns:
+        - bundles (list of list): Configurations in each bundle.
+
+    """
+
+    if time_budget is None:
+        if pack is None or pack < 1:
+            raise ValueError("pack must be at least 1 if no time_budget is given")
+        return [args_list[i:i + pack] for i in range(0, len(args_list), pack)]
+    if estimate_runtime is None:
+        raise ValueError("estimate_runtime must be given to pack configurations by time_budget")
+    runtimes = [estimate_runtime(args) for args in args_list]
+    bundles, loads = [], []
+    for i in sorted(range(len(args_list)), key=lambda i: -runtimes[i]):
+        for b in range(len(bundles)):
+            if (loads[b] + runtimes[i] <= time_budget) and ((pack is None) or (len(bundles[b]) < pack)):
+                bundles[b].append(i)
+                loads[b] += runtimes[i]
+                break
+        else:
+            bundles.append([i])
+            loads.append(runtimes[i])
+    # Keep the order given by the searcher within each bundle
+    return [[args_list[i] for i in sorted(bundle)] for bundle in bundles]
+
+def submit_bundle(sh_path: str, script_path: str, manifest_path: str, bundle_id: int):
+    """ Submits a job running a bundle of configurations.
+
+    The Bash script is given the script path, manifest path and bundle index as its arguments,
+    and should run the bundle with run_bundle (or python -m slune run-bundle), see templates/cpu_bundle_template.sh for an example.
+
+    Args:
+        - sh_path (string): Path to the Bash script to be run.
+        - script_path (string): Path to the script (of the model) to be run for each configuration.
+        - manifest_path (string): Path to the manifest file containing the arguments of each configuration in each bundle.
+        - bundle_id (int): Index of the bundle in the manifest.
+
+    """
+
+    try:
+        subprocess.run(['sbatch', sh_path, script_path, manifest_path, str(bundle_id)], check=True)
+    except subprocess.CalledProcessError as e:
+        print(f"Error running sbatch: {e}")
+
+def run_bundle(script_path: str, manifest_path: str, bundle_id: Optional[int] = None, n_workers: int = 1, python: str = sys.executable) -> List[int]:
+    """ Runs the script for each configuration of a bundle, from inside the job the bundle was submitted as.
+
+    Configurations are run one after the other, or up to n_workers at the same time to use all the cores of the job.
+    Each configuration is run as its own process with its arguments on the command line, just as if it had its own job,
+    so the script saves its results (eg. with SaverCsv) exactly as it would otherwise.
+    From the command line this can be done by running: python -m slune run-bundle <script_path> <manifest_path> [--bundle-id <bundle_id>]
+
+    Args:
+        - script_path (str): Path to the script (of the model) to be run for each configuration.
+        - manifest_path (str): Path to the manifest file written by sbatchit.
+        - bundle_id (int, optional): Index of the bundle, default is None (use the SLURM_ARRAY_TASK_ID environment variable).
+        - n_workers (int, optional): Number of configurations to run at the same time, default is 1.
+        - python (str, optional): Path to the python executable used to run python scripts, default is the one running slune.
+
+    Returns:
+        - returncodes (list of int): Return code of the run of each configuration, in the order of the bundle.
+
+    """
+
+    bundle = get_array_args(manifest_path, bundle_id)
+    def run(args):
+        command = ([python, script_path] if script_path.endswith('.py') else [script_path]) + args
+        print(f"Running: {' '.join(command)}", flush=True)
+        returncode = subprocess.run(command).returncode
+        if returncode != 0:
+            print(f"Run failed with return code {returncode}: {' '.join(args)}", flush=True)
+        return returncode
+    with ThreadPoolExecutor(max_workers=max(n_workers, 1)) as pool:
+        return list(pool.map(run, bundle))
+
+def sbatchit(script_path: str, sbatch_path: str, searcher: BaseSearcher, cargs: Optional[dict]={}, saver: Optional[BaseSaver]=None,
+             array: bool = False, max_parallel: Optional[int] = None, manifest_path: Optional[str] = None, max_array_size: int = 1000,
+             max_concurrency: Optional[int] = None, retries: int = 3, backoff: float = 1.0,
+             executor: Optional[BaseExecutor] = None, pack: Optional[int] = None, time_budget: Optional[float] = None,
+             estimate_runtime: Optional[Callable[[dict], float]] = None) -> dict:
     """ Submits jobs based on arguments given by searcher.
 
     For each job runs the script stored at script_path with selected parameter values given by searcher
@@ -37,6 +281,32 @@ def sbatchit(script_path: str, sbatch_path: str, searcher: BaseSearcher, cargs:
 
     Uses the sbatch script with path sbatch_path to submit each job to the cluster. 
 
+    Calling sbatch once per job can be slow and put a lot of load on the Slurm controller for large searches.
+    If array is True, we instead write the arguments of every job to a manifest file
+    and submit them all as a single Slurm job array with one call to sbatch.
+    The sbatch script is then given the script path and the manifest path as its arguments,
+    and should use get_array_args (or python -m slune array-args) to find the arguments of its task,
+    see templates/cpu_array_template.sh for an example.
+
+    Short runs can spend more time waiting in the queue and starting up than running.
+    If pack or time_budget is given, we instead group the configurations into bundles (see pack_configs),
+    write the arguments of every configuration in each bundle to a manifest file and submit one job per bundle
+    (or job arrays with a task per bundle if array is True, split by max_array_size in the same way).
+    Each job then runs the configurations of its bundle with run_bundle (or python -m slune run-bundle),
+    one after the other or several at the same time on the cores of the job, see templates/cpu_bundle_template.sh for an example.
+    Each configuration is still run by its own process with its own arguments, so results are saved just as they are without packing.
+
+    If max_concurrency is given, we instead submit up to max_concurrency jobs at the same time using a pool of threads,
+    retrying submissions that fail for a transient reason (eg. 'Socket timed out') with exponential backoff.
+
+    If given an Executor object, we use it to run each job instead of sbatch (eg. ExecutorLocal to run jobs on this machine),
+    and wait for all the jobs to finish. In this case sbatch_path is not used, and can be None.
+
+    Only one of executor, array, pack (or time_budget) and max_concurrency can be given, except for array with pack (or time_budget),
+    otherwise a ValueError is raised.
+    As array, pack and max_concurrency take every configuration from the searcher before submitting any job,
+    they can't be used with searchers that wait for results (see BaseSearcher.waits_for_results), which raise a ValueError.
+
     If given a Saver object, uses it to check if there are existing runs for each job and skips them,
     based on the number of runs we would like for each job (which is stored in the saver).
 
@@ -53,15 +323,109 @@ def sbatchit(script_path: str, sbatch_path: str, searcher: BaseSearcher, cargs:
         - saver (Saver, optional): Saver object used if we want to check if there are existing runs so we don't rerun.
             Can simply not give a Saver object if you want to rerun all jobs.
 
+        - array (bool, optional): Whether to submit all jobs as a single job array, default is False.
+
+        - max_parallel (int, optional): Maximum number of tasks of the job array to run at the same time, default is None (no limit).
+
+        - manifest_path (str, optional): Path to write the manifest file of the job array to,
+            default is None (a new file in the 'slune_manifests' directory).
+
+        - max_array_size (int, optional): Maximum number of tasks in a job array, default is 1000.
+            Larger searches are split into several job arrays, each with its own manifest file.
+            Should not be more than the MaxArraySize of your Slurm cluster.
+
+        - max_concurrency (int, optional): Maximum number of jobs to submit at the same time, default is None (submit one at a time).
+
+        - retries (int, optional): Maximum number of times to retry a failed submission when max_concurrency is given, default is 3.
+
+        - backoff (float, optional): Number of seconds to wait before the first retry when max_concurrency is given, default is 1.0.
+
+        - executor (Executor, optional): Executor object used to run each job, default is None (submit each job with sbatch).
+
+        - pack (int, optional): Maximum number of configurations run by each job, default is None (one configuration per job).
+
+        - time_budget (float, optional): Time available to each job (eg. in minutes, matching the --time of the sbatch script),
+            default is None. If given, configurations are packed so their estimated runtimes fit in the budget.
+
+        - estimate_runtime (function, optional): Called with each configuration to estimate its runtime,
+            in the same units as time_budget, required if time_budget is given.
+
+    Returns:
+        - summary (dict): Summary of the submission, whichever way jobs were submitted, contains:
+            'n_configs': number of configurations submitted,
+            'job_ids': list of the IDs of the submitted jobs, only filled in if max_concurrency is given,
+            'failures': list of (args, error message) tuples for the jobs we failed to submit, only filled in if max_concurrency is given,
+            'results': list of the results given by executor.wait(), only filled in if executor is given,
+            'wall_time': number of seconds taken to submit (or with an executor, run) all the jobs.
+
     """
 
+    modes = [name for name, given in [('executor', executor is not None), ('array', array),
+                                      ('pack/time_budget', (pack is not None) or (time_budget is not None)),
+                                      ('max_concurrency', max_concurrency is not None)] if given]
+    # Only packing can be combined with job arrays, each task then runs a bundle
+    if (len(modes) > 1) and (modes != ['array', 'pack/time_budget']):
+        raise ValueError(f"sbatchit can't combine {' and '.join(modes)}, please only give one of them.")
+    if (max_parallel is not None) and not array:
+        raise ValueError("max_parallel only applies to job arrays, please also set array=True.")
+    if (executor is None) and (modes != []):
+        check_searcher_can_batch(searcher, ' and '.join(modes))
     if saver != None:
         searcher.check_existing_runs(saver)
-    # Create sbatch script for each job
-    for args in searcher:
-        # Submit job
-        d = dict(cargs, **args)
-        submit_job(sbatch_path, script_path, d)
+    start = time.perf_counter()
+    summary = {'n_configs': 0, 'job_ids': [], 'failures': [], 'results': [], 'wall_time': None}
+    if executor is not None:
+        for args in searcher:
+            executor.submit(script_path, dict(cargs, **args))
+            summary['n_configs'] += 1
+        summary['results'] = executor.wait()
+    elif (pack is not None) or (time_budget is not None):
+        configs = [dict(cargs, **args) for args in searcher]
+        summary['n_configs'] = len(configs)
+        bundles = pack_configs(configs, pack=pack, time_budget=time_budget, estimate_runtime=estimate_runtime)
+        if bundles != []:
+            if manifest_path is None:
+                manifest_path = os.path.join('slune_manifests', f'{time.strftime("%Y%m%d-%H%M%S")}_{os.getpid()}.json')
+            entries = [[dict_to_strings(config, ready_for_cl=True) for config in bundle] for bundle in bundles]
+            if array:
+                submit_arrays(sbatch_path, script_path, entries, manifest_path, max_array_size=max_array_size, max_parallel=max_parallel)
+            else:
+                write_manifest(entries, manifest_path)
+                for bundle_id in range(len(bundles)):
+                    submit_bundle(sbatch_path, script_path, manifest_path, bundle_id)
+    elif array:
+        args_list = [dict_to_strings(dict(cargs, **args), ready_for_cl=True) for args in searcher]
+        summary['n_configs'] = len(args_list)
+        if manifest_path is None:
+            manifest_path = os.path.join('slune_manifests', f'{time.strftime("%Y%m%d-%H%M%S")}_{os.getpid()}.json')
+        submit_arrays(sbatch_path, script_path, args_list, manifest_path, max_array_size=max_array_size, max_parallel=max_parallel)
+    elif max_concurrency is not None:
+        # Iterate the searcher in this thread, searchers aren't thread safe
+        args_list = [dict(cargs, **args) for args in searcher]
+        summary['n_configs'] = len(args_list)
+        def submit(args):
+            try:
+                return submit_job_retry(sbatch_path, script_path, args, retries=retries, backoff=backoff), None
+            except (subprocess.CalledProcessError, OSError) as e:
+                message = e.stderr.strip() if getattr(e, 'stderr', None) else str(e)
+                print(f"Error running sbatch: {message}")
+                return None, message
+        with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+            results = list(pool.map(submit, args_list))
+        for args, (job_id, error) in zip(args_list, results):
+            if error is None:
+                summary['job_ids'].append(job_id)
+            else:
+                summary['failures'].append((args, error))
+    else:
+        # Create sbatch script for each job
+        for args in searcher:
+            # Submit job
+            d = dict(cargs, **args)
+            submit_job(sbatch_path, script_path, d)
+            summary['n_configs'] += 1
+    summary['wall_time'] = time.perf_counter() - start
+    return summary
 
 def lsargs() -> Tuple[str, List[str]]:
     """ Returns the script name and the list of the arguments passed to the script.
@@ -91,3 +455,75 @@ def get_csv_saver(params: Optional[dict]= None, root_dir: Optional[str]='slune_r
     """
 
     return SaverCsv(LoggerDefault(), params = params, root_dir=root_dir)
+
+def run_config(fn: Callable, saver_factory: Callable, config: dict):
+    """ Runs a Python function for a configuration and saves the results it logged.
+
+    Used by run_parallel in each worker process, defined at module level so it can be sent to the workers.
+
+    Args:
+        - fn (function): Function to run, called as fn(config, saver).
+        - saver_factory (function): Called as saver_factory(params=config) to create the saver used to log the results.
+        - config (dict): Configuration to run the function for.
+
+    Returns:
+        - result: Whatever fn returns.
+
+    """
+
+    saver = saver_factory(params=config)
+    result = fn(config, saver)
+    saver.save_collated()
+    return result
+
+def run_parallel(fn: Callable, searcher: BaseSearcher, saver_factory: Callable = get_csv_saver, n_workers: Optional[int] = None,
+                 cargs: Optional[dict] = {}, saver: Optional[BaseSaver] = None, initializer: Optional[Callable] = None) -> list:
+    """ Runs a Python function for each configuration given by searcher, using a pool of worker processes.
+
+    Starting a new python interpreter for each job means paying for its imports (eg. torch or pandas) every time,
+    which can take longer than training a small model.
+    Here the worker processes are started once and each runs many configurations,
+    so imports are only paid once per worker. Use initializer to import or set up anything expensive before the first configuration.
+
+    For each configuration we create a new saver with saver_factory(params=config),
+    call fn(config, saver), where fn should log its results using saver.log,
+    and then save the results with saver.save_collated().
+
+    If given a Saver object, uses it to check if there are existing runs for each configuration and skips them,
+    based on the number of runs we would like for each job (which is stored in the searcher).
+
+    Every configuration is taken from the searcher before any is run,
+    so searchers that wait for results (see BaseSearcher.waits_for_results) raise a ValueError.
+
+    Args:
+        - fn (function): Function to run for each configuration, called as fn(config, saver). Must be picklable (eg. defined at module level).
+
+        - searcher (Searcher): Searcher object used to retrieve the configurations.
+
+        - saver_factory (function, optional): Called as saver_factory(params=config) to create the saver for each configuration,
+            default is get_csv_saver. Must be picklable, eg. use functools.partial(get_csv_saver, root_dir='my_results') to change the root directory.
+
+        - n_workers (int, optional): Number of worker processes, default is None (the number of CPU cores available).
+
+        - cargs (dict, optional): Contains arguments added to every configuration.
+
+        - saver (Saver, optional): Saver object used if we want to check if there are existing runs so we don't rerun.
+
+        - initializer (function, optional): Called once in each worker process when it starts, default is None.
+
+    Returns:
+        - results (list): What fn returned for each configuration, in the order given by the searcher.
+            If fn raises an error for any configuration the error is raised here, once all configurations have run.
+
+    """
+
+    check_searcher_can_batch(searcher, 'run_parallel')
+    if saver != None:
+        searcher.check_existing_runs(saver)
+    configs = [dict(cargs, **args) for args in searcher]
+    if n_workers is None:
+        n_workers = get_cpu_count()
+    n_workers = max(min(n_workers, len(configs)), 1)
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=initializer) as pool:
+        futures = [pool.submit(run_config, fn, saver_factory, config) for config in configs]
+    return [future.result() for future in futures]
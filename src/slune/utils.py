@@ -1,7 +1,116 @@
 import os
-from typing import List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
 
-def find_directory_path(strings: List[str], root_directory: Optional[str]='.') -> Tuple[int, str]:
+class DirectoryCache:
+    """ Caches the directories inside each directory of a tree, so that paths can be resolved without listing directories again.
+
+    Can be given as the list_dirs argument of find_directory_path and get_numeric_equiv,
+    which then also use the cached stripped names (eg. '--lr=') and numeric values of the directories inside each directory.
+    So when one process resolves many paths (eg. calling SaverExt.getset_current_path in a loop)
+    each directory is only listed once and each level of a path is resolved with dictionary lookups.
+
+    Directories created by this process should be reported with invalidate, so the listings of their parents are refreshed.
+    Directories created by other processes are only seen once the listing of their parent is invalidated.
+
+    """
+
+    def __init__(self, list_dirs: Optional[Callable[[str], List[str]]] = None):
+        """ Initialises an empty cache.
+
+        Args:
+            - list_dirs (function, optional): Returns the names of the directories inside a given directory, default is None (use os.scandir).
+
+        """
+
+        self._list_dirs = list_dirs
+        self._dirs = {}
+        self._names = {}
+        self._stripped = {}
+        self._numeric = {}
+
+    def __call__(self, path: str) -> List[str]:
+        """ Returns the names of the directories inside path, an empty list if path doesn't exist.
+
+        Args:
+            - path (str): Path to a directory.
+
+        Returns:
+            - dirs (list of str): Names of the directories inside path.
+
+        """
+
+        key = os.path.normpath(path)
+        if key not in self._dirs:
+            if self._list_dirs is not None:
+                dirs = list(self._list_dirs(path))
+            else:
+                try:
+                    with os.scandir(path) as it:
+                        dirs = [entry.name for entry in it if entry.is_dir()]
+                except (FileNotFoundError, NotADirectoryError):
+                    dirs = []
+            self._dirs[key] = dirs
+        return self._dirs[key]
+
+    def contains(self, path: str, name: str) -> bool:
+        """ Returns whether there is a directory called name inside path. """
+
+        key = os.path.normpath(path)
+        if key not in self._names:
+            self._names[key] = set(self(path))
+        return name in self._names[key]
+
+    def stripped(self, path: str) -> set:
+        """ Returns the names of the directories inside path with their values stripped, ie. '--string=value' -> '--string='. """
+
+        key = os.path.normpath(path)
+        if key not in self._stripped:
+            self._stripped[key] = set(d.split('=')[0].strip() + '=' for d in self(path))
+        return self._stripped[key]
+
+    def numeric(self, path: str) -> dict:
+        """ Maps each numeric value of the directories inside path (in the form '--string=value') to the first directory with that value. """
+
+        key = os.path.normpath(path)
+        if key not in self._numeric:
+            numeric = {}
+            for d in self(path):
+                if not '=' in d:
+                    continue
+                check, value = d.split('=')
+                if check == '' or value == '':
+                    raise ValueError("'=' cannot be at the beginning of a directory name.")
+                try:
+                    numeric.setdefault(float(value), d)
+                except ValueError:
+                    pass
+            self._numeric[key] = numeric
+        return self._numeric[key]
+
+    def invalidate(self, path: Optional[str] = None):
+        """ Forgets the listings that change when the directory at path is created, ie. those of its parent directories.
+
+        Args:
+            - path (str, optional): Path to a newly created directory, default is None (forget everything).
+
+        """
+
+        if path is None:
+            caches = [self._dirs, self._names, self._stripped, self._numeric]
+            for cache in caches:
+                cache.clear()
+            return
+        key = os.path.normpath(path)
+        while True:
+            for cache in [self._dirs, self._names, self._stripped, self._numeric]:
+                cache.pop(key, None)
+            parent = os.path.dirname(key)
+            if parent == key or parent == '':
+                break
+            key = parent
+
+def find_directory_path(strings: List[str], root_directory: Optional[str]='.', list_dirs: Optional[Callable[[str], List[str]]]=None) -> Tuple[int, str]:
     """ Searches the root directory for a path of directories that matches the strings given in any order.
     If only a partial match is found, returns the deepest matching path.
     If no matches are found returns root_directory.
@@ -10,6 +119,9 @@ def find_directory_path(strings: List[str], root_directory: Optional[str]='.') -
     Args:
         - strings (list of str): List of strings to be matched in any order. Each string in list must be in the form '--string='.
         - root_directory (string, optional): Path to the root directory to be searched, default is current working directory.
+        - list_dirs (function, optional): Returns the names of the directories inside a given directory, default is None (use os.scandir).
+            Can be used to search a cached or indexed copy of the directory tree instead of the filesystem,
+            if it is a DirectoryCache we also use its cached stripped names.
     
     Returns:
         - max_depth (int): Depth of the deepest matching path.
@@ -18,9 +130,14 @@ def find_directory_path(strings: List[str], root_directory: Optional[str]='.') -
     """
 
     def _find_directory_path(curr_strings, curr_root, depth, max_depth, max_path):
-        dir_list = [entry.name for entry in os.scandir(curr_root) if entry.is_dir()]
-        stripped_dir_list = [d.split('=')[0].strip() +"=" for d in dir_list]
-        stripped_dir_list = list(set(stripped_dir_list))
+        if list_dirs is None:
+            dir_list = [entry.name for entry in os.scandir(curr_root) if entry.is_dir()]
+        else:
+            dir_list = list_dirs(curr_root)
+        if isinstance(list_dirs, DirectoryCache):
+            stripped_dir_list = list_dirs.stripped(curr_root)
+        else:
+            stripped_dir_list = set([d.split('=')[0].strip() +"=" for d in dir_list])
         for string in curr_strings:
             if string in stripped_dir_list:
                 dir_list = [d for d in dir_list if d.startswith(string)]
@@ -41,12 +158,15 @@ def find_directory_path(strings: List[str], root_directory: Optional[str]='.') -
         max_path = os.path.join(root_directory, max_path)
     return max_path
 
-def get_numeric_equiv(og_path: str, root_directory: Optional[str]='.') -> str:
+def get_numeric_equiv(og_path: str, root_directory: Optional[str]='.', list_dirs: Optional[Callable[[str], List[str]]]=None) -> str:
     """ Replaces directories in path with existing directories with the same numerical value.
 
     Args:
         - og_path (str): Path we want to check against existing paths, must be a subdirectory of root_directory and each directory must have form '--string=value'.
         - root_directory (str, optional): Path to the root directory to be searched, default is current working directory.
+        - list_dirs (function, optional): Returns the names of the directories inside a given directory, default is None (use os.scandir).
+            Can be used to search a cached or indexed copy of the directory tree instead of the filesystem,
+            if it is a DirectoryCache we also use its cached numeric values.
     
     Returns:
         - equiv (str): Path with values changed to match existing directories if values are numerically equivalent, with root directory at beginning.
@@ -60,11 +180,25 @@ def get_numeric_equiv(og_path: str, root_directory: Optional[str]='.') -> str:
         except ValueError:
             return False
 
+    def dir_exists(parent, d):
+        if list_dirs is None:
+            return os.path.exists(os.path.join(parent, d))
+        if isinstance(list_dirs, DirectoryCache):
+            return list_dirs.contains(parent, d)
+        return d in list_dirs(parent)
+
+    def get_dirs(parent):
+        if list_dirs is None:
+            if not os.path.exists(parent):
+                return []
+            return [entry.name for entry in os.scandir(parent) if entry.is_dir()]
+        return list_dirs(parent)
+
     dirs = og_path.split(os.path.sep)
     equiv = root_directory
     for d in dirs:
         next_dir = os.path.join(equiv, d)
-        if os.path.exists(next_dir):
+        if dir_exists(equiv, d):
             equiv = next_dir
         else:
             if not '=' in d: # We only consider directories with the form '--string=value'
@@ -74,10 +208,12 @@ def get_numeric_equiv(og_path: str, root_directory: Optional[str]='.') -> str:
             check, dir_value = d.split('=')
             if (check == '') or (dir_value == ''):
                 raise ValueError("'=' cannot be at the beginning or end of a directory name.")
-            if is_numeric(dir_value):
+            if is_numeric(dir_value) and isinstance(list_dirs, DirectoryCache):
+                equiv = os.path.join(equiv, list_dirs.numeric(equiv).get(float(dir_value), d))
+            elif is_numeric(dir_value):
                 dir_value = float(dir_value)
-                if os.path.exists(equiv):
-                    existing_dirs = [entry.name for entry in os.scandir(equiv) if entry.is_dir()]
+                existing_dirs = get_dirs(equiv)
+                if existing_dirs != []:
                     for existing_dir in existing_dirs:
                         if not '=' in existing_dir: # We only consider directories with the form '--string=value'
                             continue
@@ -162,80 +298,265 @@ def strings_to_dict(ls:List[str])->dict:
         d[key] = value
     return d
 
-def find_ext_files(ext: str, root_directory: Optional[str]='.') -> List[str]:
+def normalise_param(item: str) -> Tuple[str, object]:
+    """ Converts a string in the form '--key=value' into a (key, value) pair that can be compared with others.
+
+    The key is stripped of any leading '-' and the value is converted to a float if possible,
+    so numerically equivalent values (eg. '1' and '1.0') give the same pair.
+
+    Args:
+        - item (str): String in the form '--key=value' or 'key=value'.
+
+    Returns:
+        - pair (tuple): The (key, value) pair.
+
+    """
+
+    key, value = item.split('=', 1)
+    try:
+        value = float(value)
+    except ValueError:
+        pass
+    return (key.lstrip('-'), value)
+
+def get_param_key(strings: List[str]) -> frozenset:
+    """ Converts a list of strings in the form of '--key=value' into a hashable key identifying the configuration.
+
+    Keys are stripped of any leading '-' and values that can be converted to a float are,
+    so numerically equivalent values (eg. '1' and '1.0') give the same key.
+    Strings without an '=' are ignored, so this can be used directly on the directories of a path.
+
+    Args:
+        - strings (list of str): List of strings in the form of '--key=value'.
+
+    Returns:
+        - key (frozenset): Set of (key, value) pairs.
+
+    """
+
+    return frozenset(normalise_param(item) for item in strings if '=' in item)
+
+def find_ext_files(ext: str, root_directory: Optional[str]='.', dirs: Optional[List[str]]=None, exact_depth: bool=False, unique_params: bool=False) -> List[str]:
     """ Recursively finds all files with 'ext' extension in all subdirectories of the root directory and returns their paths.
 
+    If given the directory names (parameters) we are looking for, subdirectories that can't contain a match are not searched.
+    If exact_depth is True, we skip directories in the form '--key=value' whose key we are not looking for,
+    or are looking for with a different value, and don't search below directories that already have
+    as many parameters in their path as we are looking for.
+    Otherwise, as a parameter could appear more than once in a path (eg. '--a=2/--a=1/results_0.csv' matches '--a=1'),
+    we only skip directories with a different value if unique_params is True,
+    which is safe for trees written by slune's savers as they never repeat a parameter in a path.
+    This can save a lot of directory listings on slow (eg. network) file systems.
+    The files returned still need to be matched against the parameters, eg. using a ResultsTree.
+
     Args:
         - ext (str): Extension of the files we want to find.
         - root_directory (str, optional): Path to the root directory to be searched, default is current working directory.
+        - dirs (list of str, optional): Directory names we are looking for, default is None (search every subdirectory).
+        - exact_depth (bool, optional): Whether we only want files at the exact depth of the parameters in dirs, default is False.
+        - unique_params (bool, optional): Whether each parameter appears at most once in any path, default is False.
 
     Returns:
         - files (list of str): List of strings containing the paths to all files with ext as the extension found.
 
     """
+
+    wanted = {}
+    if dirs is not None:
+        for d in dirs:
+            if '=' in d:
+                key, value = normalise_param(d)
+                wanted.setdefault(key, set()).add(value)
+    max_depth = len(dirs) if (exact_depth and dirs is not None) else None
+    prune_values = exact_depth or unique_params
     ext_files = []
-    for root, dirs, files in os.walk(root_directory):
-        for file in files:
-            if file.endswith(ext):
-                ext_files.append(os.path.join(root, file))
+    def search(directory, depth):
+        try:
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError:
+            return
+        subdirectories = []
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                continue
+            if not is_dir:
+                if entry.name.endswith(ext):
+                    ext_files.append(os.path.join(directory, entry.name))
+                continue
+            # Like os.walk, we don't follow symbolic links to directories
+            if entry.is_symlink():
+                continue
+            if '=' in entry.name:
+                key, value = normalise_param(entry.name)
+                if prune_values and (key in wanted) and (value not in wanted[key]):
+                    continue
+                if (max_depth is not None) and ((key not in wanted) or (depth + 1 > max_depth)):
+                    continue
+                subdirectories.append((entry.name, depth + 1))
+            else:
+                subdirectories.append((entry.name, depth))
+        for name, sub_depth in subdirectories:
+            search(os.path.join(directory, name), sub_depth)
+    search(root_directory, 0)
     return ext_files
 
-def get_all_paths(ext:str, dirs: List[str], root_directory: Optional[str]='.') -> List[str]:
+class ResultsTree:
+    """ Parsed view of the results files in a directory tree, used to quickly find the files matching some parameters.
+
+    Each path is parsed once, into the set of its components and the set of normalised (parameter, value) pairs
+    found in its directories (see normalise_param), and we keep an inverted index from each pair to the files with it.
+    Finding the files matching some parameters is then a few set intersections,
+    rather than splitting every path and converting every value for every parameter we look for.
+
+    Build a tree once per walk of the root directory and reuse it for as many queries as needed,
+    get_all_paths and get_all_paths_exact_depth build one for a single query.
+
+    Attributes:
+        - files (list of str): Paths of the files in the tree, in the order given.
+        - root_directory (str): Path to the root directory the files are in.
+
+    """
+
+    def __init__(self, files: List[str], root_directory: Optional[str] = '.'):
+        """ Parses the paths of the files.
+
+        Args:
+            - files (list of str): Paths of the files in the tree.
+            - root_directory (str, optional): Path to the root directory the files are in, default is current working directory.
+
+        """
+
+        self.files = list(files)
+        self.root_directory = root_directory
+        root_normalised = os.path.normpath(root_directory)
+        self._components = []
+        self._depths = []
+        self._param_dirs = []
+        self._by_pair = {}
+        for i, file in enumerate(self.files):
+            components = file.split(os.path.sep)
+            self._components.append(frozenset(components))
+            for pair in set(normalise_param(c) for c in components if '=' in c):
+                self._by_pair.setdefault(pair, []).append(i)
+            # Parameter directories below the root directory, used to find files at exact depth
+            normalised = os.path.normpath(file)
+            if normalised.startswith(root_normalised):
+                normalised = normalised[len(root_normalised):].lstrip(os.path.sep)
+            param_dirs = [c for c in normalised.split(os.path.sep)[:-1] if '=' in c]
+            self._depths.append(len(param_dirs))
+            self._param_dirs.append(param_dirs)
+
+    def __len__(self) -> int:
+        """ Returns the number of files in the tree. """
+
+        return len(self.files)
+
+    def match_indices(self, dirs: Optional[List[str]]) -> List[int]:
+        """ Returns the indices of the files with a directory matching each of the directory names given.
+
+        Args:
+            - dirs (list of str): Directory names we want the paths to contain.
+                Names in the form '--key=value' match any directory with the same key and an equivalent value,
+                other names must match a component of the path exactly.
+
+        Returns:
+            - indices (list of int): Indices of the matching files, in increasing order.
+
+        """
+
+        if dirs in [None, []]:
+            return list(range(len(self.files)))
+        pairs = set(normalise_param(d) for d in dirs if '=' in d)
+        others = [d for d in dirs if '=' not in d]
+        if pairs:
+            # Intersect the files with each pair, starting from the rarest pair
+            candidates = None
+            for pair in sorted(pairs, key=lambda pair: len(self._by_pair.get(pair, []))):
+                with_pair = self._by_pair.get(pair)
+                if with_pair is None:
+                    return []
+                candidates = set(with_pair) if candidates is None else candidates.intersection(with_pair)
+                if not candidates:
+                    return []
+            candidates = sorted(candidates)
+        else:
+            candidates = range(len(self.files))
+        return [i for i in candidates if all(d in self._components[i] for d in others)]
+
+    def match(self, dirs: Optional[List[str]]) -> List[str]:
+        """ Returns the paths of the files with a directory matching each of the directory names given, see match_indices.
+
+        Args:
+            - dirs (list of str): Directory names we want the paths to contain.
+
+        Returns:
+            - matches (list of str): Paths of the matching files, in the order the files were given.
+
+        """
+
+        return [self.files[i] for i in self.match_indices(dirs)]
+
+    def match_exact_depth(self, dirs: Optional[List[str]]) -> List[str]:
+        """ Returns the paths of the matching files whose number of parameter directories below the root directory is exactly len(dirs).
+
+        Args:
+            - dirs (list of str): Directory names we want the paths to contain.
+
+        Returns:
+            - matches (list of str): Paths of the matching files at exact depth, in the order the files were given.
+
+        """
+
+        n_dirs = 0 if dirs is None else len(dirs)
+        return [self.files[i] for i in self.match_indices(dirs) if self._depths[i] == n_dirs]
+
+    def count_by_params(self) -> dict:
+        """ Counts the files with each set of parameters, only counting files whose parameters are all in directories below the root.
+
+        Returns:
+            - counts (dict): Maps the set of normalised (parameter, value) pairs of a file (see get_param_key) to the number of files with them.
+                Paths which repeat a parameter are left out, as they can never be at exact depth.
+
+        """
+
+        counts = {}
+        for param_dirs in self._param_dirs:
+            key = get_param_key(param_dirs)
+            if len(key) != len(param_dirs):
+                continue
+            counts[key] = counts.get(key, 0) + 1
+        return counts
+
+def get_all_paths(ext:str, dirs: List[str], root_directory: Optional[str]='.', files: Optional[List[str]]=None, unique_params: bool=False) -> List[str]:
     """ Find all possible paths of files with 'ext' extension that have directory matching one of each of all the parameters given.
     
     Finds all paths of files ending with 'ext' in all subdirectories of the root directory that have a directory in their path matching one of each of all the parameters given.
+    To search the same files many times, build a ResultsTree once and use its match method instead.
 
     Args:
         - ext (str): Extension of the files we want to find.
         - dirs (list of str): List of directory names we want returned paths to have in their path. Checks equivalence of values if the directory name is in the form '--string=value'.
         - root_directory (str, optional): Path to the root directory to be searched, default is current working directory.
+        - files (list of str, optional): Paths of the files to search through, default is None.
+            If None, we find all files ending with 'ext' by walking the root directory.
+        - unique_params (bool, optional): Whether each parameter appears at most once in any path, default is False.
+            If True, we don't walk directories contradicting the parameters given, see find_ext_files.
 
     Returns:
         - matches (list of str): List of strings containing the paths to all files ending with 'ext' found.
 
     """
 
-    all_files = find_ext_files(ext, root_directory)
-    matches = []
-    for file in all_files:
-        path = file.split(os.path.sep)
-        contains = []
-        if dirs in [None, []]:
-            matches.append(file)
-            continue
-        else:
-            for p in dirs:
-                if '=' in p:
-                    param, value = p.split('=')
-                    # Handle both 'param1=1' and '--param1=1' formats
-                    # Strip '--' or '-' prefix from param for comparison
-                    param_stripped = param.lstrip('-')
-                    for dir in path:
-                        # Check if directory matches (with or without -- prefix)
-                        # Directory format is '--param1=1' or 'param1=1'
-                        dir_matches = False
-                        if '=' in dir:
-                            dir_param_part, dir_value = dir.split('=', 1)
-                            # Strip '--' or '-' from directory param part
-                            dir_param_stripped = dir_param_part.lstrip('-')
-                            # Compare stripped parameter names
-                            if dir_param_stripped == param_stripped:
-                                dir_matches = True
-                        
-                        if dir_matches:
-                            try:
-                                if float(value) == float(dir_value):
-                                    contains.append(p)
-                            except ValueError:
-                                if value == dir_value:
-                                    contains.append(p)
-                elif p in path:
-                    contains.append(p)
-            if len(contains) == len(dirs):
-                matches.append(file)
-    return matches
-
-def get_all_paths_exact_depth(ext: str, dirs: List[str], root_directory: Optional[str]='.') -> List[str]:
+    if files is None:
+        all_files = find_ext_files(ext, root_directory, dirs=dirs, unique_params=unique_params)
+    else:
+        all_files = [f for f in files if f.endswith(ext)]
+    return ResultsTree(all_files, root_directory).match(dirs)
+
+def get_all_paths_exact_depth(ext: str, dirs: List[str], root_directory: Optional[str]='.', files: Optional[List[str]]=None) -> List[str]:
     """ Find files at EXACT depth matching the number of parameters.
     
     For exists() checks - only matches files at exact depth.
@@ -247,45 +568,53 @@ def get_all_paths_exact_depth(ext: str, dirs: List[str], root_directory: Optiona
         - dirs (list of str): List of directory names we want returned paths to have.
             Format: ['param1=1', 'param2=2'] or ['--param1=1', '--param2=2']
         - root_directory (str, optional): Path to the root directory to be searched.
+        - files (list of str, optional): Paths of the files to search through, default is None.
+            If None, we find all files ending with 'ext' by walking the root directory,
+            only walking the directories which can contain files at exact depth matching the parameters.
     
     Returns:
         - matches (list of str): List of file paths at exact depth only.
     """
-    # First get all files that match the parameters (at any depth)
-    all_matching = get_all_paths(ext, dirs, root_directory)
-    
-    if not all_matching:
-        return []
-    
-    # Filter to only files at exact depth
-    num_params = len(dirs)
-    exact_depth_files = []
-    
-    # Normalize root_directory for path comparison
-    root_dir_normalized = os.path.normpath(root_directory)
-    
-    for file_path in all_matching:
-        # Get relative path from root_directory
-        file_path_normalized = os.path.normpath(file_path)
-        if file_path_normalized.startswith(root_dir_normalized):
-            # Remove root directory and leading separator
-            rel_path = file_path_normalized[len(root_dir_normalized):].lstrip(os.path.sep)
-        else:
-            rel_path = file_path_normalized
-        
-        # Split into path components
-        path_parts = rel_path.split(os.path.sep)
-        
-        # Remove filename (last component that ends with ext)
-        # Keep only directory parts
-        dir_parts = [p for p in path_parts[:-1] if p]  # Exclude filename and empty strings
-        
-        # Count directories that match parameter format (contain '=')
-        # These are the parameter directories like '--param1=1' or 'param1=1'
-        param_dirs = [p for p in dir_parts if '=' in p]
-        
-        # Only include if depth matches exactly
-        if len(param_dirs) == num_params:
-            exact_depth_files.append(file_path)
-    
-    return exact_depth_files
\ No newline at end of file
+
+    if files is None:
+        all_files = find_ext_files(ext, root_directory, dirs=dirs, exact_depth=True)
+    else:
+        all_files = [f for f in files if f.endswith(ext)]
+    return ResultsTree(all_files, root_directory).match_exact_depth(dirs)
+
+def parallel_map(fn: Callable, items: List, n_workers: int = 1, use_processes: bool = False) -> List:
+    """ Applies a function to every item in a list, using a pool of workers if asked to.
+
+    Args:
+        - fn (function): Function to apply to each item, must be picklable if use_processes is True.
+        - items (list): Items to apply the function to.
+        - n_workers (int, optional): Number of workers in the pool, default is 1 (apply the function serially without a pool).
+        - use_processes (bool, optional): Whether to use a pool of processes rather than threads, default is False.
+
+    Returns:
+        - results (list): Result of the function for each item, in the same order as items.
+
+    """
+
+    items = list(items)
+    if (n_workers is None) or (n_workers <= 1) or (len(items) <= 1):
+        return [fn(item) for item in items]
+    if use_processes:
+        # Send items to processes in chunks to cut down on communication overhead
+        chunksize = max(1, len(items) // (4 * n_workers))
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            return list(executor.map(fn, items, chunksize=chunksize))
+    with ThreadPoolExecutor(max_workers=n_workers) as executor:
+        return list(executor.map(fn, items))
+
+def get_cpu_count() -> int:
+    """ Returns the number of CPU cores this process is allowed to use.
+
+    Returns:
+        - cpu_count (int): Number of CPU cores available to this process.
+
+    """
+
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
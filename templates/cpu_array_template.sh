@@ -0,0 +1,42 @@
+#!/bin/bash
+#SBATCH --job-name=my_job_name         # Job name
+#SBATCH --output=my_job_output_%A_%a.log # Output file (stdout), %A is the array job ID and %a the task ID
+#SBATCH --error=my_job_error_%A_%a.log  # Error file (stderr)
+#SBATCH --partition=cpu                # Specify the partition/queue name
+#SBATCH --nodes=1                      # Number of nodes
+#SBATCH --ntasks=1                     # Number of tasks (cores)
+#SBATCH --cpus-per-task=1              # Number of CPU cores per task
+#SBATCH --mem=1G                       # Memory per node (in GB)
+#SBATCH --time=01:00:00                # Wall time (hh:mm:ss)
+#SBATCH --mail-user=your@email.com     # Email address for job notifications
+#SBATCH --mail-type=ALL                # Email notifications (BEGIN, END, FAIL)
+
+# Define executable
+export EXE=/bin/hostname
+
+# Optional: Load necessary modules or set environment variables
+# module load your_module
+# export YOUR_VARIABLE=value
+
+# Change to your working directory
+cd "${SLURM_SUBMIT_DIR}"
+
+# Execute code
+${EXE}
+
+# Print some usefull stuff!
+echo JOB ID: ${SLURM_ARRAY_JOB_ID}, TASK ID: ${SLURM_ARRAY_TASK_ID}
+echo Working Directory: $(pwd)
+echo Start Time: $(date)
+
+# Activate virtual environment (if you have one), change the path to match the location of your virtual environment
+source ../pyvenv/bin/activate
+
+# Find the arguments of this task from the manifest written by sbatchit (one argument per line)
+mapfile -t ARGS < <(python -m slune array-args "$2")
+
+# Where we run the script to perform training run with model
+python "$1" "${ARGS[@]}"
+
+# End of job script, let's print the time at which we finished
+echo End Time: $(date)
\ No newline at end of file
@@ -0,0 +1,40 @@
+#!/bin/bash
+#SBATCH --job-name=my_job_name         # Job name
+#SBATCH --output=my_job_output_%j.log   # Output file (stdout), %j is the job ID
+#SBATCH --error=my_job_error_%j.log    # Error file (stderr)
+#SBATCH --partition=cpu                # Specify the partition/queue name
+#SBATCH --nodes=1                      # Number of nodes
+#SBATCH --ntasks=1                     # Number of tasks (cores)
+#SBATCH --cpus-per-task=4              # Number of CPU cores per task, shared by the configurations of the bundle
+#SBATCH --mem=1G                       # Memory per node (in GB)
+#SBATCH --time=01:00:00                # Wall time (hh:mm:ss), should match the time_budget given to sbatchit
+#SBATCH --mail-user=your@email.com     # Email address for job notifications
+#SBATCH --mail-type=ALL                # Email notifications (BEGIN, END, FAIL)
+
+# Define executable
+export EXE=/bin/hostname
+
+# Optional: Load necessary modules or set environment variables
+# module load your_module
+# export YOUR_VARIABLE=value
+
+# Change to your working directory
+cd "${SLURM_SUBMIT_DIR}"
+
+# Execute code
+${EXE}
+
+# Print some usefull stuff!
+echo JOB ID: ${SLURM_JOBID}
+echo Working Directory: $(pwd)
+echo Start Time: $(date)
+
+# Activate virtual environment (if you have one), change the path to match the location of your virtual environment
+source ../pyvenv/bin/activate
+
+# Run every configuration of the bundle written to the manifest by sbatchit, with as many at the same time as we have cores
+# $3 is the index of the bundle, when submitted as a job array (array=True) it is found from SLURM_ARRAY_TASK_ID instead
+python -m slune run-bundle "$1" "$2" ${3:+--bundle-id "$3"} --n-workers "${SLURM_CPUS_PER_TASK:-1}"
+
+# End of job script, let's print the time at which we finished
+echo End Time: $(date)
\ No newline at end of file
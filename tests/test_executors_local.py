@@ -0,0 +1,82 @@
+import unittest
+from unittest.mock import patch
+from slune import sbatchit, SearcherGrid
+from slune.executors import ExecutorLocal, ExecutorSlurm
+import os
+import shutil
+import sys
+
+SCRIPT = """import os, sys, time
+time.sleep(0.2)
+print(' '.join(sys.argv[1:]))
+print('threads=' + os.environ['OMP_NUM_THREADS'])
+if '--fail=True' in sys.argv:
+    sys.stderr.write('failed')
+    sys.exit(3)
+"""
+
+class TestExecutorLocal(unittest.TestCase):
+    """Test ExecutorLocal runs jobs in parallel on this machine"""
+
+    def setUp(self):
+        self.test_dir = 'test_directory'
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+        os.makedirs(self.test_dir)
+        self.script_path = os.path.join(self.test_dir, 'script.py')
+        with open(self.script_path, 'w') as f:
+            f.write(SCRIPT)
+        self.log_dir = os.path.join(self.test_dir, 'logs')
+
+    def tearDown(self):
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def test_cpu_budget(self):
+        self.assertEqual(ExecutorLocal(cpus_per_job=4, cpu_budget=64).n_workers, 16)
+        self.assertEqual(ExecutorLocal(cpus_per_job=8, cpu_budget=4).n_workers, 1)
+        self.assertEqual(ExecutorLocal(n_workers=3, cpu_budget=64).n_workers, 3)
+        with self.assertRaises(ValueError):
+            ExecutorLocal(cpus_per_job=0)
+
+    def test_sbatchit_runs_jobs(self):
+        executor = ExecutorLocal(n_workers=4, cpus_per_job=2, log_dir=self.log_dir, verbose=False)
+        searcher = SearcherGrid({'alpha': [1, 2, 3, 4], 'fail': [False]})
+        with patch.dict(os.environ):
+            os.environ.pop('OMP_NUM_THREADS', None)
+            results = sbatchit(self.script_path, None, searcher, {'name': 'test'}, executor=executor)['results']
+        self.assertEqual(len(results), 4)
+        for i, result in enumerate(results):
+            self.assertEqual(result['returncode'], 0)
+            self.assertGreater(result['runtime'], 0.2)
+            self.assertEqual(result['args'], ['--name=test', f'--alpha={i + 1}', '--fail=False'])
+            with open(result['stdout']) as f:
+                self.assertEqual(f.read(), f'--name=test --alpha={i + 1} --fail=False\nthreads=2\n')
+        self.assertEqual(len(os.listdir(self.log_dir)), 8)
+
+    def test_failed_job(self):
+        executor = ExecutorLocal(n_workers=2, log_dir=self.log_dir, verbose=False)
+        executor.submit(self.script_path, {'fail': True})
+        executor.submit(os.path.join(self.test_dir, 'missing_script'), {})
+        results = executor.wait()
+        self.assertEqual(results[0]['returncode'], 3)
+        with open(results[0]['stderr']) as f:
+            self.assertEqual(f.read(), 'failed')
+        self.assertEqual(results[1]['returncode'], -1)
+        self.assertEqual(executor.wait(), [])
+
+
+class TestExecutorSlurm(unittest.TestCase):
+
+    @patch('subprocess.run')
+    def test_sbatchit(self, mock_run):
+        searcher = SearcherGrid({'alpha': [1, 2]})
+        summary = sbatchit('script.py', None, searcher, executor=ExecutorSlurm('template.sh'))
+        self.assertEqual(summary['results'], [])
+        self.assertEqual(summary['n_configs'], 2)
+        mock_run.assert_any_call(['sbatch', 'template.sh', 'script.py', '--alpha=2'], check=True)
+        self.assertEqual(mock_run.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
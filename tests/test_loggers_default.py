@@ -166,5 +166,49 @@ class TestLoggerDefaultWarnings(unittest.TestCase):
         self.assertIn('time_stamp', logger.results.columns)
 
 
+class TestLoggerDefaultColumnar(unittest.TestCase):
+    """Test the columnar logger gives the same results as concatenating a data frame per call"""
+
+    def setUp(self):
+        self.logger = LoggerDefault()
+        self.metrics = [{'a': 1, 'b': 'x'}, {'a': 2, 'c': True}, {'b': 'y', 'd': 1.5}, {'a': 3, 'b': 'z', 'c': False, 'd': 2}]
+        self.time_stamps = [pd.Timestamp('2024-01-01') + pd.Timedelta(seconds=i) for i in range(len(self.metrics))]
+
+    def test_same_as_concat(self):
+        expected = pd.DataFrame()
+        for metrics, time_stamp in zip(self.metrics, self.time_stamps):
+            expected = pd.concat([expected, pd.DataFrame(dict(metrics, time_stamp=time_stamp), index=[0])], ignore_index=True)
+        with patch('pandas.Timestamp.now', side_effect=self.time_stamps):
+            for metrics in self.metrics:
+                self.logger.log(dict(metrics))
+        pd.testing.assert_frame_equal(self.logger.results, expected)
+        self.assertEqual(list(self.logger.results.columns), ['a', 'b', 'time_stamp', 'c', 'd'])
+
+    def test_results_created_lazily(self):
+        self.logger.log({'a': 1})
+        results = self.logger.results
+        self.assertIs(self.logger.results, results)
+        self.logger.log({'a': 2})
+        self.assertIsNot(self.logger.results, results)
+        self.assertEqual(list(self.logger.results['a']), [1, 2])
+
+    def test_rows_since(self):
+        for metrics in self.metrics:
+            self.logger.log(dict(metrics))
+        self.assertEqual(self.logger.n_rows, 4)
+        rows = self.logger.rows_since(2)
+        pd.testing.assert_frame_equal(rows, self.logger.results.iloc[2:].reset_index(drop=True))
+        self.assertEqual(len(self.logger.rows_since(4)), 0)
+        self.assertEqual(list(self.logger.rows_since(4).columns), list(self.logger.results.columns))
+
+    def test_set_results(self):
+        self.logger.log({'a': 1})
+        self.logger.results = pd.DataFrame()
+        self.assertTrue(self.logger.results.empty)
+        self.logger.log({'b': 2})
+        self.assertEqual(list(self.logger.results.columns), ['b', 'time_stamp'])
+        self.assertEqual(len(self.logger.results), 1)
+
+
 if __name__ == '__main__':
     unittest.main()
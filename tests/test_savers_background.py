@@ -0,0 +1,143 @@
+import unittest
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import time
+import pandas as pd
+from unittest.mock import patch
+from slune.savers.csv import SaverCsv
+from slune.savers.background import SaverBackground
+from slune.loggers.default import LoggerDefault
+from slune.base import BaseSaver, BaseLogger
+
+SIGTERM_SCRIPT = """import os, signal, sys
+from slune.savers import SaverCsv, SaverBackground
+from slune.loggers import LoggerDefault
+saver = SaverBackground(SaverCsv(LoggerDefault(), {'alpha': 1}, root_dir=sys.argv[1], append=True), flush_rows=10 ** 6, flush_interval=3600)
+for step in range(500):
+    saver.log({'step': step})
+os.kill(os.getpid(), signal.SIGTERM)
+"""
+
+class MockLogger(BaseLogger):
+    """Logger whose log method doesn't take a time stamp"""
+
+    def __init__(self):
+        super(MockLogger, self).__init__()
+        self.rows = []
+
+    def log(self, metrics):
+        self.rows.append(metrics)
+
+    def read_log(self):
+        return 1
+
+class MockSaver(BaseSaver):
+    def __init__(self, logger_instance: BaseLogger):
+        super(MockSaver, self).__init__(logger_instance)
+
+    def save_collated(self):
+        return 1
+
+    def read(self):
+        return 1
+
+    def exists(self):
+        return 0
+
+class TestSaverBackground(unittest.TestCase):
+    """Test SaverBackground saves results from a writer thread"""
+
+    def setUp(self):
+        self.test_dir = 'test_directory'
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+        self.csv_saver = SaverCsv(LoggerDefault(), {'alpha': 1}, root_dir=self.test_dir, append=True)
+
+    def tearDown(self):
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def read(self):
+        return pd.read_csv(self.csv_saver.current_path)
+
+    def test_flush_every_n_rows(self):
+        saver = SaverBackground(self.csv_saver, flush_rows=100, flush_interval=3600)
+        for step in range(250):
+            saver.log({'step': step})
+        deadline = time.monotonic() + 5
+        while (not os.path.exists(self.csv_saver.current_path) or len(self.read()) < 200) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertGreaterEqual(len(self.read()), 200)
+        saver.close()
+        df = self.read()
+        self.assertEqual(list(df['step']), list(range(250)))
+        self.assertEqual(list(df.columns), ['step', 'time_stamp'])
+
+    def test_flush_every_t_seconds(self):
+        saver = SaverBackground(self.csv_saver, flush_rows=10 ** 6, flush_interval=0.05)
+        saver.log({'step': 0})
+        deadline = time.monotonic() + 5
+        while not os.path.exists(self.csv_saver.current_path) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(len(self.read()), 1)
+        saver.close()
+
+    def test_time_stamp_from_log_call(self):
+        saver = SaverBackground(self.csv_saver, flush_rows=10 ** 6, flush_interval=3600)
+        time_stamp = pd.Timestamp('2024-01-01 12:00:00')
+        with patch('pandas.Timestamp.now', return_value=time_stamp):
+            saver.log({'step': 0})
+        saver.save_collated()
+        self.assertEqual(pd.Timestamp(self.read()['time_stamp'][0]), time_stamp)
+        saver.close()
+        with self.assertRaises(RuntimeError):
+            saver.log({'step': 1})
+
+    def test_delegates_to_saver(self):
+        saver = SaverBackground(self.csv_saver)
+        saver.log({'loss': 1.0})
+        saver.close()
+        self.assertEqual(saver.current_path, self.csv_saver.current_path)
+        self.assertEqual(saver.exists({'alpha': 1}), 1)
+        self.assertEqual(saver.read({'alpha': 1}, 'loss', select_by='min')[1], [1.0])
+
+    def test_change_path_saves_to_previous_path(self):
+        saver = SaverBackground(self.csv_saver, flush_rows=10 ** 6, flush_interval=3600)
+        for step in range(3):
+            saver.log({'step': step})
+        first_path = saver.current_path
+        saver.getset_current_path({'alpha': 2})
+        for step in range(3, 5):
+            saver.log({'step': step})
+        saver.close()
+        self.assertNotEqual(saver.current_path, first_path)
+        self.assertEqual(list(pd.read_csv(first_path)['step']), [0, 1, 2])
+        # As with SaverCsv, a new path gets every row of the logger
+        self.assertEqual(list(self.read()['step']), [0, 1, 2, 3, 4])
+
+    def test_logger_without_time_stamp(self):
+        logger = MockLogger()
+        saver = SaverBackground(MockSaver(logger), handle_sigterm=False)
+        time_stamp = pd.Timestamp('2024-01-01 12:00:00')
+        with patch('pandas.Timestamp.now', return_value=time_stamp):
+            saver.log({'step': 0})
+        saver.close()
+        self.assertEqual(logger.rows, [{'step': 0, 'time_stamp': time_stamp}])
+
+    def test_requires_append(self):
+        with self.assertRaises(ValueError):
+            SaverBackground(SaverCsv(LoggerDefault(), {'alpha': 1}, root_dir=self.test_dir))
+
+    def test_save_on_sigterm(self):
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+        result = subprocess.run([sys.executable, '-c', SIGTERM_SCRIPT, self.test_dir], env=env, timeout=60)
+        self.assertEqual(result.returncode, -signal.SIGTERM)
+        reader = SaverCsv(LoggerDefault(), root_dir=self.test_dir)
+        self.assertEqual(reader.read({'alpha': 1}, 'step', select_by='max')[1], [499])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+import os
+import shutil
+import pandas as pd
+from unittest.mock import patch
+from slune.savers.csv import SaverCsv
+from slune.loggers.default import LoggerDefault
+
+class TestSaverCsvAppend(unittest.TestCase):
+    """Test SaverCsv append mode only writes new rows"""
+
+    def setUp(self):
+        self.test_dir = 'test_directory'
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+        self.saver = SaverCsv(LoggerDefault(), params={'param1': 1}, root_dir=self.test_dir, append=True)
+
+    def tearDown(self):
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def test_saves_each_row_once(self):
+        for epoch in range(3):
+            self.saver.log({'epoch': epoch, 'loss': 1.0 / (epoch + 1)})
+            self.saver.save_collated()
+        self.saver.save_collated()
+        df = pd.read_csv(self.saver.current_path)
+        self.assertEqual(list(df['epoch']), [0, 1, 2])
+        self.assertEqual(list(df.columns), ['epoch', 'loss', 'time_stamp'])
+
+    def test_does_not_reread_file(self):
+        self.saver.log({'loss': 1.0})
+        self.saver.save_collated()
+        self.saver.log({'loss': 0.5})
+        with patch('slune.savers.csv.pd.read_csv', wraps=pd.read_csv) as mock_read:
+            self.saver.save_collated()
+        # Only the header is read
+        mock_read.assert_called_once_with(self.saver.current_path, nrows=0)
+        self.assertEqual(list(pd.read_csv(self.saver.current_path)['loss']), [1.0, 0.5])
+
+    def test_only_new_rows_taken_from_logger(self):
+        self.saver.log({'loss': 1.0})
+        self.saver.save_collated()
+        self.saver.log({'loss': 0.5})
+        with patch.object(LoggerDefault, 'rows_since', autospec=True, side_effect=LoggerDefault.rows_since) as mock_rows:
+            self.saver.save_collated()
+        mock_rows.assert_called_once_with(self.saver.logger, 1)
+        self.assertEqual(list(pd.read_csv(self.saver.current_path)['loss']), [1.0, 0.5])
+
+    def test_new_columns_evolve_header(self):
+        self.saver.log({'loss': 1.0})
+        self.saver.save_collated()
+        self.saver.log({'accuracy': 0.5, 'loss': 0.5})
+        self.saver.save_collated()
+        self.saver.log({'loss': 0.25})
+        self.saver.save_collated()
+        df = pd.read_csv(self.saver.current_path)
+        self.assertEqual(list(df.columns), ['loss', 'time_stamp', 'accuracy'])
+        self.assertEqual(list(df['loss']), [1.0, 0.5, 0.25])
+        self.assertTrue(pd.isna(df['accuracy'].iloc[0]))
+        self.assertEqual(df['accuracy'].iloc[1], 0.5)
+
+    def test_repairs_partial_line(self):
+        self.saver.log({'loss': 1.0})
+        self.saver.save_collated()
+        # Simulate a job killed half way through appending a row
+        with open(self.saver.current_path, 'a') as f:
+            f.write('0.7,2024-01')
+        self.saver.log({'loss': 0.5})
+        self.saver.save_collated()
+        self.assertEqual(list(pd.read_csv(self.saver.current_path)['loss']), [1.0, 0.5])
+
+    def test_new_path_saves_all_rows(self):
+        self.saver.log({'loss': 1.0})
+        self.saver.save_collated()
+        first_path = self.saver.current_path
+        self.saver.getset_current_path({'param1': 2})
+        self.saver.save_collated()
+        self.assertEqual(len(pd.read_csv(first_path)), 1)
+        self.assertEqual(len(pd.read_csv(self.saver.current_path)), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import unittest
+import os
+import json
+import shutil
+import pandas as pd
+from unittest.mock import patch
+from slune.savers.csv import SaverCsv
+from slune.savers.cache import ReadCache, reduce_csv
+from slune.loggers.default import LoggerDefault
+
+class TestSaverCsvReadCache(unittest.TestCase):
+    """Test SaverCsv.read only rereads files that changed when caching"""
+
+    def setUp(self):
+        self.test_dir = 'test_directory'
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+        for p1 in [1, 2]:
+            dir_path = os.path.join(self.test_dir, f'--param1={p1}')
+            os.makedirs(dir_path)
+            for run in range(2):
+                pd.DataFrame({'loss': [p1 + run, p1 + run + 1, p1], 'acc': [0.1, 0.2, 0.3]}).to_csv(os.path.join(dir_path, f'results_{run}.csv'), index=False)
+
+    def tearDown(self):
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def as_dict(self, out):
+        params, values = out
+        return dict(zip([tuple(p) for p in params], values))
+
+    def test_same_values_as_uncached(self):
+        cached = SaverCsv(LoggerDefault(), root_dir=self.test_dir, cache=True)
+        uncached = SaverCsv(LoggerDefault(), root_dir=self.test_dir)
+        for select_by in ReadCache.SELECT_BY:
+            for collate_by in ['mean', 'all']:
+                self.assertEqual(self.as_dict(cached.read({}, 'loss', select_by, collate_by)), self.as_dict(uncached.read({}, 'loss', select_by, collate_by)))
+
+    def test_only_changed_files_are_reread(self):
+        saver = SaverCsv(LoggerDefault(), root_dir=self.test_dir, cache=True)
+        saver.read({}, 'loss', 'min')
+        with patch('slune.savers.cache.pd.read_csv', wraps=pd.read_csv) as mock_read:
+            saver.read({}, 'acc', 'max')
+            self.assertEqual(mock_read.call_count, 0)
+            changed = os.path.join(self.test_dir, '--param1=2', 'results_1.csv')
+            pd.DataFrame({'loss': [-1, 5], 'acc': [0.9, 0.95]}).to_csv(changed, index=False)
+            out = self.as_dict(saver.read({}, 'loss', 'min', collate_by='all'))
+            self.assertEqual(mock_read.call_count, 1)
+        self.assertEqual(out[('--param1=2', 'results_1')], -1)
+
+    def test_missing_metric_raises(self):
+        saver = SaverCsv(LoggerDefault(), root_dir=self.test_dir, cache=True)
+        with self.assertRaises(KeyError):
+            saver.read({}, 'missing', 'min')
+
+    def test_persisted_cache_is_reused(self):
+        saver = SaverCsv(LoggerDefault(), root_dir=self.test_dir, persist_cache=True)
+        saver.read({}, 'loss', 'min')
+        self.assertTrue(os.path.exists(os.path.join(self.test_dir, ReadCache.FILE_NAME)))
+        other = SaverCsv(LoggerDefault(), root_dir=self.test_dir, persist_cache=True)
+        self.assertEqual(len(other.cache), 4)
+        with patch('slune.savers.cache.pd.read_csv') as mock_read:
+            other.read({}, 'loss', 'last')
+            mock_read.assert_not_called()
+
+    def test_persisted_cache_is_plain_json(self):
+        saver = SaverCsv(LoggerDefault(), root_dir=self.test_dir, persist_cache=True)
+        _, values = saver.read({}, 'loss', 'min', collate_by='all')
+        with open(os.path.join(self.test_dir, ReadCache.FILE_NAME)) as f:
+            entries = json.load(f)
+        self.assertEqual(len(entries), 4)
+        other = SaverCsv(LoggerDefault(), root_dir=self.test_dir, persist_cache=True)
+        self.assertEqual(other.read({}, 'loss', 'min', collate_by='all')[1], values)
+        # A file that isn't a cache written by us is ignored rather than loaded
+        with open(os.path.join(self.test_dir, ReadCache.FILE_NAME), 'w') as f:
+            f.write('not json')
+        self.assertEqual(len(ReadCache(self.test_dir, persist=True)), 0)
+
+    def test_concurrent_savers_merge_entries(self):
+        first = SaverCsv(LoggerDefault(), root_dir=self.test_dir, persist_cache=True)
+        second = SaverCsv(LoggerDefault(), root_dir=self.test_dir, persist_cache=True)
+        first.read({'param1': 1}, 'loss', 'min')
+        second.read({'param1': 2}, 'loss', 'min')
+        self.assertEqual(len(ReadCache(self.test_dir, persist=True)), 4)
+        first.read({}, 'loss', 'min')
+        # A file changed and reread by the second saver keeps its newer entry when the first saves again
+        path = os.path.join(self.test_dir, '--param1=2', 'results_0.csv')
+        pd.DataFrame({'loss': [-5, 0]}).to_csv(path, index=False)
+        os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 10**9))
+        second.read({'param1': 2}, 'loss', 'min')
+        first.cache.save()
+        with patch('slune.savers.cache.pd.read_csv') as mock_read:
+            out = SaverCsv(LoggerDefault(), root_dir=self.test_dir, persist_cache=True).read({'param1': 2}, 'loss', 'min', collate_by='all')
+            mock_read.assert_not_called()
+        self.assertIn(-5, out[1])
+
+    def test_lru_size(self):
+        cache = ReadCache(self.test_dir, max_size=2)
+        paths = [os.path.join(self.test_dir, '--param1=1', f'results_{run}.csv') for run in range(2)]
+        paths += [os.path.join(self.test_dir, '--param1=2', 'results_0.csv')]
+        cache.get_reductions(paths, LoggerDefault().read_log)
+        self.assertEqual(len(cache), 2)
+
+    def test_reduce_csv_skips_unsupported(self):
+        path = os.path.join(self.test_dir, 'results_0.csv')
+        pd.DataFrame({'loss': [1, 2], 'name': ['a', 'b']}).to_csv(path, index=False)
+        reductions = reduce_csv(path, LoggerDefault().read_log)
+        self.assertEqual(reductions['loss']['mean'], 1.5)
+        self.assertNotIn('mean', reductions['name'])
+        self.assertEqual(reductions['name']['last'], 'b')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+import os
+import shutil
+import pandas as pd
+from unittest.mock import patch
+from slune.savers.csv import SaverCsv
+from slune.loggers.default import LoggerDefault
+from slune.utils import find_ext_files
+
+class TestSaverCsvLoadAll(unittest.TestCase):
+    """Test SaverCsv.load_all loads a sweep into one data frame"""
+
+    def setUp(self):
+        self.test_dir = 'test_directory'
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+        for lr in [0.1, 0.01]:
+            for opt in ['sgd', 'adam']:
+                dir_path = os.path.join(self.test_dir, f'--lr={lr}', f'--opt={opt}')
+                os.makedirs(dir_path)
+                for run in range(2):
+                    df = pd.DataFrame({'loss': [lr * (run + 1), lr / 2], 'acc': [0.5, 0.6 + run / 10]})
+                    df.to_csv(os.path.join(dir_path, f'results_{run}.csv'), index=False)
+        self.saver = SaverCsv(LoggerDefault(), root_dir=self.test_dir)
+
+    def tearDown(self):
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def test_columns_and_types(self):
+        df = self.saver.load_all()
+        self.assertEqual(list(df.columns), ['lr', 'opt', 'run_id', 'step', 'loss', 'acc'])
+        self.assertEqual(len(df), 2 * 2 * 2 * 2)
+        self.assertEqual(df['lr'].dtype, float)
+        self.assertEqual(set(df['opt']), {'sgd', 'adam'})
+        self.assertEqual(df['run_id'].nunique(), 2 * 2 * 2)
+        self.assertIn('--lr=0.1/--opt=sgd/results_0', set(df['run_id']))
+        self.assertEqual(set(df['step']), {0, 1})
+
+    def test_walks_tree_once(self):
+        with patch('slune.savers.csv.find_ext_files', wraps=find_ext_files) as mock_find:
+            self.saver.load_all(n_workers=2)
+        self.assertEqual(mock_find.call_count, 1)
+
+    def test_select_metrics_and_params(self):
+        df = self.saver.load_all(params={'opt': 'adam'}, metrics=['loss'])
+        self.assertEqual(list(df.columns), ['lr', 'opt', 'run_id', 'step', 'loss'])
+        self.assertEqual(set(df['opt']), {'adam'})
+
+    def test_matches_read(self):
+        df = self.saver.load_all(metrics=['loss'])
+        best = df.groupby(['lr', 'opt', 'run_id'])['loss'].min().groupby(['lr', 'opt']).mean()
+        params, values = self.saver.read({'lr': 0.1, 'opt': 'sgd'}, 'loss', select_by='min')
+        self.assertAlmostEqual(best[(0.1, 'sgd')], values[0])
+
+    def test_run_id_unique_across_configs(self):
+        df = self.saver.load_all(metrics=['loss'])
+        runs = df.groupby('run_id')['loss'].min()
+        self.assertEqual(len(runs), 2 * 2 * 2)
+        self.assertAlmostEqual(runs['--lr=0.01/--opt=adam/results_1'], 0.005)
+
+    def test_no_runs(self):
+        df = self.saver.load_all(params={'lr': 5}, metrics=['loss'])
+        self.assertEqual(len(df), 0)
+        self.assertEqual(list(df.columns), ['run_id', 'step', 'loss'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+import os
+import shutil
+import pandas as pd
+from unittest.mock import patch
+from slune.savers.csv import SaverCsv
+from slune.loggers.default import LoggerDefault
+from slune.utils import find_ext_files, parallel_map
+
+class TestSaverCsvReadParallel(unittest.TestCase):
+    """Test SaverCsv.read walks the tree once and reads files in a pool"""
+
+    def setUp(self):
+        self.test_dir = 'test_directory'
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+        for p1 in [1, 2, 3]:
+            for p2 in [0.1, 0.2]:
+                dir_path = os.path.join(self.test_dir, f'--param1={p1}', f'--param2={p2}')
+                os.makedirs(dir_path)
+                for run in range(3):
+                    losses = [p1 * p2 * (run + 1) * k for k in [3, 1, 2]]
+                    pd.DataFrame({'loss': losses}).to_csv(os.path.join(dir_path, f'results_{run}.csv'), index=False)
+        self.saver = SaverCsv(LoggerDefault(), root_dir=self.test_dir)
+
+    def tearDown(self):
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def as_dict(self, out):
+        params, values = out
+        return dict(zip([tuple(p) for p in params], values))
+
+    def test_walks_tree_once(self):
+        with patch('slune.savers.csv.find_ext_files', wraps=find_ext_files) as mock_find:
+            self.saver.read({'param2': 0.1}, 'loss', select_by='min', collate_by='mean')
+        self.assertEqual(mock_find.call_count, 1)
+
+    def test_mean_of_runs(self):
+        out = self.as_dict(self.saver.read({'param2': 0.2}, 'loss', select_by='min'))
+        self.assertEqual(set(out.keys()), {('--param1=1', '--param2=0.2'), ('--param1=2', '--param2=0.2'), ('--param1=3', '--param2=0.2')})
+        self.assertAlmostEqual(out[('--param1=2', '--param2=0.2')], 2 * 0.2 * 2)
+
+    def test_threads_match_serial(self):
+        for collate_by in ['mean', 'all']:
+            serial = self.as_dict(self.saver.read({}, 'loss', select_by='max', collate_by=collate_by))
+            threads = self.as_dict(self.saver.read({}, 'loss', select_by='max', collate_by=collate_by, n_workers=4))
+            self.assertEqual(serial, threads)
+
+    def test_processes_match_serial(self):
+        serial = self.as_dict(self.saver.read({'param1': 1}, 'loss', select_by='last', collate_by='all'))
+        processes = self.as_dict(self.saver.read({'param1': 1}, 'loss', select_by='last', collate_by='all', n_workers=2, use_processes=True))
+        self.assertEqual(serial, processes)
+
+
+class TestParallelMap(unittest.TestCase):
+
+    def test_keeps_order(self):
+        items = list(range(20))
+        self.assertEqual(parallel_map(abs, items), items)
+        self.assertEqual(parallel_map(abs, items, n_workers=3), items)
+        self.assertEqual(parallel_map(abs, items, n_workers=3, use_processes=True), items)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import unittest
+import os
+import shutil
+import numpy as np
+import pandas as pd
+from unittest.mock import patch
+from slune.savers.csv import SaverCsv
+from slune.savers.summary import QuantileSketch, MetricSummary, RunSummary
+from slune.loggers.default import LoggerDefault
+
+class TestSaverCsvSummary(unittest.TestCase):
+    """Test SaverCsv keeps sidecar summaries and reads from them"""
+
+    def setUp(self):
+        self.test_dir = 'test_directory'
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+        rng = np.random.default_rng(0)
+        for alpha in [1, 2]:
+            for append in [False, True]:
+                saver = SaverCsv(LoggerDefault(), {'alpha': alpha, 'append': append}, root_dir=self.test_dir, append=append, summary=True)
+                for step in range(50):
+                    metrics = {'loss': float(rng.normal()) * alpha}
+                    if step % 7 == 3:
+                        metrics['acc'] = step / 100
+                    if step == 10:
+                        metrics['loss'] = np.nan
+                    saver.log(metrics)
+                    if step % 20 == 19:
+                        saver.save_collated()
+                if not append:
+                    saver.logger.results = saver.logger.results.iloc[40:]
+                saver.save_collated()
+
+    def tearDown(self):
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def as_dict(self, out):
+        params, values = out
+        return dict(zip([tuple(p) for p in params], values))
+
+    def test_same_values_as_csv(self):
+        with_summary = SaverCsv(LoggerDefault(), root_dir=self.test_dir, summary=True)
+        without = SaverCsv(LoggerDefault(), root_dir=self.test_dir)
+        for metric in ['loss', 'acc']:
+            for select_by in MetricSummary.SELECT_BY:
+                for collate_by in ['mean', 'all']:
+                    expected = self.as_dict(without.read({}, metric, select_by, collate_by))
+                    out = self.as_dict(with_summary.read({}, metric, select_by, collate_by))
+                    self.assertEqual(expected.keys(), out.keys())
+                    for key in expected:
+                        np.testing.assert_allclose(out[key], expected[key], rtol=1e-12)
+
+    def test_csv_not_read(self):
+        saver = SaverCsv(LoggerDefault(), root_dir=self.test_dir, summary=True)
+        with patch('slune.savers.csv.pd.read_csv') as mock_read:
+            saver.read({}, 'loss', 'min')
+            saver.read({'alpha': 2}, 'acc', 'last', 'all')
+            mock_read.assert_not_called()
+
+    def test_stale_summary_ignored(self):
+        path = os.path.join(self.test_dir, 'alpha=1', 'append=True', 'results_0.csv')
+        df = pd.read_csv(path)
+        df.loc[5, 'loss'] = -100
+        df.to_csv(path, index=False)
+        saver = SaverCsv(LoggerDefault(), root_dir=self.test_dir, summary=True)
+        out = self.as_dict(saver.read({'alpha': 1, 'append': True}, 'loss', 'min', 'all'))
+        self.assertEqual(list(out.values()), [-100])
+
+    def test_same_size_change_ignored(self):
+        path = os.path.join(self.test_dir, 'alpha=1', 'append=True', 'results_0.csv')
+        stat = os.stat(path)
+        with open(path, 'r') as f:
+            lines = f.read().split('\n')
+        # Swap two rows, so the file keeps its size but its minimum moves
+        lines[1], lines[2] = lines[2], lines[1]
+        with open(path, 'w') as f:
+            f.write('\n'.join(lines))
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertEqual(os.path.getsize(path), stat.st_size)
+        self.assertIsNone(RunSummary.load(path))
+        saver = SaverCsv(LoggerDefault(), root_dir=self.test_dir, summary=True)
+        without = SaverCsv(LoggerDefault(), root_dir=self.test_dir)
+        self.assertEqual(saver.read({'alpha': 1, 'append': True}, 'loss', 'first', 'all'), without.read({'alpha': 1, 'append': True}, 'loss', 'first', 'all'))
+
+    def test_long_run_median_read_from_csv(self):
+        saver = SaverCsv(LoggerDefault(), {'alpha': 3}, root_dir=self.test_dir, append=True, summary=True)
+        values = np.random.default_rng(0).standard_cauchy(size=1000)
+        for i, value in enumerate(values):
+            saver.log({'loss': float(value)})
+            if i % 100 == 99:
+                saver.save_collated()
+        self.assertIsNone(RunSummary.load(saver.current_path).get('loss', 'median'))
+        reader = SaverCsv(LoggerDefault(), root_dir=self.test_dir, summary=True)
+        out = reader.read({'alpha': 3}, 'loss', 'median', 'all')
+        self.assertEqual(out[1], [pd.read_csv(saver.current_path)['loss'].median()])
+
+    def test_non_numeric_metric_read_from_csv(self):
+        saver = SaverCsv(LoggerDefault(), {'alpha': 3}, root_dir=self.test_dir, append=True, summary=True)
+        saver.log({'name': 'a', 'loss': 1})
+        saver.save_collated()
+        saver.log({'name': 'b', 'loss': 2})
+        saver.save_collated()
+        out = saver.read({'alpha': 3}, 'name', 'last', 'all')
+        self.assertEqual(out[1], ['b'])
+        self.assertIn('name', RunSummary.load(saver.current_path).dropped)
+
+
+class TestQuantileSketch(unittest.TestCase):
+
+    def test_exact_median(self):
+        for n in [1, 2, 5, 200]:
+            values = np.random.default_rng(n).normal(size=n)
+            sketch = QuantileSketch(compression=100)
+            sketch.update(values)
+            self.assertAlmostEqual(sketch.quantile(0.5), np.median(values))
+
+    def test_approximate_median(self):
+        values = np.random.default_rng(0).normal(size=100000)
+        sketch = QuantileSketch(compression=100)
+        for chunk in np.array_split(values, 100):
+            sketch.update(chunk)
+        self.assertLessEqual(len(sketch.centroids), 300)
+        self.assertAlmostEqual(sketch.quantile(0.5), np.median(values), delta=0.02)
+        other = QuantileSketch(compression=100)
+        other.update(values + 10)
+        sketch.merge(other)
+        # The median falls between the two modes, so check its rank rather than its value
+        both = np.concatenate([values, values + 10])
+        self.assertAlmostEqual(np.mean(both <= sketch.quantile(0.5)), 0.5, delta=0.01)
+
+
+if __name__ == '__main__':
+    unittest.main()
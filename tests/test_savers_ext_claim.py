@@ -0,0 +1,135 @@
+import unittest
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import time
+from unittest.mock import patch
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from slune.savers.csv import SaverCsv
+from slune.savers.parquet import SaverParquet
+from slune.loggers.default import LoggerDefault
+
+def save_run(root_dir: str, step: int) -> str:
+    saver = SaverCsv(LoggerDefault(), params={'alpha': 1, 'beta': 2}, root_dir=root_dir)
+    saver.log({'step': step})
+    saver.save_collated()
+    return saver.current_path
+
+class TestSaverExtClaimPath(unittest.TestCase):
+    """Test runs saving the same configuration at the same time get their own results file"""
+
+    def setUp(self):
+        self.test_dir = 'test_directory'
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+        self.dir_path = os.path.join(self.test_dir, 'alpha=1')
+
+    def tearDown(self):
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def test_numeric_numbering(self):
+        os.makedirs(self.dir_path)
+        for n in [2, 9, 10]:
+            pd.DataFrame({'step': [n]}).to_csv(os.path.join(self.dir_path, f'results_{n}.csv'), index=False)
+        saver = SaverCsv(LoggerDefault(), params={'alpha': 1}, root_dir=self.test_dir)
+        self.assertEqual(saver.current_path, os.path.join(self.dir_path, 'results_11.csv'))
+
+    def test_same_path_picked_before_saving(self):
+        first = SaverCsv(LoggerDefault(), params={'alpha': 1}, root_dir=self.test_dir)
+        second = SaverCsv(LoggerDefault(), params={'alpha': 1}, root_dir=self.test_dir)
+        self.assertEqual(first.current_path, second.current_path)
+        for step, saver in enumerate([first, second]):
+            saver.log({'step': step})
+            saver.save_collated()
+        self.assertNotEqual(first.current_path, second.current_path)
+        self.assertEqual(list(pd.read_csv(first.current_path)['step']), [0])
+        self.assertEqual(list(pd.read_csv(second.current_path)['step']), [1])
+        self.assertEqual(sorted(os.listdir(self.dir_path)), ['results_0.csv', 'results_1.csv'])
+
+    def test_saving_again_uses_same_file(self):
+        saver = SaverCsv(LoggerDefault(), params={'alpha': 1}, root_dir=self.test_dir, append=True)
+        saver.log({'step': 0})
+        saver.save_collated()
+        path = saver.current_path
+        saver.log({'step': 1})
+        saver.save_collated()
+        self.assertEqual(saver.current_path, path)
+        self.assertEqual(list(pd.read_csv(path)['step']), [0, 1])
+
+    def write_claim(self, number: int, owner: str, age: float = 0):
+        os.makedirs(self.dir_path, exist_ok=True)
+        marker = os.path.join(self.dir_path, f'results_{number}.csv' + SaverCsv.CLAIM_SUFFIX)
+        with open(marker, 'w') as f:
+            f.write(owner)
+        if age > 0:
+            os.utime(marker, (time.time() - age, time.time() - age))
+        return marker
+
+    def test_live_claim_is_skipped(self):
+        marker = self.write_claim(0, f'{os.getpid()} {socket.gethostname()}')
+        saver = SaverCsv(LoggerDefault(), params={'alpha': 1}, root_dir=self.test_dir)
+        self.assertEqual(saver.current_path, os.path.join(self.dir_path, 'results_1.csv'))
+        self.assertTrue(os.path.exists(marker))
+        self.assertEqual(saver.exists({'alpha': 1}), 0)
+
+    def test_stale_claim_is_removed(self):
+        process = subprocess.Popen([sys.executable, '-c', ''])
+        process.wait()
+        marker = self.write_claim(0, f'{process.pid} {socket.gethostname()}')
+        saver = SaverCsv(LoggerDefault(), params={'alpha': 1}, root_dir=self.test_dir)
+        self.assertEqual(saver.current_path, os.path.join(self.dir_path, 'results_0.csv'))
+        self.assertFalse(os.path.exists(marker))
+
+    def test_claim_from_other_host_times_out(self):
+        marker = self.write_claim(0, '123 some-other-host')
+        saver = SaverCsv(LoggerDefault(), params={'alpha': 1}, root_dir=self.test_dir)
+        self.assertEqual(saver.current_path, os.path.join(self.dir_path, 'results_1.csv'))
+        marker = self.write_claim(0, '123 some-other-host', age=2 * SaverCsv.CLAIM_TIMEOUT)
+        saver = SaverCsv(LoggerDefault(), params={'alpha': 1}, root_dir=self.test_dir)
+        self.assertEqual(saver.current_path, os.path.join(self.dir_path, 'results_0.csv'))
+        self.assertFalse(os.path.exists(marker))
+
+    def test_no_claim_without_rows(self):
+        saver = SaverCsv(LoggerDefault(), params={'alpha': 1}, root_dir=self.test_dir, append=True)
+        saver.save_collated()
+        self.assertEqual(os.listdir(self.dir_path), [])
+        saver.log({'step': 0})
+        saver.save_collated()
+        self.assertEqual(os.listdir(self.dir_path), ['results_0.csv'])
+
+    def test_claim_released_when_write_fails(self):
+        saver = SaverCsv(LoggerDefault(), params={'alpha': 1}, root_dir=self.test_dir)
+        saver.log({'step': 0})
+        with patch.object(SaverCsv, 'write_atomic', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                saver.save_collated()
+        self.assertEqual(os.listdir(self.dir_path), [])
+        saver.save_collated()
+        self.assertEqual(os.listdir(self.dir_path), ['results_0.csv'])
+
+    def test_parquet(self):
+        first = SaverParquet(LoggerDefault(), params={'alpha': 1}, root_dir=self.test_dir)
+        second = SaverParquet(LoggerDefault(), params={'alpha': 1}, root_dir=self.test_dir)
+        for step, saver in enumerate([first, second]):
+            saver.log({'step': step})
+            saver.save_collated()
+            saver.close()
+        self.assertEqual(sorted(os.listdir(self.dir_path)), ['results_0.parquet', 'results_1.parquet'])
+
+    def test_concurrent_processes(self):
+        n_runs = 16
+        with ProcessPoolExecutor(max_workers=8) as pool:
+            paths = list(pool.map(save_run, [self.test_dir] * n_runs, range(n_runs)))
+        self.assertEqual(len(set(paths)), n_runs)
+        steps = sorted(pd.read_csv(path)['step'][0] for path in paths)
+        self.assertEqual(steps, list(range(n_runs)))
+        files = [f for _, _, fs in os.walk(self.test_dir) for f in fs]
+        self.assertFalse(any(f.endswith(SaverCsv.CLAIM_SUFFIX) for f in files))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+import os
+import shutil
+from unittest.mock import patch
+from slune.savers.csv import SaverCsv
+from slune.loggers.default import LoggerDefault
+from slune.utils import DirectoryCache, find_directory_path, get_numeric_equiv
+
+class TestDirectoryCache(unittest.TestCase):
+    """Test DirectoryCache resolves the same paths as listing the filesystem"""
+
+    def setUp(self):
+        self.test_dir = 'test_directory'
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+        os.makedirs(os.path.join(self.test_dir, '--lr=0.1', '--batch=32'))
+        os.makedirs(os.path.join(self.test_dir, '--lr=0.1', '--batch=64'))
+        os.makedirs(os.path.join(self.test_dir, '--lr=1', '--name=a'))
+
+    def tearDown(self):
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def test_same_as_uncached(self):
+        cache = DirectoryCache()
+        for params in [['--lr=', '--batch='], ['--batch=', '--lr='], ['--name=', '--lr='], ['--other=']]:
+            self.assertEqual(find_directory_path(params, self.test_dir, list_dirs=cache), find_directory_path(params, self.test_dir))
+        for path in ['--lr=0.10/--batch=32.0', '--lr=1.0/--name=a', '--lr=2/--batch=32', '--lr=0.1/--batch=128']:
+            self.assertEqual(get_numeric_equiv(path, self.test_dir, list_dirs=cache), get_numeric_equiv(path, self.test_dir))
+
+    def test_lists_each_directory_once(self):
+        cache = DirectoryCache()
+        with patch('slune.utils.os.scandir', wraps=os.scandir) as mock_scandir:
+            get_numeric_equiv('--lr=0.10/--batch=32.0', self.test_dir, list_dirs=cache)
+            find_directory_path(['--lr=', '--batch='], self.test_dir, list_dirs=cache)
+            n_listed = mock_scandir.call_count
+            for _ in range(3):
+                get_numeric_equiv('--lr=0.10/--batch=32.0', self.test_dir, list_dirs=cache)
+                find_directory_path(['--lr=', '--batch='], self.test_dir, list_dirs=cache)
+            self.assertEqual(mock_scandir.call_count, n_listed)
+
+    def test_invalidate(self):
+        cache = DirectoryCache()
+        self.assertEqual(sorted(cache(os.path.join(self.test_dir, '--lr=0.1'))), ['--batch=32', '--batch=64'])
+        new_dir = os.path.join(self.test_dir, '--lr=0.1', '--batch=128')
+        os.makedirs(new_dir)
+        self.assertNotIn('--batch=128', cache(os.path.join(self.test_dir, '--lr=0.1')))
+        cache.invalidate(new_dir)
+        self.assertIn('--batch=128', cache(os.path.join(self.test_dir, '--lr=0.1')))
+        self.assertIn(128.0, cache.numeric(os.path.join(self.test_dir, '--lr=0.1')))
+
+    def test_missing_directory(self):
+        cache = DirectoryCache()
+        self.assertEqual(cache(os.path.join(self.test_dir, 'missing')), [])
+
+class TestSaverExtDirCache(unittest.TestCase):
+    """Test savers caching directory listings give the same paths"""
+
+    def setUp(self):
+        self.test_dir = 'test_directory'
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def tearDown(self):
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def test_same_paths_as_uncached(self):
+        cached = SaverCsv(LoggerDefault(), root_dir=self.test_dir, cache_dirs=True)
+        for params in [{'lr': 0.1, 'batch': 32}, {'lr': 0.1, 'batch': 32.0}, {'batch': 64, 'lr': 0.1}, {'lr': 1, 'batch': 32}]:
+            path = cached.getset_current_path(params, save=False)
+            cached.log({'loss': 1.0})
+            cached.save_collated()
+            uncached = SaverCsv(LoggerDefault(), params=params, root_dir=self.test_dir)
+            self.assertTrue(os.path.exists(path))
+            self.assertEqual(cached.getset_current_path(params, save=False), uncached.current_path)
+
+    def test_new_directories_are_seen(self):
+        saver = SaverCsv(LoggerDefault(), params={'lr': 0.1}, root_dir=self.test_dir, cache_dirs=True)
+        saver.log({'loss': 1.0})
+        saver.save_collated()
+        first_path = saver.current_path
+        self.assertIn(os.path.basename(os.path.dirname(first_path)), saver.dir_cache(self.test_dir))
+        saver.getset_current_path({'lr': 0.10}, save=False)
+        self.assertEqual(saver.current_path, os.path.join(os.path.dirname(first_path), 'results_1.csv'))
+
+
+if __name__ == '__main__':
+    unittest.main()
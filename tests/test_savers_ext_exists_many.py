@@ -0,0 +1,76 @@
+import unittest
+import os
+import shutil
+from unittest.mock import patch
+from slune.savers.csv import SaverCsv
+from slune.loggers.default import LoggerDefault
+from slune.searchers.grid import SearcherGrid
+from slune.utils import find_ext_files
+
+class TestSaverExtExistsMany(unittest.TestCase):
+    """Test SaverExt.exists_many() counts runs like exists() with a single walk"""
+
+    def setUp(self):
+        self.test_dir = 'test_directory'
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+        files = [
+            ('--param1=1', 'results_0.csv'),
+            ('--param1=1', '--param2=2', 'results_0.csv'),
+            ('--param1=1', '--param2=2', 'results_1.csv'),
+            ('--param1=1', '--param2=3', 'results_0.csv'),
+            ('--param1=2.0', '--param2=a', 'results_0.csv'),
+            ('--param1=1', '--param2=2', '--param3=3', 'results_0.csv'),
+        ]
+        for f in files:
+            os.makedirs(os.path.join(self.test_dir, *f[:-1]), exist_ok=True)
+            with open(os.path.join(self.test_dir, *f), 'w') as fh:
+                fh.write('a,b\n1,2\n')
+        self.saver = SaverCsv(LoggerDefault(), root_dir=self.test_dir)
+
+    def tearDown(self):
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def test_matches_exists(self):
+        params_list = [
+            {'param1': 1},
+            {'param1': 1, 'param2': 2},
+            {'param2': 2, 'param1': 1.0},
+            {'param1': 1, 'param2': 3},
+            {'param1': 2, 'param2': 'a'},
+            {'param1': 1, 'param2': 2, 'param3': 3},
+            {'param1': 3},
+            {'param1': 1, 'param2': 2, 'param3': 4},
+        ]
+        expected = [self.saver.exists(p) for p in params_list]
+        self.assertEqual(self.saver.exists_many(params_list), expected)
+        self.assertEqual(expected, [1, 2, 2, 1, 1, 1, 0, 0])
+
+    def test_walks_tree_once(self):
+        params_list = [{'param1': 1, 'param2': v} for v in range(10)]
+        with patch('slune.savers.ext.find_ext_files', wraps=find_ext_files) as mock_find:
+            self.saver.exists_many(params_list)
+        self.assertEqual(mock_find.call_count, 1)
+
+    def test_searcher_uses_exists_many(self):
+        searcher = SearcherGrid({'param1': [1, 2], 'param2': [2, 3, 'a']}, runs=2)
+        with patch.object(self.saver, 'exists', wraps=self.saver.exists) as mock_exists:
+            searcher.check_existing_runs(self.saver)
+            configs = [c for c in searcher]
+        mock_exists.assert_not_called()
+        self.assertEqual(searcher.existing_runs, [2, 1, 0, 0, 0, 1])
+        self.assertEqual(configs, [
+            {'param1': 1, 'param2': 3},
+            {'param1': 1, 'param2': 'a'},
+            {'param1': 1, 'param2': 'a'},
+            {'param1': 2, 'param2': 2},
+            {'param1': 2, 'param2': 2},
+            {'param1': 2, 'param2': 3},
+            {'param1': 2, 'param2': 3},
+            {'param1': 2, 'param2': 'a'},
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
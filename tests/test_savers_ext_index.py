@@ -0,0 +1,140 @@
+import unittest
+import os
+import shutil
+import pandas as pd
+from slune.savers.csv import SaverCsv
+from slune.savers.index import ResultsIndex
+from slune.loggers.default import LoggerDefault
+from slune.__main__ import main
+
+class TestResultsIndex(unittest.TestCase):
+    """Test ResultsIndex manifest of results files"""
+
+    def setUp(self):
+        self.test_dir = 'test_directory'
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+        os.makedirs(os.path.join(self.test_dir, '--param1=1', '--param2=2'))
+        for name in ['results_0.csv', 'results_1.csv']:
+            with open(os.path.join(self.test_dir, '--param1=1', '--param2=2', name), 'w') as f:
+                f.write('a,b\n1,2\n')
+
+    def tearDown(self):
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def test_builds_missing_manifest(self):
+        """Tree written without an index is indexed on first use"""
+        index = ResultsIndex(self.test_dir)
+        self.assertFalse(index.exists())
+        files = index.get_files('.csv')
+        self.assertTrue(index.exists())
+        self.assertEqual(sorted(files), [
+            os.path.join(self.test_dir, '--param1=1', '--param2=2', 'results_0.csv'),
+            os.path.join(self.test_dir, '--param1=1', '--param2=2', 'results_1.csv'),
+        ])
+
+    def test_add_is_seen_by_other_instances(self):
+        """Files added by one index are read incrementally by another"""
+        index = ResultsIndex(self.test_dir)
+        other = ResultsIndex(self.test_dir)
+        self.assertEqual(len(other.get_files()), 2)
+        index.add(os.path.join(self.test_dir, '--param1=3', 'results_0.csv'))
+        self.assertEqual(len(other.get_files()), 3)
+        self.assertEqual(other.list_dirs(self.test_dir), ['--param1=1', '--param1=3'])
+
+    def test_rebuild_replaces_manifest(self):
+        """Rebuilding drops files that no longer exist"""
+        index = ResultsIndex(self.test_dir)
+        self.assertEqual(len(index.get_files()), 2)
+        os.remove(os.path.join(self.test_dir, '--param1=1', '--param2=2', 'results_1.csv'))
+        index.rebuild()
+        self.assertEqual(len(index.get_files()), 1)
+
+    def test_rebuild_indexes_empty_directories(self):
+        os.makedirs(os.path.join(self.test_dir, '--param1=3'))
+        index = ResultsIndex(self.test_dir)
+        index.rebuild()
+        self.assertEqual(index.list_dirs(self.test_dir), ['--param1=1', '--param1=3'])
+        self.assertEqual(len(index.get_files()), 2)
+
+    def test_filters_by_extension(self):
+        index = ResultsIndex(self.test_dir)
+        index.add(os.path.join(self.test_dir, '--param1=1', 'results_0.parquet'))
+        self.assertEqual(len(index.get_files('.csv')), 2)
+        self.assertEqual(len(index.get_files('.parquet')), 1)
+
+    def test_missing_root_dir(self):
+        index = ResultsIndex(os.path.join(self.test_dir, 'missing'))
+        self.assertEqual(index.get_files(), [])
+        self.assertFalse(os.path.exists(os.path.join(self.test_dir, 'missing')))
+
+    def test_command_line_rebuild(self):
+        main(['rebuild-index', self.test_dir])
+        self.assertTrue(os.path.exists(os.path.join(self.test_dir, ResultsIndex.FILE_NAME)))
+
+
+class TestSaverCsvWithIndex(unittest.TestCase):
+    """Test SaverCsv consults the index instead of walking the tree"""
+
+    def setUp(self):
+        self.test_dir = 'test_directory'
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def tearDown(self):
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def save_run(self, params, values):
+        saver = SaverCsv(LoggerDefault(), params=params, root_dir=self.test_dir, use_index=True)
+        for v in values:
+            saver.log({'loss': v})
+        saver.save_collated()
+        return saver
+
+    def test_save_updates_index(self):
+        self.save_run({'param1': 1, 'param2': 2}, [3, 2, 1])
+        self.save_run({'param1': 1, 'param2': 2}, [4, 3])
+        index = ResultsIndex(self.test_dir)
+        self.assertEqual(len(index.get_files('.csv')), 2)
+        saver = SaverCsv(LoggerDefault(), root_dir=self.test_dir, use_index=True)
+        self.assertEqual(saver.exists({'param1': 1, 'param2': 2}), 2)
+        self.assertEqual(saver.exists({'param1': 1.0, 'param2': 2}), 2)
+        self.assertEqual(saver.exists({'param1': 1}), 0)
+
+    def test_only_indexed_files_are_seen(self):
+        """Files written behind the index's back are only seen after a rebuild"""
+        self.save_run({'param1': 1}, [1])
+        path = os.path.join(self.test_dir, 'param1=1', 'results_1.csv')
+        pd.DataFrame({'loss': [0]}).to_csv(path, index=False)
+        saver = SaverCsv(LoggerDefault(), root_dir=self.test_dir, use_index=True)
+        self.assertEqual(saver.exists({'param1': 1}), 1)
+        saver.rebuild_index()
+        self.assertEqual(saver.exists({'param1': 1}), 2)
+
+    def test_get_path_uses_index(self):
+        self.save_run({'param1': 0.1, 'param2': 2}, [1])
+        saver = SaverCsv(LoggerDefault(), root_dir=self.test_dir, use_index=True)
+        path = saver.get_path(['param2=2', 'param1=0.10'])
+        self.assertEqual(path, os.path.join(self.test_dir, 'param1=0.1', 'param2=2', 'results_1.csv'))
+
+    def test_unsaved_directory_is_seen(self):
+        """A directory created by a run that hasn't saved yet is found, as it is without an index"""
+        self.save_run({'param1': 2}, [1])
+        first = SaverCsv(LoggerDefault(), params={'param1': 0.1}, root_dir=self.test_dir, use_index=True)
+        first.make_dirs(os.path.dirname(first.current_path))
+        second = SaverCsv(LoggerDefault(), params={'param1': '0.10'}, root_dir=self.test_dir, use_index=True)
+        self.assertEqual(os.path.dirname(second.current_path), os.path.dirname(first.current_path))
+        self.assertEqual(len(ResultsIndex(self.test_dir).get_files()), 1)
+
+    def test_read_uses_index(self):
+        self.save_run({'param1': 1, 'param2': 2}, [3, 2, 1])
+        self.save_run({'param1': 1, 'param2': 3}, [5, 4])
+        saver = SaverCsv(LoggerDefault(), root_dir=self.test_dir, use_index=True)
+        params, values = saver.read({'param1': 1}, 'loss', select_by='min')
+        self.assertEqual(sorted(values), [1, 4])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+import unittest
+import os
+import shutil
+import gc
+import weakref
+from unittest.mock import patch
+from slune.savers.parquet import SaverParquet
+from slune.loggers.default import LoggerDefault
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+@unittest.skipUnless(pq is not None, "pyarrow is not installed")
+class TestSaverParquet(unittest.TestCase):
+    """Test SaverParquet appends row groups and reads projected columns"""
+
+    def setUp(self):
+        self.test_dir = 'test_directory'
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def tearDown(self):
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def save_run(self, params, values, saves=1):
+        saver = SaverParquet(LoggerDefault(), params=params, root_dir=self.test_dir)
+        for chunk in range(saves):
+            for v in values[chunk::saves]:
+                saver.log({'loss': v, 'epoch': chunk})
+            saver.save_collated()
+        saver.close()
+        return saver
+
+    def test_appends_row_groups(self):
+        saver = self.save_run({'param1': 1}, [3.0, 2.0, 1.0, 0.5], saves=2)
+        parquet_file = pq.ParquetFile(saver.current_path)
+        self.assertEqual(parquet_file.num_row_groups, 2)
+        self.assertEqual(parquet_file.metadata.num_rows, 4)
+        self.assertEqual(str(parquet_file.schema_arrow.field('epoch').type), 'int64')
+
+    def test_does_not_reread_file(self):
+        saver = SaverParquet(LoggerDefault(), params={'param1': 1}, root_dir=self.test_dir)
+        saver.log({'loss': 1.0})
+        saver.save_collated()
+        with patch('pyarrow.parquet.read_table') as mock_read:
+            saver.log({'loss': 2.0})
+            saver.save_collated()
+            mock_read.assert_not_called()
+        saver.close()
+        self.assertEqual(pq.read_table(saver.current_path).column('loss').to_pylist(), [1.0, 2.0])
+
+    def test_new_metric_rewrites(self):
+        saver = SaverParquet(LoggerDefault(), params={'param1': 1}, root_dir=self.test_dir)
+        saver.log({'loss': 1.0})
+        saver.save_collated()
+        saver.log({'loss': 2.0, 'accuracy': 0.5})
+        saver.save_collated()
+        saver.log({'accuracy': 0.7})
+        saver.save_collated()
+        saver.close()
+        df = pq.read_table(saver.current_path).to_pandas()
+        self.assertEqual(list(df.columns), ['loss', 'time_stamp', 'accuracy'])
+        self.assertEqual(len(df), 3)
+        self.assertEqual(df['accuracy'].iloc[-1], 0.7)
+
+    def test_exists_and_path_numbering(self):
+        self.save_run({'param1': 1}, [1.0])
+        saver = self.save_run({'param1': 1}, [2.0])
+        self.assertTrue(saver.current_path.endswith('results_1.parquet'))
+        self.assertEqual(saver.exists({'param1': 1}), 2)
+
+    def test_read(self):
+        self.save_run({'param1': 1, 'param2': 2}, [3.0, 2.0, 1.0])
+        self.save_run({'param1': 1, 'param2': 2}, [5.0, 3.0])
+        self.save_run({'param1': 2, 'param2': 2}, [4.0, 4.5])
+        saver = SaverParquet(LoggerDefault(), root_dir=self.test_dir)
+        params, values = saver.read({'param2': 2}, 'loss', select_by='min')
+        results = dict(zip([tuple(p) for p in params], values))
+        self.assertEqual(results, {('param1=1', 'param2=2'): 2.0, ('param1=2', 'param2=2'): 4.0})
+        params, values = saver.read({'param1': 1}, 'loss', select_by='last', collate_by='all')
+        self.assertEqual(sorted(values), [1.0, 3.0])
+        with self.assertRaises(KeyError):
+            saver.read({'param1': 1}, 'missing')
+
+    def test_read_before_close(self):
+        self.save_run({'param1': 1}, [1.0])
+        saver = SaverParquet(LoggerDefault(), params={'param1': 1}, root_dir=self.test_dir)
+        saver.log({'loss': 0.0})
+        saver.save_collated()
+        saver.log({'loss': -1.0})
+        saver.save_collated()
+        params, values = saver.read({'param1': 1}, 'loss', select_by='min', collate_by='all')
+        self.assertEqual(sorted(values), [-1.0, 1.0])
+        saver.close()
+        self.assertEqual(saver.get_parts(saver.current_path), [])
+        params, values = saver.read({'param1': 1}, 'loss', select_by='min', collate_by='all')
+        self.assertEqual(sorted(values), [-1.0, 1.0])
+
+    def test_killed_job_keeps_saved_rows(self):
+        saver = SaverParquet(LoggerDefault(), params={'param1': 1}, root_dir=self.test_dir)
+        for epoch in range(3):
+            saver.log({'loss': float(epoch), 'epoch': epoch})
+            saver.save_collated()
+        # The job is killed before close is called, so the parts are never merged
+        self.assertEqual(len(saver.get_parts(saver.current_path)), 2)
+        reader = SaverParquet(LoggerDefault(), root_dir=self.test_dir)
+        self.assertEqual(reader.read({'param1': 1}, 'loss', select_by='last')[1], [2.0])
+        self.assertEqual(reader.exists({'param1': 1}), 1)
+        # A merge interrupted before the parts were removed doesn't count them twice
+        tables, _ = saver.read_tables(saver.current_path)
+        saver.merge(tables, saver.current_path, 2)
+        self.assertEqual(len(reader.read_metric(saver.current_path, 'loss')), 3)
+        saver.close()
+
+    def test_exists_does_not_open_files(self):
+        self.save_run({'param1': 1}, [1.0])
+        # Left behind by a job killed while writing
+        with open(os.path.join(self.test_dir, 'param1=1', 'results_1.parquet.tmp.123'), 'wb') as f:
+            f.write(b'PAR1 no footer')
+        saver = SaverParquet(LoggerDefault(), root_dir=self.test_dir)
+        with patch('builtins.open', wraps=open) as mock_open:
+            self.assertEqual(saver.exists({'param1': 1}), 1)
+            self.assertEqual(saver.exists_many([{'param1': 1}]), [1])
+        self.assertFalse(any(str(c.args[0]).endswith('.parquet') for c in mock_open.call_args_list))
+
+    def test_read_skips_unreadable_files(self):
+        self.save_run({'param1': 1}, [1.0])
+        with open(os.path.join(self.test_dir, 'param1=1', 'results_1.parquet'), 'wb') as f:
+            f.write(b'PAR1 no footer')
+        saver = SaverParquet(LoggerDefault(), root_dir=self.test_dir)
+        self.assertEqual(saver.read({'param1': 1}, 'loss', select_by='min')[1], [1.0])
+
+    def test_close_releases_saver(self):
+        saver = SaverParquet(LoggerDefault(), params={'param1': 1}, root_dir=self.test_dir)
+        for v in [1.0, 2.0]:
+            saver.log({'loss': v})
+            saver.save_collated()
+        saver.close()
+        reference = weakref.ref(saver)
+        del saver
+        gc.collect()
+        self.assertIsNone(reference())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+import unittest
+import os
+import shutil
+from slune.searchers.asha import SearcherASHA, get_budgets
+from slune.savers.csv import SaverCsv
+from slune.loggers.default import LoggerDefault
+from slune.executors.local import ExecutorLocal
+from slune.base import BaseSaver, BaseLogger
+from slune import sbatchit
+
+SCRIPT = """import sys
+from slune.savers import SaverCsv
+from slune.loggers import LoggerDefault
+from slune.utils import strings_to_dict
+params = strings_to_dict(sys.argv[1:])
+root_dir = params.pop('root')
+saver = SaverCsv(LoggerDefault(), params, root_dir=root_dir)
+for epoch in range(params['budget']):
+    saver.log({'loss': (params['x'] - 0.3) ** 2 + 1 / (epoch + 1)})
+saver.save_collated()
+"""
+
+def objective(params):
+    return (params['x'] - 0.3) ** 2 + 1 / params['budget']
+
+class MockLogger(BaseLogger):
+    def __init__(self):
+        super(MockLogger, self).__init__()
+
+    def log(self):
+        return 1
+
+    def read_log(self):
+        return 1
+
+class MockSaver(BaseSaver):
+    """Keeps the results of each job in a dictionary, jobs finish as soon as they are run"""
+
+    def __init__(self, logger_instance: BaseLogger):
+        super(MockSaver, self).__init__(logger_instance)
+        self.values = {}
+
+    def run(self, params):
+        self.values[tuple(sorted(params.items()))] = objective(params)
+
+    def save_collated(self, *args, **kwargs):
+        return 1
+
+    def read(self, params, metric_name, select_by='max'):
+        key = tuple(sorted(params.items()))
+        if key not in self.values:
+            return None, None
+        return [key], [self.values[key]]
+
+    def exists(self, params):
+        return 0
+
+class TestSearcherASHA(unittest.TestCase):
+    """Test SearcherASHA promotes the best configurations to larger budgets"""
+
+    def setUp(self):
+        self.configs = {'x': ('uniform', 0.0, 1.0)}
+        self.test_dir = 'test_directory'
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def tearDown(self):
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def test_budgets(self):
+        self.assertEqual(get_budgets(1, 81, 3), [1, 3, 9, 27, 81])
+        self.assertEqual(get_budgets(1, 100, 3), [1, 3, 9, 27, 100])
+        self.assertEqual(get_budgets(0.5, 4.0, 2), [0.5, 1.0, 2.0, 4.0])
+        with self.assertRaises(ValueError):
+            get_budgets(1, 9, 1)
+
+    def run_search(self, searcher, saver):
+        jobs = []
+        for params in searcher:
+            jobs.append(params)
+            saver.run(params)
+        return jobs
+
+    def test_promotions(self):
+        saver = MockSaver(MockLogger())
+        searcher = SearcherASHA(self.configs, 'loss', saver, n_configs=27, min_budget=1, max_budget=9, eta=3, seed=0)
+        jobs = self.run_search(searcher, saver)
+        by_budget = {b: [job['x'] for job in jobs if job['budget'] == b] for b in [1, 3, 9]}
+        self.assertEqual(len(by_budget[1]), 27)
+        self.assertGreaterEqual(len(by_budget[3]), 9)
+        self.assertGreaterEqual(len(by_budget[9]), 3)
+        self.assertLess(len(jobs), 27 * 3)
+        self.assertEqual(len(set((job['x'], job['budget']) for job in jobs)), len(jobs))
+        # Only configurations run with the previous budget are promoted
+        self.assertTrue(set(by_budget[9]) <= set(by_budget[3]) <= set(by_budget[1]))
+        best_x = min(by_budget[1], key=lambda x: abs(x - 0.3))
+        self.assertIn(best_x, by_budget[9])
+        best_config, best_value = searcher.get_best()
+        self.assertEqual(best_config, {'x': best_x, 'budget': 9})
+        self.assertAlmostEqual(best_value, objective(best_config))
+
+    def test_mode_max(self):
+        saver = MockSaver(MockLogger())
+        searcher = SearcherASHA(self.configs, 'loss', saver, n_configs=9, min_budget=1, max_budget=3, eta=3, seed=0, mode='max')
+        jobs = self.run_search(searcher, saver)
+        worst_x = max([job['x'] for job in jobs], key=lambda x: abs(x - 0.3))
+        self.assertIn({'x': worst_x, 'budget': 3}, jobs)
+
+    def test_resume_uses_saved_results(self):
+        saver = MockSaver(MockLogger())
+        self.run_search(SearcherASHA(self.configs, 'loss', saver, n_configs=9, max_budget=9, seed=1), saver)
+        searcher = SearcherASHA(self.configs, 'loss', n_configs=9, max_budget=9, seed=1)
+        searcher.check_existing_runs(saver)
+        self.assertEqual(self.run_search(searcher, saver), [])
+        self.assertEqual(len(searcher.results[0]), 9)
+
+    def test_waits_for_pending_jobs(self):
+        searcher = SearcherASHA(self.configs, 'loss', MockSaver(MockLogger()), n_configs=9, max_budget=9,
+                                max_pending=2, poll_interval=0.01, timeout=0.05)
+        self.assertEqual(len(list(searcher)), 2)
+
+    def test_local_executor(self):
+        os.makedirs(self.test_dir)
+        script_path = os.path.join(self.test_dir, 'script.py')
+        with open(script_path, 'w') as f:
+            f.write(SCRIPT)
+        root_dir = os.path.join(self.test_dir, 'results')
+        saver = SaverCsv(LoggerDefault(), root_dir=root_dir)
+        searcher = SearcherASHA(self.configs, 'loss', saver, n_configs=9, min_budget=1, max_budget=9, eta=3, seed=0,
+                                max_pending=3, poll_interval=0.05, timeout=60)
+        executor = ExecutorLocal(n_workers=3, log_dir=os.path.join(self.test_dir, 'logs'), verbose=False)
+        results = sbatchit(script_path, None, searcher, {'root': root_dir}, executor=executor)['results']
+        self.assertTrue(all(result['returncode'] == 0 for result in results))
+        self.assertEqual(len(searcher.results[0]), 9)
+        self.assertGreaterEqual(len(searcher.results[2]), 1)
+        self.assertEqual(searcher.pending, set())
+        best_config, best_value = searcher.get_best()
+        self.assertEqual(best_config['budget'], 9)
+        self.assertAlmostEqual(best_value, objective(best_config))
+
+
+if __name__ == '__main__':
+    unittest.main()
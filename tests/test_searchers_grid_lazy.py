@@ -0,0 +1,91 @@
+import unittest
+from slune.searchers.grid import SearcherGrid, LazyGrid
+from slune.base import BaseSaver, BaseLogger
+
+class MockLogger(BaseLogger):
+    def __init__(self):
+        super(MockLogger, self).__init__()
+
+    def log(self):
+        return 1
+
+    def read_log(self):
+        return 1
+
+class MockSaver(BaseSaver):
+    def __init__(self, logger_instance: BaseLogger):
+        super(MockSaver, self).__init__(logger_instance)
+
+    def save_collated(self, *args, **kwargs):
+        return 1
+
+    def read(self, *args, **kwargs):
+        return 1
+
+    def exists(self, params):
+        return 1 if params["b"] == "x" else 0
+
+class TestLazyGrid(unittest.TestCase):
+    """Test LazyGrid matches SearcherGrid.get_grid without materialising it"""
+
+    def setUp(self):
+        self.configs = {"a": [1, 2, 3], "b": ["x", "y"], "c": [0.1, 0.2, 0.3, 0.4]}
+
+    def test_same_as_get_grid(self):
+        grid = SearcherGrid(self.configs).get_grid(self.configs)
+        lazy = LazyGrid(self.configs)
+        self.assertEqual(len(lazy), len(grid))
+        self.assertEqual(list(lazy), grid)
+        self.assertEqual([lazy[i] for i in range(len(lazy))], grid)
+        self.assertEqual(lazy[-1], grid[-1])
+
+    def test_out_of_range(self):
+        lazy = LazyGrid(self.configs)
+        with self.assertRaises(IndexError):
+            lazy[len(lazy)]
+        with self.assertRaises(IndexError):
+            lazy[-len(lazy) - 1]
+
+    def test_huge_grid(self):
+        configs = {f"p{i}": list(range(10)) for i in range(12)}
+        lazy = LazyGrid(configs)
+        self.assertEqual(len(lazy), 10 ** 12)
+        self.assertEqual(lazy[123456789012], {f"p{i}": int(d) for i, d in enumerate("123456789012")})
+
+    def test_edge_cases(self):
+        self.assertEqual(list(LazyGrid({})), [{}])
+        self.assertEqual(len(LazyGrid({"a": [1], "b": []})), 0)
+        with self.assertRaises(TypeError):
+            LazyGrid({"a": "abc"})
+
+    def test_searcher_lazy(self):
+        eager = SearcherGrid(self.configs, runs=2)
+        lazy = SearcherGrid(self.configs, runs=2, lazy=True)
+        self.assertIsInstance(lazy.grid, LazyGrid)
+        self.assertEqual(len(lazy), len(eager))
+        self.assertEqual(list(lazy), list(eager))
+
+    def test_searcher_lazy_existing_runs(self):
+        eager = SearcherGrid(self.configs, runs=2)
+        lazy = SearcherGrid(self.configs, runs=2, lazy=True)
+        eager.check_existing_runs(MockSaver(MockLogger()))
+        lazy.check_existing_runs(MockSaver(MockLogger()))
+        self.assertEqual(list(lazy), list(eager))
+
+
+    def test_huge_grid_existing_runs_in_chunks(self):
+        configs = {f"p{i}": list(range(10)) for i in range(12)}
+        searcher = SearcherGrid(configs, runs=1, lazy=True)
+        saver = MockSaver(MockLogger())
+        calls = []
+        saver.exists_many = lambda params_list: calls.append(len(params_list)) or [0] * len(params_list)
+        searcher.check_existing_runs(saver)
+        searcher.chunk_size = 100
+        configs_tried = [next(searcher) for _ in range(250)]
+        self.assertEqual(configs_tried, [searcher.grid[i] for i in range(250)])
+        # Only the chunks we reached are checked, never the whole grid
+        self.assertEqual(calls, [100, 100, 100])
+        self.assertEqual(len(searcher.existing_runs), 100)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+from slune.searchers.grid import SearcherGrid
+from slune.base import BaseSaver, BaseLogger
+
+class MockLogger(BaseLogger):
+    def __init__(self):
+        super(MockLogger, self).__init__()
+
+    def log(self):
+        return 1
+
+    def read_log(self):
+        return 1
+
+class MockSaver(BaseSaver):
+    def __init__(self, logger_instance: BaseLogger):
+        super(MockSaver, self).__init__(logger_instance)
+        self.exists_many_calls = 0
+
+    def save_collated(self, *args, **kwargs):
+        return 1
+
+    def read(self, *args, **kwargs):
+        return 1
+
+    def exists(self, params):
+        return params["a"] % 3
+
+    def exists_many(self, params_list):
+        self.exists_many_calls += 1
+        return super().exists_many(params_list)
+
+class TestSearcherGridShard(unittest.TestCase):
+    """Test SearcherGrid.shard and SearcherGrid.slice"""
+
+    def setUp(self):
+        self.configs = {"a": list(range(7)), "b": ["x", "y", "z"]}
+
+    def test_shards_partition_grid(self):
+        searcher = SearcherGrid(self.configs, runs=0, lazy=True)
+        full = list(SearcherGrid(self.configs, runs=0))
+        shards = [list(searcher.shard(i, 4)) for i in range(4)]
+        self.assertEqual(sum(len(s) for s in shards), len(full))
+        for i, shard in enumerate(shards):
+            self.assertEqual(shard, full[i::4])
+
+    def test_slice(self):
+        searcher = SearcherGrid(self.configs, runs=2, lazy=True)
+        grid = SearcherGrid(self.configs).get_grid(self.configs)
+        expected = [c for c in grid[5:8] for _ in range(2)]
+        self.assertEqual(list(searcher.slice(5, 8)), expected)
+        self.assertEqual(len(list(searcher.slice(18))), 6)
+
+    def test_invalid_shard(self):
+        searcher = SearcherGrid(self.configs)
+        with self.assertRaises(ValueError):
+            searcher.shard(4, 4)
+        with self.assertRaises(ValueError):
+            searcher.shard(0, 0)
+
+    def test_shard_skips_existing_runs(self):
+        searcher = SearcherGrid(self.configs, runs=2, lazy=True)
+        saver = MockSaver(MockLogger())
+        searcher.check_existing_runs(saver)
+        out = list(searcher.shard(1, 2))
+        expected = []
+        for i in range(1, 21, 2):
+            config = searcher.grid[i]
+            expected += [config] * max(0, 2 - config["a"] % 3)
+        self.assertEqual(out, expected)
+        # Only the shard's configurations are checked, in a single call
+        self.assertEqual(saver.exists_many_calls, 1)
+        self.assertIsNone(searcher.existing_runs)
+
+    def test_shard_uses_chunk_size(self):
+        expected = SearcherGrid(self.configs, runs=2, lazy=True)
+        expected.check_existing_runs(MockSaver(MockLogger()))
+        searcher = SearcherGrid(self.configs, runs=2, lazy=True)
+        saver = MockSaver(MockLogger())
+        searcher.check_existing_runs(saver)
+        searcher.chunk_size = 3
+        self.assertEqual(list(searcher.shard(1, 2)), list(expected.shard(1, 2)))
+        # The shard's 10 configurations are checked 3 at a time
+        self.assertEqual(saver.exists_many_calls, 4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import unittest
+import os
+import shutil
+from unittest.mock import patch
+from slune.searchers.hyperband import SearcherHyperband
+from slune.base import BaseSaver, BaseLogger
+from slune import sbatchit
+
+def objective(params):
+    return (params['x'] - 0.3) ** 2 + 1 / params['budget']
+
+class MockLogger(BaseLogger):
+    def __init__(self):
+        super(MockLogger, self).__init__()
+
+    def log(self):
+        return 1
+
+    def read_log(self):
+        return 1
+
+class MockSaver(BaseSaver):
+    """Keeps the results of each job in a dictionary, jobs finish as soon as they are run"""
+
+    def __init__(self, logger_instance: BaseLogger):
+        super(MockSaver, self).__init__(logger_instance)
+        self.values = {}
+
+    def run(self, params):
+        self.values[tuple(sorted(params.items()))] = objective(params)
+
+    def save_collated(self, *args, **kwargs):
+        return 1
+
+    def read(self, params, metric_name, select_by='max'):
+        key = tuple(sorted(params.items()))
+        if key not in self.values:
+            return None, None
+        return [key], [self.values[key]]
+
+    def exists(self, params):
+        return 0
+
+class TestSearcherHyperband(unittest.TestCase):
+    """Test SearcherHyperband runs the Hyperband schedule and continues it when called again"""
+
+    def setUp(self):
+        self.configs = {'x': ('uniform', 0.0, 1.0)}
+
+    def test_schedule(self):
+        searcher = SearcherHyperband(self.configs, 'loss', max_budget=81, eta=3, seed=0)
+        self.assertEqual([(s, n) for s, _, n in searcher.brackets], [(4, 81), (3, 34), (2, 15), (1, 8), (0, 5)])
+        self.assertEqual(searcher.n_configs, 143)
+        self.assertEqual(len(searcher), 206)
+
+    def test_continues_when_called_again(self):
+        saver = MockSaver(MockLogger())
+        rounds = []
+        while True:
+            searcher = SearcherHyperband(self.configs, 'loss', saver, max_budget=9, eta=3, seed=0)
+            jobs = list(searcher)
+            if jobs == []:
+                break
+            for params in jobs:
+                saver.run(params)
+            rounds.append(jobs)
+        self.assertEqual([len(jobs) for jobs in rounds], [17, 4, 1])
+        self.assertEqual(sum(len(jobs) for jobs in rounds), len(searcher))
+        # The first bracket keeps the best of its 9 configurations until the top rung
+        first_bracket = [searcher.sampler[i] for i in range(9)]
+        best = min(first_bracket, key=lambda config: abs(config['x'] - 0.3))
+        self.assertEqual(rounds[-1], [dict(best, budget=9)])
+        best_config, best_value = searcher.get_best()
+        self.assertEqual(best_config['budget'], 9)
+        self.assertAlmostEqual(best_value, objective(best_config))
+
+    def test_unfinished_jobs_are_submitted_again(self):
+        # The saver has no root directory, so no manifest of submitted jobs is kept
+        saver = MockSaver(MockLogger())
+        jobs = list(SearcherHyperband(self.configs, 'loss', saver, max_budget=9, eta=3, seed=1))
+        for params in jobs[:10]:
+            saver.run(params)
+        again = list(SearcherHyperband(self.configs, 'loss', saver, max_budget=9, eta=3, seed=1))
+        # The first bracket has finished its first rung so its best 3 configurations are promoted
+        self.assertEqual([params['budget'] for params in again[:3]], [3, 3, 3])
+        self.assertEqual(again[3:], jobs[10:])
+
+    def test_running_jobs_not_submitted_again(self):
+        saver = MockSaver(MockLogger())
+        saver.root_dir = 'test_directory'
+        self.addCleanup(shutil.rmtree, saver.root_dir, ignore_errors=True)
+        jobs = list(SearcherHyperband(self.configs, 'loss', saver, max_budget=9, eta=3, seed=1))
+        self.assertTrue(os.path.exists(os.path.join(saver.root_dir, '.slune_hyperband_1.json')))
+        # Nothing has finished yet, so there is nothing new to submit
+        self.assertEqual(list(SearcherHyperband(self.configs, 'loss', saver, max_budget=9, eta=3, seed=1)), [])
+        for params in jobs[:10]:
+            saver.run(params)
+        again = list(SearcherHyperband(self.configs, 'loss', saver, max_budget=9, eta=3, seed=1))
+        # Only the promotions of the first bracket are new, the other jobs are still running
+        self.assertEqual([params['budget'] for params in again], [3, 3, 3])
+        self.assertFalse(any(params in jobs for params in again))
+
+    def test_sbatchit_twice(self):
+        saver = MockSaver(MockLogger())
+        saver.root_dir = 'test_directory'
+        self.addCleanup(shutil.rmtree, saver.root_dir, ignore_errors=True)
+        with patch('subprocess.run') as mock_run:
+            for _ in range(2):
+                searcher = SearcherHyperband(self.configs, 'loss', max_budget=9, eta=3, seed=0)
+                sbatchit('script.py', 'template.sh', searcher, saver=saver)
+        self.assertEqual(mock_run.call_count, 17)
+
+    def test_sbatchit(self):
+        saver = MockSaver(MockLogger())
+        searcher = SearcherHyperband(self.configs, 'loss', max_budget=9, eta=3, seed=0)
+        with patch('subprocess.run') as mock_run:
+            sbatchit('script.py', 'template.sh', searcher, saver=saver)
+        self.assertEqual(mock_run.call_count, 17)
+        self.assertEqual(searcher.saver, saver)
+
+    def test_wait(self):
+        saver = MockSaver(MockLogger())
+        searcher = SearcherHyperband(self.configs, 'loss', saver, max_budget=9, eta=3, seed=0, wait=True, poll_interval=0.01)
+        jobs = []
+        for params in searcher:
+            jobs.append(params)
+            saver.run(params)
+        self.assertEqual(len(jobs), len(searcher))
+        self.assertEqual(searcher.pending, set())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+import unittest
+import numpy as np
+from slune.searchers.sampling import SearcherRandom, SearcherQuasiRandom, sobol_points, halton_points
+from slune.base import BaseSaver, BaseLogger
+
+class MockLogger(BaseLogger):
+    def __init__(self):
+        super(MockLogger, self).__init__()
+
+    def log(self):
+        return 1
+
+    def read_log(self):
+        return 1
+
+class MockSaver(BaseSaver):
+    def __init__(self, logger_instance: BaseLogger, existing: dict):
+        super(MockSaver, self).__init__(logger_instance)
+        self.existing = existing
+        self.exists_many_calls = 0
+
+    def save_collated(self, *args, **kwargs):
+        return 1
+
+    def read(self, *args, **kwargs):
+        return 1
+
+    def exists(self, params):
+        return self.existing.get(params['layers'], 0)
+
+    def exists_many(self, params_list):
+        self.exists_many_calls += 1
+        return super().exists_many(params_list)
+
+class TestSearcherRandom(unittest.TestCase):
+    """Test SearcherRandom samples from each distribution and is deterministic"""
+
+    def setUp(self):
+        self.configs = {'lr': ('loguniform', 1e-5, 1e-1), 'dropout': ('uniform', 0.0, 0.5),
+                        'layers': ('int', 1, 4), 'activation': ['relu', 'tanh', 'gelu']}
+
+    def test_distributions(self):
+        samples = list(SearcherRandom(self.configs, 2000, seed=0))
+        self.assertEqual(len(samples), 2000)
+        lrs = np.array([s['lr'] for s in samples])
+        self.assertTrue(np.all((lrs >= 1e-5) & (lrs <= 1e-1)))
+        # Log-uniform, so about a quarter of the samples in each decade
+        self.assertAlmostEqual(np.mean(lrs < 1e-4), 0.25, delta=0.05)
+        self.assertTrue(all(0.0 <= s['dropout'] <= 0.5 for s in samples))
+        self.assertEqual(set(s['layers'] for s in samples), {1, 2, 3, 4})
+        self.assertTrue(all(type(s['layers']) is int and type(s['lr']) is float for s in samples))
+        self.assertEqual(set(s['activation'] for s in samples), {'relu', 'tanh', 'gelu'})
+
+    def test_deterministic_by_index(self):
+        searcher = SearcherRandom(self.configs, 50, seed=3, batch_size=8)
+        samples = list(searcher)
+        again = SearcherRandom(self.configs, 100, seed=3, batch_size=8)
+        self.assertEqual([again[i] for i in range(50)], samples)
+        self.assertEqual(list(again.slice(20, 30)), samples[20:30])
+        self.assertEqual(again[-1], again[99])
+        self.assertNotEqual(list(SearcherRandom(self.configs, 50, seed=4, batch_size=8)), samples)
+        self.assertIsInstance(SearcherRandom(self.configs, 5).seed, int)
+        with self.assertRaises(IndexError):
+            searcher[50]
+
+    def test_shards_partition_samples(self):
+        searcher = SearcherRandom(self.configs, 23, runs=2, seed=1, batch_size=4)
+        self.assertEqual(len(searcher), 46)
+        shards = [list(searcher.shard(i, 3)) for i in range(3)]
+        self.assertEqual(sum(len(s) for s in shards), 46)
+        self.assertEqual(shards[1][:2], [searcher[1], searcher[1]])
+
+    def test_existing_runs(self):
+        searcher = SearcherRandom(self.configs, 20, runs=2, seed=0, batch_size=8)
+        expected = []
+        existing = {1: 2, 2: 1}
+        for i in range(20):
+            expected += [searcher[i]] * (2 - existing.get(searcher[i]['layers'], 0))
+        saver = MockSaver(MockLogger(), existing)
+        searcher.check_existing_runs(saver)
+        self.assertEqual(list(searcher), expected)
+        self.assertEqual(saver.exists_many_calls, 3)
+        searcher = SearcherRandom(self.configs, 20, runs=2, seed=0, batch_size=8)
+        searcher.check_existing_runs(saver)
+        self.assertEqual(list(searcher.slice(0)), expected)
+        with self.assertRaises(ValueError):
+            SearcherRandom(self.configs, 20, runs=0).check_existing_runs(saver)
+
+    def test_invalid_distributions(self):
+        with self.assertRaises(ValueError):
+            SearcherRandom({'lr': ('loguniform', 0, 1)}, 10)
+        with self.assertRaises(ValueError):
+            SearcherRandom({'lr': ('uniform', 1, 0)}, 10)
+        with self.assertRaises(TypeError):
+            SearcherRandom({'lr': 'abc'}, 10)
+        with self.assertRaises(TypeError):
+            SearcherRandom({'lr': ('normal', 0, 1)}, 10)
+
+class TestSearcherQuasiRandom(unittest.TestCase):
+    """Test SearcherQuasiRandom covers the search space evenly"""
+
+    def test_sobol_stratified(self):
+        points = sobol_points(np.arange(64), 21)
+        for j in range(21):
+            self.assertEqual(sorted(np.floor(points[:, j] * 64).astype(int).tolist()), list(range(64)))
+        shift = np.random.default_rng(0).integers(0, 1 << 30, size=21)
+        points = sobol_points(np.arange(64), 21, shift=shift)
+        for j in range(21):
+            self.assertEqual(sorted(np.floor(points[:, j] * 64).astype(int).tolist()), list(range(64)))
+        with self.assertRaises(ValueError):
+            sobol_points(np.arange(4), 22)
+
+    def test_halton(self):
+        points = halton_points(np.arange(1, 5), 2)
+        np.testing.assert_allclose(points[:, 0], [0.5, 0.25, 0.75, 0.125])
+        np.testing.assert_allclose(points[:, 1], [1 / 3, 2 / 3, 1 / 9, 4 / 9])
+
+    def test_methods_cover_space(self):
+        configs = {f'x{i}': ('uniform', 0.0, 1.0) for i in range(12)}
+        for method in SearcherQuasiRandom.METHODS:
+            searcher = SearcherQuasiRandom(configs, 128, method=method, seed=5, batch_size=50)
+            samples = list(searcher)
+            self.assertEqual(len(samples), 128)
+            for name in ['x0', 'x11']:
+                counts = np.bincount(np.floor(np.array([s[name] for s in samples]) * 8).astype(int), minlength=8)
+                self.assertTrue(np.all(counts >= 12), msg=f'{method} {name} {counts}')
+            self.assertEqual([searcher[i] for i in range(128)], samples)
+            self.assertEqual(list(SearcherQuasiRandom(configs, 128, method=method, seed=5)), samples)
+
+    def test_lhs_one_sample_per_interval(self):
+        searcher = SearcherQuasiRandom({'a': ('uniform', 0.0, 1.0), 'b': ('int', 0, 9)}, 10, method='lhs', seed=2)
+        samples = list(searcher)
+        self.assertEqual(sorted(int(s['a'] * 10) for s in samples), list(range(10)))
+        self.assertEqual(sorted(s['b'] for s in samples), list(range(10)))
+
+    def test_invalid_method(self):
+        with self.assertRaises(ValueError):
+            SearcherQuasiRandom({'a': [1, 2]}, 10, method='grid')
+
+
+if __name__ == '__main__':
+    unittest.main()
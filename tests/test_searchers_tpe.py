@@ -0,0 +1,165 @@
+import unittest
+import os
+import shutil
+import numpy as np
+import pandas as pd
+from unittest.mock import patch
+from slune.searchers.tpe import SearcherTPE, fit_parzen, parzen_log_pdf, sample_parzen
+from slune.searchers.sampling import SearcherRandom
+from slune.savers.csv import SaverCsv
+from slune.loggers.default import LoggerDefault
+from slune.base import BaseSaver, BaseLogger
+
+def objective(params):
+    loss = (params['x'] - 0.3) ** 2 + (np.log10(params['lr']) + 3) ** 2 / 10
+    return loss + (0 if params['act'] == 'relu' else 0.5)
+
+class MockLogger(BaseLogger):
+    def __init__(self):
+        super(MockLogger, self).__init__()
+
+    def log(self):
+        return 1
+
+    def read_log(self):
+        return 1
+
+class MockSaver(BaseSaver):
+    """Keeps the results of each job in a dictionary and has no load_all method"""
+
+    def __init__(self, logger_instance: BaseLogger):
+        super(MockSaver, self).__init__(logger_instance)
+        self.values = {}
+
+    def run(self, params):
+        self.values[tuple(sorted(params.items()))] = objective(params)
+
+    def save_collated(self, *args, **kwargs):
+        return 1
+
+    def read(self, params, metric_name, select_by='max'):
+        key = tuple(sorted(params.items()))
+        if key not in self.values:
+            return None, None
+        return [key], [self.values[key]]
+
+    def exists(self, params):
+        return 0
+
+class TestParzen(unittest.TestCase):
+    """Test the Parzen estimator is a density on [0, 1] and samples from it stay inside"""
+
+    def test_density(self):
+        l = fit_parzen(np.array([0.1, 0.15, 0.8]))
+        x = (np.arange(10000) + 0.5) / 10000
+        self.assertAlmostEqual(np.exp(parzen_log_pdf(x, *l)).mean(), 1.0, places=3)
+        self.assertGreater(parzen_log_pdf(np.array([0.12]), *l)[0], parzen_log_pdf(np.array([0.5]), *l)[0])
+        samples = sample_parzen(np.random.default_rng(0), 1000, *l)
+        self.assertTrue(((samples >= 0) & (samples <= 1)).all())
+        # With no points the estimator is the prior
+        self.assertEqual(len(fit_parzen(np.array([]))[0]), 1)
+
+class TestSearcherTPE(unittest.TestCase):
+    """Test SearcherTPE picks configurations using the results saved so far"""
+
+    def setUp(self):
+        self.test_dir = 'test_directory'
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+        self.configs = {'x': ('uniform', 0.0, 1.0), 'lr': ('loguniform', 1e-5, 1e-1), 'act': ['relu', 'tanh'], 'n': ('int', 1, 4)}
+
+    def tearDown(self):
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def run_config(self, params):
+        saver = SaverCsv(LoggerDefault(), params, root_dir=self.test_dir)
+        saver.log({'loss': objective(params) + 1})
+        saver.log({'loss': objective(params)})
+        saver.save_collated()
+
+    def test_to_unit(self):
+        searcher = SearcherTPE(self.configs, 'loss', seed=0)
+        configs = [searcher.sampler[i] for i in range(20)]
+        self.assertEqual(searcher.sampler.from_unit(searcher.to_unit(pd.DataFrame(configs))), configs)
+
+    def test_better_than_random(self):
+        saver = SaverCsv(LoggerDefault(), root_dir=self.test_dir)
+        searcher = SearcherTPE(self.configs, 'loss', saver, n_trials=40, n_startup=10, seed=0)
+        with patch.object(saver, 'load_all', wraps=saver.load_all) as load_all, patch.object(saver, 'read') as read:
+            for params in searcher:
+                self.run_config(params)
+        self.assertEqual(load_all.call_count, 40)
+        read.assert_not_called()
+        _, best_value = searcher.get_best()
+        random = SearcherRandom(self.configs, 40, seed=0)
+        self.assertLess(best_value, min(objective(random[i]) for i in range(40)))
+        self.assertEqual(len(searcher.observations), 40)
+        self.assertEqual(searcher.pending, [])
+
+    def test_uses_earlier_results(self):
+        for params in SearcherRandom(self.configs, 12, seed=1):
+            self.run_config(params)
+        # Runs with other parameters or outside the distributions are ignored
+        self.run_config({'x': 2.0, 'lr': 1e-3, 'act': 'relu', 'n': 1})
+        saver = SaverCsv(LoggerDefault(), {'y': 1}, root_dir=self.test_dir)
+        saver.log({'loss': -1.0})
+        saver.save_collated()
+        searcher = SearcherTPE(self.configs, 'loss', SaverCsv(LoggerDefault(), root_dir=self.test_dir), n_trials=5, n_startup=10, seed=0)
+        configs = list(searcher)
+        self.assertEqual(len(searcher.observations), 12)
+        # There were enough results to skip the random configurations
+        self.assertNotEqual(configs[0], searcher.sampler[0])
+        self.assertEqual(len(searcher.pending), 5)
+
+    def test_select_by_and_mode(self):
+        for params in SearcherRandom(self.configs, 5, seed=2):
+            self.run_config(params)
+        saver = SaverCsv(LoggerDefault(), root_dir=self.test_dir)
+        last = SearcherTPE(self.configs, 'loss', saver, select_by='last')
+        first = SearcherTPE(self.configs, 'loss', saver, select_by='first', mode='max')
+        _, last_value = last.get_best()
+        _, first_value = first.get_best()
+        values = [objective(params) for params in SearcherRandom(self.configs, 5, seed=2)]
+        self.assertAlmostEqual(last_value, min(values))
+        self.assertAlmostEqual(first_value, max(values) + 1)
+        with self.assertRaises(ValueError):
+            SearcherTPE(self.configs, 'loss', select_by='all')
+
+    def test_categorical_values_read_back(self):
+        configs = {'x': ('uniform', 0.0, 1.0), 'flag': [True, False], 'eps': ['1e-3', '0.1']}
+        saver = SaverCsv(LoggerDefault(), root_dir=self.test_dir)
+        searcher = SearcherTPE(configs, 'loss', saver, n_trials=12, n_startup=4, seed=0, max_pending=2, poll_interval=0.01, timeout=1.0)
+        configs_tried = []
+        for params in searcher:
+            configs_tried.append(params)
+            run_saver = SaverCsv(LoggerDefault(), params, root_dir=self.test_dir)
+            run_saver.log({'loss': params['x'] + (0 if params['flag'] else 1)})
+            run_saver.save_collated()
+        self.assertEqual(len(configs_tried), 12)
+        searcher.update()
+        self.assertEqual(len(searcher.observations), 12)
+        self.assertEqual(searcher.pending, [])
+        self.assertTrue(set(searcher.observations['flag']) <= {True, False})
+        self.assertTrue(set(searcher.observations['eps']) <= {'1e-3', '0.1'})
+        best_config, _ = searcher.get_best()
+        self.assertIs(best_config['flag'], True)
+
+    def test_saver_without_load_all(self):
+        saver = MockSaver(MockLogger())
+        searcher = SearcherTPE(self.configs, 'loss', saver, n_trials=15, n_startup=5, seed=0)
+        for params in searcher:
+            saver.run(params)
+        self.assertEqual(len(searcher.observations), 14)
+        self.assertEqual(len(searcher.get_best()[0]), 4)
+
+    def test_waits_for_pending_jobs(self):
+        saver = MockSaver(MockLogger())
+        searcher = SearcherTPE(self.configs, 'loss', saver, n_trials=5, max_pending=2, poll_interval=0.01, timeout=0.05)
+        self.assertEqual(len([searcher.next_tune(), searcher.next_tune()]), 2)
+        with self.assertRaises(StopIteration):
+            next(searcher)
+
+
+if __name__ == '__main__':
+    unittest.main()
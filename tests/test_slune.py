@@ -1,6 +1,6 @@
 import unittest
 from unittest.mock import patch, call, MagicMock
-from slune import submit_job, sbatchit
+from slune import submit_job, sbatchit, SearcherASHA, SearcherHyperband, SearcherTPE
 import os
 
 class TestSubmitJob(unittest.TestCase):
@@ -35,6 +35,36 @@ class TestSbatchit(unittest.TestCase):
                  call(['sbatch', template_path, script_path, '--carg1=str', '--carg2=str', '--arg3=False', '--arg4=0.5'], check=True)]
         mock_run.assert_has_calls(calls, any_order=True)
 
+    @patch('subprocess.run')
+    def test_summary(self, mock_run):
+        searcher = MagicMock()
+        searcher.__iter__.return_value = [{'arg1': 1}, {'arg1': 2}]
+        summary = sbatchit('script.py', 'template.sh', searcher)
+        self.assertEqual(summary['n_configs'], 2)
+        self.assertEqual((summary['job_ids'], summary['failures'], summary['results']), ([], [], []))
+
+    @patch('subprocess.run')
+    def test_incompatible_modes(self, mock_run):
+        searcher = MagicMock()
+        searcher.__iter__.return_value = [{'arg1': 1}]
+        for kwargs in [{'array': True, 'max_concurrency': 2}, {'executor': MagicMock(), 'pack': 2},
+                       {'executor': MagicMock(), 'array': True}, {'pack': 2, 'max_concurrency': 2}, {'max_parallel': 2}]:
+            with self.assertRaises(ValueError):
+                sbatchit('script.py', 'template.sh', searcher, **kwargs)
+        mock_run.assert_not_called()
+
+    @patch('subprocess.run')
+    def test_searchers_waiting_for_results(self, mock_run):
+        configs = {'alpha': ('uniform', 0.0, 1.0)}
+        for searcher in [SearcherASHA(configs, 'loss'), SearcherHyperband(configs, 'loss', wait=True), SearcherTPE(configs, 'loss', max_pending=2)]:
+            for kwargs in [{'array': True}, {'pack': 2}, {'max_concurrency': 2}]:
+                with self.assertRaises(ValueError):
+                    sbatchit('script.py', 'template.sh', searcher, **kwargs)
+        mock_run.assert_not_called()
+        # Searchers that don't wait only return the jobs they can, so they can be used in any mode
+        self.assertFalse(SearcherHyperband(configs, 'loss').waits_for_results)
+        self.assertFalse(SearcherTPE(configs, 'loss').waits_for_results)
+
 
 if __name__ == '__main__':
     unittest.main()
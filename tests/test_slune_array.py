@@ -0,0 +1,66 @@
+import unittest
+from unittest.mock import patch, MagicMock
+from slune import sbatchit
+from slune.slune import get_array_args, write_manifest
+from slune.__main__ import main
+import io
+import os
+import shutil
+from contextlib import redirect_stdout
+
+class TestSbatchitArray(unittest.TestCase):
+    """Test sbatchit can submit all jobs as a single job array"""
+
+    def setUp(self):
+        self.test_dir = 'test_directory'
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+        self.script_path = os.path.join('path', 'to', 'script')
+        self.template_path = os.path.join('path', 'to', 'template')
+        self.searcher = MagicMock()
+        self.searcher.__iter__.return_value = [{'arg1': 1, 'arg2': 'two'}, {'arg3': False, 'arg4': 0.5}, {'arg1': 3, 'arg2': 'a b'}]
+
+    def tearDown(self):
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    @patch('subprocess.run')
+    def test_single_submission(self, mock_run):
+        manifest_path = os.path.join(self.test_dir, 'manifest.json')
+        sbatchit(self.script_path, self.template_path, self.searcher, {'carg': 'str'}, array=True, max_parallel=2, manifest_path=manifest_path)
+        mock_run.assert_called_once_with(['sbatch', '--array=0-2%2', self.template_path, self.script_path, manifest_path], check=True)
+        self.assertEqual(get_array_args(manifest_path, 0), ['--carg=str', '--arg1=1', '--arg2=two'])
+        self.assertEqual(get_array_args(manifest_path, 2), ['--carg=str', '--arg1=3', '--arg2=a b'])
+
+    @patch('subprocess.run')
+    def test_split_large_arrays(self, mock_run):
+        manifest_path = os.path.join(self.test_dir, 'manifest.json')
+        sbatchit(self.script_path, self.template_path, self.searcher, array=True, manifest_path=manifest_path, max_array_size=2)
+        self.assertEqual(mock_run.call_count, 2)
+        paths = [os.path.join(self.test_dir, f'manifest_{i}.json') for i in range(2)]
+        self.assertEqual(mock_run.call_args_list[0][0][0], ['sbatch', '--array=0-1', self.template_path, self.script_path, paths[0]])
+        self.assertEqual(mock_run.call_args_list[1][0][0], ['sbatch', '--array=0-0', self.template_path, self.script_path, paths[1]])
+        self.assertEqual(get_array_args(paths[1], 0), ['--arg1=3', '--arg2=a b'])
+
+    @patch('subprocess.run')
+    def test_nothing_to_submit(self, mock_run):
+        self.searcher.__iter__.return_value = []
+        sbatchit(self.script_path, self.template_path, self.searcher, array=True, manifest_path=os.path.join(self.test_dir, 'manifest.json'))
+        mock_run.assert_not_called()
+
+    def test_task_id_from_environment(self):
+        manifest_path = os.path.join(self.test_dir, 'manifest.json')
+        write_manifest([['--a=1'], ['--a=2', '--b=x']], manifest_path)
+        with patch.dict(os.environ, {'SLURM_ARRAY_TASK_ID': '1'}):
+            self.assertEqual(get_array_args(manifest_path), ['--a=2', '--b=x'])
+            out = io.StringIO()
+            with redirect_stdout(out):
+                main(['array-args', manifest_path])
+            self.assertEqual(out.getvalue(), '--a=2\n--b=x\n')
+        with patch.dict(os.environ, {}, clear=True):
+            with self.assertRaises(ValueError):
+                get_array_args(manifest_path)
+
+
+if __name__ == '__main__':
+    unittest.main()
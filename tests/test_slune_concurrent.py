@@ -0,0 +1,82 @@
+import unittest
+from unittest.mock import patch, MagicMock
+from slune.slune import sbatchit, submit_job_retry
+import os
+import stat
+import shutil
+import subprocess
+
+# Fake sbatch which fails with a transient error the first time it sees each job,
+# and fails permanently for jobs with --bad=1
+FAKE_SBATCH = """#!/bin/bash
+DIR="$(dirname "$0")"
+for arg in "$@"; do
+    if [ "$arg" == "--bad=1" ]; then
+        echo "sbatch: error: Batch job submission failed: Invalid account" >&2
+        exit 1
+    fi
+done
+KEY=$(echo "$@" | md5sum | cut -c1-8)
+if [ ! -f "$DIR/seen_$KEY" ]; then
+    touch "$DIR/seen_$KEY"
+    echo "sbatch: error: Socket timed out on send/recv operation" >&2
+    exit 1
+fi
+echo "$@" >> "$DIR/submitted.log"
+echo "Submitted batch job $((RANDOM + 1000))"
+"""
+
+class TestSbatchitConcurrent(unittest.TestCase):
+    """Test concurrent submission with retries against a fake sbatch on PATH"""
+
+    def setUp(self):
+        self.test_dir = os.path.abspath('test_directory')
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+        os.makedirs(self.test_dir)
+        sbatch_path = os.path.join(self.test_dir, 'sbatch')
+        with open(sbatch_path, 'w') as f:
+            f.write(FAKE_SBATCH)
+        os.chmod(sbatch_path, os.stat(sbatch_path).st_mode | stat.S_IEXEC)
+        self.env = patch.dict(os.environ, {'PATH': self.test_dir + os.pathsep + os.environ['PATH']})
+        self.env.start()
+
+    def tearDown(self):
+        self.env.stop()
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def submitted(self):
+        with open(os.path.join(self.test_dir, 'submitted.log')) as f:
+            return sorted(line.split() for line in f.read().splitlines())
+
+    def test_retry_transient(self):
+        job_id = submit_job_retry('template.sh', 'script.py', {'a': 1}, backoff=0.01)
+        self.assertTrue(job_id.isdigit())
+        self.assertEqual(self.submitted(), [['template.sh', 'script.py', '--a=1']])
+
+    def test_no_retry_on_permanent_error(self):
+        with self.assertRaises(subprocess.CalledProcessError) as context:
+            submit_job_retry('template.sh', 'script.py', {'bad': 1}, backoff=0.01)
+        self.assertIn('Invalid account', context.exception.stderr)
+
+    def test_give_up_after_retries(self):
+        with self.assertRaises(subprocess.CalledProcessError):
+            submit_job_retry('template.sh', 'script.py', {'a': 1}, retries=0)
+
+    def test_summary(self):
+        searcher = MagicMock()
+        searcher.__iter__.return_value = [{'a': i} for i in range(8)] + [{'bad': 1}]
+        summary = sbatchit('script.py', 'template.sh', searcher, {'c': 'x'}, max_concurrency=4, backoff=0.01)
+        self.assertEqual(summary['n_configs'], 9)
+        self.assertEqual(len(summary['job_ids']), 8)
+        self.assertEqual(len(summary['failures']), 1)
+        self.assertEqual(summary['failures'][0][0], {'c': 'x', 'bad': 1})
+        self.assertIn('Invalid account', summary['failures'][0][1])
+        self.assertGreater(summary['wall_time'], 0)
+        expected = sorted(['template.sh', 'script.py', '--c=x', f'--a={i}'] for i in range(8))
+        self.assertEqual(self.submitted(), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import unittest
+from unittest.mock import patch, MagicMock
+from slune import sbatchit
+from slune.slune import pack_configs, run_bundle, get_array_args
+from slune.savers.csv import SaverCsv
+from slune.loggers.default import LoggerDefault
+from slune.__main__ import main
+import io
+import os
+import shutil
+from contextlib import redirect_stdout
+
+SCRIPT = """import sys
+from slune.savers import SaverCsv
+from slune.loggers import LoggerDefault
+from slune.utils import strings_to_dict
+params = strings_to_dict(sys.argv[1:])
+root_dir = params.pop('root')
+if params['alpha'] == 'fail':
+    sys.exit(3)
+saver = SaverCsv(LoggerDefault(), params, root_dir=root_dir)
+saver.log({'alpha': float(params['alpha'])})
+saver.save_collated()
+"""
+
+class TestPackConfigs(unittest.TestCase):
+    """Test configurations are grouped into bundles"""
+
+    def setUp(self):
+        self.configs = [{'alpha': i} for i in range(7)]
+
+    def test_fixed_size(self):
+        bundles = pack_configs(self.configs, pack=3)
+        self.assertEqual(bundles, [self.configs[0:3], self.configs[3:6], self.configs[6:]])
+        with self.assertRaises(ValueError):
+            pack_configs(self.configs)
+
+    def test_time_budget(self):
+        runtimes = {0: 50, 1: 10, 2: 30, 3: 20, 4: 40, 5: 90, 6: 200}
+        bundles = pack_configs(self.configs, time_budget=60, estimate_runtime=lambda c: runtimes[c['alpha']])
+        self.assertEqual(sorted(c['alpha'] for b in bundles for c in b), list(range(7)))
+        for bundle in bundles:
+            if len(bundle) > 1:
+                self.assertLessEqual(sum(runtimes[c['alpha']] for c in bundle), 60)
+            self.assertEqual(bundle, sorted(bundle, key=lambda c: c['alpha']))
+        self.assertIn([{'alpha': 6}], bundles)
+        self.assertEqual(len(bundles), 5)
+
+    def test_time_budget_and_pack(self):
+        bundles = pack_configs(self.configs, pack=2, time_budget=100, estimate_runtime=lambda c: 1)
+        self.assertEqual([len(b) for b in bundles], [2, 2, 2, 1])
+        with self.assertRaises(ValueError):
+            pack_configs(self.configs, time_budget=100)
+
+class TestSbatchitPack(unittest.TestCase):
+    """Test sbatchit submits one job per bundle and each job runs its bundle"""
+
+    def setUp(self):
+        self.test_dir = 'test_directory'
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+        os.makedirs(self.test_dir)
+        self.script_path = os.path.join(self.test_dir, 'script.py')
+        with open(self.script_path, 'w') as f:
+            f.write(SCRIPT)
+        self.template_path = os.path.join('path', 'to', 'template')
+        self.manifest_path = os.path.join(self.test_dir, 'manifest.json')
+        self.results_dir = os.path.join(self.test_dir, 'results')
+        self.searcher = MagicMock()
+        self.searcher.__iter__.return_value = [{'alpha': 1}, {'alpha': 2}, {'alpha': 3}]
+
+    def tearDown(self):
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    @patch('subprocess.run')
+    def test_one_job_per_bundle(self, mock_run):
+        sbatchit(self.script_path, self.template_path, self.searcher, {'c': 'x'}, pack=2, manifest_path=self.manifest_path)
+        self.assertEqual([call[0][0] for call in mock_run.call_args_list],
+                         [['sbatch', self.template_path, self.script_path, self.manifest_path, str(i)] for i in range(2)])
+        self.assertEqual(get_array_args(self.manifest_path, 0), [['--c=x', '--alpha=1'], ['--c=x', '--alpha=2']])
+        self.assertEqual(get_array_args(self.manifest_path, 1), [['--c=x', '--alpha=3']])
+
+    @patch('subprocess.run')
+    def test_bundles_as_array(self, mock_run):
+        sbatchit(self.script_path, self.template_path, self.searcher, pack=2, array=True, max_parallel=1, manifest_path=self.manifest_path)
+        mock_run.assert_called_once_with(['sbatch', '--array=0-1%1', self.template_path, self.script_path, self.manifest_path], check=True)
+
+    @patch('subprocess.run')
+    def test_bundles_split_by_max_array_size(self, mock_run):
+        self.searcher.__iter__.return_value = [{'alpha': i} for i in range(5)]
+        sbatchit(self.script_path, self.template_path, self.searcher, pack=1, array=True, max_array_size=2, manifest_path=self.manifest_path)
+        chunk_paths = [os.path.join(self.test_dir, f'manifest_{i}.json') for i in range(3)]
+        self.assertEqual([call[0][0] for call in mock_run.call_args_list],
+                         [['sbatch', f'--array=0-{n - 1}', self.template_path, self.script_path, path] for n, path in zip([2, 2, 1], chunk_paths)])
+        self.assertEqual(get_array_args(chunk_paths[2], 0), [['--alpha=4']])
+
+    def test_run_bundle_saves_each_config(self):
+        with patch('subprocess.run'):
+            sbatchit(self.script_path, self.template_path, self.searcher, {'root': self.results_dir}, pack=3, manifest_path=self.manifest_path)
+        for n_workers in [1, 3]:
+            with redirect_stdout(io.StringIO()):
+                self.assertEqual(run_bundle(self.script_path, self.manifest_path, 0, n_workers=n_workers), [0, 0, 0])
+        saver = SaverCsv(LoggerDefault(), root_dir=self.results_dir)
+        for alpha in [1, 2, 3]:
+            self.assertEqual(saver.exists({'alpha': alpha}), 2)
+
+    def test_cli_reports_failures(self):
+        with patch('subprocess.run'):
+            sbatchit(self.script_path, self.template_path, self.searcher, {'root': self.results_dir}, pack=3, manifest_path=self.manifest_path)
+        with patch.dict(os.environ, {'SLURM_ARRAY_TASK_ID': '0'}):
+            out = io.StringIO()
+            with redirect_stdout(out):
+                main(['run-bundle', self.script_path, self.manifest_path, '--n-workers', '2'])
+            self.assertIn('Ran 3 configurations, 0 failed', out.getvalue())
+        with patch('subprocess.run'):
+            self.searcher.__iter__.return_value = [{'alpha': 'fail'}]
+            sbatchit(self.script_path, self.template_path, self.searcher, {'root': self.results_dir}, pack=3, manifest_path=self.manifest_path)
+        with redirect_stdout(io.StringIO()):
+            with self.assertRaises(SystemExit):
+                main(['run-bundle', self.script_path, self.manifest_path, '--bundle-id', '0'])
+
+
+if __name__ == '__main__':
+    unittest.main()
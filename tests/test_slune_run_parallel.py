@@ -0,0 +1,56 @@
+import unittest
+from functools import partial
+from slune import run_parallel, get_csv_saver, SearcherGrid, SearcherASHA
+import os
+import shutil
+
+def train(config, saver):
+    for step in range(3):
+        saver.log({'loss': config['alpha'] * step})
+    return os.getpid()
+
+def fail(config, saver):
+    if config['alpha'] == 2:
+        raise ValueError('bad alpha')
+
+class TestRunParallel(unittest.TestCase):
+    """Test run_parallel runs a callable for each configuration in a pool of processes"""
+
+    def setUp(self):
+        self.test_dir = 'test_directory'
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+        self.saver_factory = partial(get_csv_saver, root_dir=self.test_dir)
+
+    def tearDown(self):
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def test_results_saved(self):
+        searcher = SearcherGrid({'alpha': [1, 2, 3, 4, 5, 6]})
+        pids = run_parallel(train, searcher, self.saver_factory, n_workers=2, cargs={'opt': 'sgd'})
+        self.assertEqual(len(pids), 6)
+        # Workers are reused for many configurations
+        self.assertLessEqual(len(set(pids)), 2)
+        self.assertNotIn(os.getpid(), pids)
+        params, value = get_csv_saver(root_dir=self.test_dir).read({'alpha': 4}, 'loss', select_by='max')
+        self.assertEqual(value, [8])
+
+    def test_skip_existing_runs(self):
+        run_parallel(train, SearcherGrid({'alpha': [1, 2]}), self.saver_factory, n_workers=2)
+        searcher = SearcherGrid({'alpha': [1, 2, 3]}, runs=1)
+        pids = run_parallel(train, searcher, self.saver_factory, n_workers=2, saver=get_csv_saver(root_dir=self.test_dir))
+        self.assertEqual(len(pids), 1)
+
+    def test_error_raised(self):
+        with self.assertRaises(ValueError):
+            run_parallel(fail, SearcherGrid({'alpha': [1, 2, 3]}), self.saver_factory, n_workers=2)
+
+
+    def test_rejects_searcher_waiting_for_results(self):
+        searcher = SearcherASHA({'alpha': ('uniform', 0.0, 1.0)}, 'loss', max_budget=9)
+        with self.assertRaises(ValueError):
+            run_parallel(train, searcher, self.saver_factory, n_workers=2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+import os
+import shutil
+from unittest.mock import patch
+from slune.utils import find_ext_files, get_all_paths, get_all_paths_exact_depth
+from slune.savers.csv import SaverCsv
+from slune.loggers.default import LoggerDefault
+
+class TestFindExtFilesPruned(unittest.TestCase):
+    """Test find_ext_files only lists the directories that can contain matches"""
+
+    def setUp(self):
+        self.test_dir = 'test_directory'
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+        for a in range(5):
+            for b in ['x', 'y']:
+                os.makedirs(os.path.join(self.test_dir, f'--a={a}', f'--b={b}'))
+                open(os.path.join(self.test_dir, f'--a={a}', f'--b={b}', 'results_0.csv'), 'w').close()
+                for c in range(3):
+                    os.makedirs(os.path.join(self.test_dir, f'--a={a}', f'--b={b}', f'--c={c}'))
+                    open(os.path.join(self.test_dir, f'--a={a}', f'--b={b}', f'--c={c}', 'results_0.csv'), 'w').close()
+
+    def tearDown(self):
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def count_listings(self, fn, *args, **kwargs):
+        with patch('slune.utils.os.scandir', wraps=os.scandir) as mock_scandir:
+            out = fn(*args, **kwargs)
+        return out, mock_scandir.call_count
+
+    def test_same_files_as_walk(self):
+        walked = sorted(os.path.join(root, f) for root, _, files in os.walk(self.test_dir) for f in files)
+        self.assertEqual(sorted(find_ext_files('.csv', self.test_dir)), walked)
+
+    def test_exact_depth_pruned(self):
+        dirs = ['--a=1.0', '--b=x']
+        expected = [os.path.join(self.test_dir, '--a=1', '--b=x', 'results_0.csv')]
+        paths, listings = self.count_listings(get_all_paths_exact_depth, '.csv', dirs, self.test_dir)
+        self.assertEqual(paths, expected)
+        # Root, --a=1 and --a=1/--b=x
+        self.assertEqual(listings, 3)
+        _, full = self.count_listings(find_ext_files, '.csv', self.test_dir)
+        self.assertEqual(full, 1 + 5 + 10 + 30)
+
+    def test_unique_params_pruned(self):
+        dirs = ['--a=2', '--c=1']
+        expected = get_all_paths('.csv', dirs, self.test_dir)
+        paths, listings = self.count_listings(get_all_paths, '.csv', dirs, self.test_dir, unique_params=True)
+        self.assertEqual(paths, expected)
+        self.assertEqual(len(paths), 2)
+        # Root, --a=2, its 2 --b dirs and their --c=1 dirs
+        self.assertEqual(listings, 1 + 1 + 2 + 2)
+
+    def test_saver_walks_only_matching_dirs(self):
+        saver = SaverCsv(LoggerDefault(), root_dir=self.test_dir)
+        _, listings = self.count_listings(saver.exists, {'a': 3, 'b': 'y', 'c': 0})
+        self.assertEqual(listings, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+import os
+from slune.utils import ResultsTree, get_all_paths, get_param_key
+
+class TestResultsTree(unittest.TestCase):
+    """Test ResultsTree finds the files matching some parameters"""
+
+    def setUp(self):
+        self.root = os.path.join('root', 'dir')
+        self.files = [
+            os.path.join(self.root, '--a=1', '--b=x', 'results_0.csv'),
+            os.path.join(self.root, '--a=1', '--b=x', 'results_1.csv'),
+            os.path.join(self.root, 'a=1.0', 'b=y', 'results_0.csv'),
+            os.path.join(self.root, '--a=2', '--b=x', '--c=0.5', 'results_0.csv'),
+            os.path.join(self.root, '--b=x', '--a=2', 'results_0.csv'),
+            os.path.join(self.root, '--a=3', 'results_0.csv'),
+        ]
+        self.tree = ResultsTree(self.files, self.root)
+
+    def test_match(self):
+        self.assertEqual(self.tree.match(['--a=1']), self.files[:3])
+        self.assertEqual(self.tree.match(['a=1', 'b=x']), self.files[:2])
+        self.assertEqual(self.tree.match(['--b=x', '--a=2.0']), self.files[3:5])
+        self.assertEqual(self.tree.match(['--a=4']), [])
+        self.assertEqual(self.tree.match(['--a=1', 'results_1.csv']), [self.files[1]])
+        self.assertEqual(self.tree.match([]), self.files)
+        self.assertEqual(self.tree.match(None), self.files)
+
+    def test_match_exact_depth(self):
+        self.assertEqual(self.tree.match_exact_depth(['--a=2', '--b=x']), [self.files[4]])
+        self.assertEqual(self.tree.match_exact_depth(['--a=3']), [self.files[5]])
+        self.assertEqual(self.tree.match_exact_depth(['--a=1']), [])
+
+    def test_count_by_params(self):
+        counts = self.tree.count_by_params()
+        self.assertEqual(counts[get_param_key(['a=1', 'b=x'])], 2)
+        self.assertEqual(counts[get_param_key(['b=x', 'a=2'])], 1)
+        self.assertEqual(counts[get_param_key(['a=3'])], 1)
+
+    def test_same_as_get_all_paths(self):
+        for dirs in [['--a=1'], ['b=x'], ['--a=2', '--c=0.50'], ['--b=y', 'a=1']]:
+            self.assertEqual(self.tree.match(dirs), get_all_paths('.csv', dirs, self.root, files=self.files))
+
+
+if __name__ == '__main__':
+    unittest.main()